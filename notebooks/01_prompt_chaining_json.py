@@ -21,5 +21,35 @@ def _():
     return
 
 
+@app.cell
+def _():
+    # Streaming the chain output above: each trends[] element is handed to the consumer
+    # as soon as its closing brace arrives, instead of after the whole JSON document.
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from json_stream import InvalidField, iter_json_events
+    from utils import get_openrouter_model
+
+    llm = get_openrouter_model()
+    trends_prompt = ChatPromptTemplate.from_template(
+        "Identify the top 3 emerging trends in {market}. Respond only with a JSON object of the form "
+        '{{"trends": [{{"trend_name": "...", "supporting_data": "..."}}]}}.'
+    )
+    trends_chain = trends_prompt | llm
+
+    try:
+        events = iter_json_events(
+            trends_chain.stream({"market": "consumer retail"}),
+            paths=["trends[*]"],
+            # A trend without supporting data stops generation immediately.
+            validators={"trends[*].supporting_data": lambda data: bool(data and data.strip())},
+        )
+        for event in events:
+            print(f"{event.dotted}: {event.value['trend_name']} -- {event.value['supporting_data']}")
+    except InvalidField as e:
+        print(f"Aborted generation, invalid field {e.path}: {e.value!r}")
+    return
+
+
 if __name__ == "__main__":
     app.run()
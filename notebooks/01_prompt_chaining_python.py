@@ -7,9 +7,11 @@ app = marimo.App()
 @app.cell
 def _():
     import os
+    import time
     from langchain_openai import ChatOpenAI
     from langchain_core.prompts import ChatPromptTemplate
     from langchain_core.output_parsers import StrOutputParser
+    from llm_tokens import TokenMonitor
 
     # For better security, load environment variables from a .env file
     # from dotenv import load_dotenv
@@ -45,11 +47,34 @@ def _():
     # --- Run the Chain ---
     input_text = "The new laptop model features a 3.5 GHz octa-core processor, 16GB of RAM, and a 1TB NVMe SSD."
 
-    # Execute the chain with the input text dictionary.
-    final_result = full_chain.invoke({"text_input": input_text})
+    # Execute the chain with the input text dictionary. The token monitor records
+    # provider-reported usage of both LLM calls through a LangChain callback.
+    token_monitor = TokenMonitor()
+    start = time.perf_counter()
+    final_result = full_chain.invoke(
+        {"text_input": input_text}, config={"callbacks": [token_monitor.callback(pipeline="prompt_chaining")]}
+    )
+    two_step_latency = time.perf_counter() - start
 
     print("\n--- Final JSON Output ---")
     print(final_result)
+    print(f"Tokens (input, output): {token_monitor.get_total_tokens()}")
+
+    # --- Single-Call Structured Output ---
+    # Extraction and JSON shaping in one round trip: the model is constrained to a
+    # JSON schema and the answer is validated into a Pydantic model. The two-step
+    # chain is only used as a fallback when validation fails.
+    from spec_extraction import SpecExtractor
+
+    extractor = SpecExtractor(llm)
+    extractor.two_step_latency = two_step_latency  # Baseline from the run above
+    result = extractor.invoke(input_text)
+
+    print(f"\n--- Single-Call Output ({result.mode}) ---")
+    print(result.specs.model_dump_json(indent=2))
+    print(f"Latency: {result.latency:.2f}s (two-step: {two_step_latency:.2f}s)")
+    if result.saved is not None:
+        print(f"Saved per document: {result.saved:.2f}s")
     return
 
 
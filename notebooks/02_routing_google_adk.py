@@ -89,36 +89,63 @@ def _():
 
     import asyncio
 
-    async def run_coordinator(runner: InMemoryRunner, request: str):
-        """Runs the coordinator agent with a given request and delegates."""
-        print(f"\n--- Running Coordinator with request: '{request}' ---")
-        final_result = ""
-        try:
-            user_id = "user_123"
-            session_id = str(uuid.uuid4())
-            await runner.session_service.create_session(
-                app_name=runner.app_name, user_id=user_id, session_id=session_id
-            )
-
-            async for event in runner.run_async(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=types.Content(
-                    role='user',
-                    parts=[types.Part(text=request)]
-                ),
-            ):
-                if event.is_final_response():
-                    if event.content and event.content.parts:
-                        text_parts = [part.text for part in event.content.parts if part.text]
-                        final_result = "".join(text_parts)
-                    break
-
-            print(f"Coordinator Final Response: {final_result}")
-            return final_result
-        except Exception as e:
-            print(f"An error occurred while processing your request: {e}")
-            return f"An error occurred while processing your request: {e}"
+    # --- Concurrent Driver ---
+    # Requests run concurrently through the single runner; each user keeps one session,
+    # so a user's follow-up turns see the earlier ones while other users proceed in parallel.
+    from adk_driver import ConcurrentRunnerDriver
+
+    # --- Speculative Routing ---
+    # The coordinator's LLM call only decides which sub-agent to transfer to. Here the
+    # historically most frequent specialist starts in parallel with that decision; the
+    # coordinator is stopped at its transfer event and the speculative run is kept on a
+    # hit or cancelled on a miss. Booking has side effects, so only Info is speculated.
+    from contextlib import aclosing
+    from speculative_routing import SpeculativeRouter
+
+    async def start_run(runner: InMemoryRunner, request: str):
+        """Creates a fresh session and returns the runner's event stream for `request`."""
+        user_id = "user_123"
+        session_id = str(uuid.uuid4())
+        await runner.session_service.create_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        )
+        message = types.Content(role='user', parts=[types.Part(text=request)])
+        return runner.run_async(user_id=user_id, session_id=session_id, new_message=message)
+
+    async def run_agent(runner: InMemoryRunner, request: str) -> str:
+        """Runs an agent to its final response and returns the response text."""
+        async with aclosing(await start_run(runner, request)) as events:
+            async for event in events:
+                if event.is_final_response() and event.content and event.content.parts:
+                    return "".join(part.text for part in event.content.parts if part.text)
+        return ""
+
+    def build_speculative_router(runner: InMemoryRunner) -> SpeculativeRouter:
+        booking_runner = InMemoryRunner(booking_agent)
+        info_runner = InMemoryRunner(info_agent)
+
+        async def coordinator_decision(request: str) -> str:
+            """Runs the coordinator only until it transfers, returning the target agent name."""
+            async with aclosing(await start_run(runner, request)) as events:
+                async for event in events:
+                    if event.actions and event.actions.transfer_to_agent:
+                        return event.actions.transfer_to_agent
+                    if event.is_final_response():
+                        break
+            return "unclear"
+
+        async def run_booker(request: str) -> str:
+            return await run_agent(booking_runner, request)
+
+        async def run_info(request: str) -> str:
+            return await run_agent(info_runner, request)
+
+        return SpeculativeRouter(
+            router=coordinator_decision,
+            handlers={"Booker": run_booker, "Info": run_info, "unclear": unclear_handler},
+            default="unclear",
+            speculate_on={"Info"},
+        )
 
     async def main_async():
         """Main function to run the ADK example."""
@@ -126,15 +153,39 @@ def _():
         print("Note: This requires Google ADK installed and authenticated.")
 
         runner = InMemoryRunner(coordinator)
-        # Example Usage
-        result_a = await run_coordinator(runner, "Book me a hotel in Paris.")
-        print(f"Final Output A: {result_a}")
-        result_b = await run_coordinator(runner, "What is the highest mountain in the world?")
-        print(f"Final Output B: {result_b}")
-        result_c = await run_coordinator(runner, "Tell me a random fact.") # Should go to Info
-        print(f"Final Output C: {result_c}")
-        result_d = await run_coordinator(runner, "Find flights to Tokyo next month.") # Should go to Booker
-        print(f"Final Output D: {result_d}")
+        driver = ConcurrentRunnerDriver(runner, max_concurrency=4)
+        # Example Usage: (user_id, request) pairs
+        requests = [
+            ("user_a", "Book me a hotel in Paris."),
+            ("user_b", "What is the highest mountain in the world?"),
+            ("user_c", "Tell me a random fact."),  # Should go to Info
+            ("user_d", "Find flights to Tokyo next month."),  # Should go to Booker
+            ("user_a", "Also find me a flight to Paris for the same dates."),  # Same session as user_a's first turn
+        ]
+        records = await driver.run_many(requests)
+        for record in records:
+            outcome = record.error or record.response
+            print(f"[{record.user_id}] {record.request}\n  -> {outcome} ({record.latency:.2f}s)")
+
+        report = driver.report()
+        print(
+            f"\n{report['requests']} requests in {report['wall_seconds']:.2f}s "
+            f"({report['throughput_rps']:.2f} req/s, {report['sessions_created']} sessions, {report['errors']} errors)"
+        )
+        for name in ("latency", "queued", "service"):
+            dist = report[name]
+            print(f"{name:>8}: p50 {dist['p50']:.2f}s  p90 {dist['p90']:.2f}s  p99 {dist['p99']:.2f}s  max {dist['max']:.2f}s")
+
+        print("\n--- Speculative Routing ---")
+        speculative_router = build_speculative_router(runner)
+        for request in ("What is the highest mountain in the world?", "Tell me a random fact.", "Find flights to Tokyo next month."):
+            result = await speculative_router.arun(request)
+            print(f"Speculative Output for '{request}': {result}")
+        metrics = speculative_router.metrics()
+        print(
+            f"Speculation: hit rate {metrics['hit_rate']:.0%} over {metrics['speculations']} speculations, "
+            f"saved {metrics['saved_seconds']:.2f}s, wasted {metrics['wasted_seconds']:.2f}s"
+        )
 
     def main():
         asyncio.run(main_async())
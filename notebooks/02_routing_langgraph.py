@@ -59,6 +59,14 @@ def _():
 
     if llm:
         coordinator_router_chain = coordinator_router_prompt | llm | StrOutputParser()
+    else:
+        coordinator_router_chain = None
+
+    # --- Local Router (nearest centroid over embeddings) ---
+    # Routes clear-cut requests without a model call; only ambiguous ones reach the LLM router.
+    from embedding_router import CentroidRouter
+
+    local_router = CentroidRouter(fallback=coordinator_router_chain)
 
     # --- Define the Delegation Logic (equivalent to ADK's Auto-Flow based on sub_agents) ---
     # Use RunnableBranch to route based on the router chain's output.
@@ -82,10 +90,29 @@ def _():
     # The router chain's output ('decision') is passed along with the original input ('request')
     # to the delegation_branch.
     coordinator_agent = {
-        "decision": coordinator_router_chain,
+        "decision": local_router.as_runnable(),
         "request": RunnablePassthrough()
     } | delegation_branch | (lambda x: x['output']) # Extract the final output
 
+    # --- Speculative Delegation ---
+    # The handler the local classifier considers most likely starts while the router is
+    # still deciding and is cancelled if the decision differs. Booking has side effects,
+    # so it never runs speculatively.
+    from speculative_routing import SpeculativeRouter
+
+    speculative_router = SpeculativeRouter(
+        router=local_router.as_runnable(),
+        handlers={
+            "booker": lambda x: booking_handler(x['request']),
+            "info": lambda x: info_handler(x['request']),
+            "unclear": lambda x: unclear_handler(x['request']),
+        },
+        prior=lambda x: local_router.classify(x['request'])[0],
+        default="unclear",
+        speculate_on={"info", "unclear"},
+    )
+    speculative_coordinator_agent = speculative_router.as_runnable()
+
     # --- Example Usage ---
     def main():
         if not llm:
@@ -107,8 +134,45 @@ def _():
         result_c = coordinator_agent.invoke({"request": request_c})
         print(f"Final Result C: {result_c}")
 
+        print(f"\nRouting: {local_router.metrics()}")
+
+        print("\n--- Running with speculative delegation ---")
+        for request in (request_a, request_b, request_c):
+            result = speculative_coordinator_agent.invoke({"request": request})
+            print(f"Final Result: {result}")
+        metrics = speculative_router.metrics()
+        print(
+            f"\nSpeculation: hit rate {metrics['hit_rate']:.0%} over {metrics['speculations']} speculations, "
+            f"saved {metrics['saved_seconds']:.2f}s, wasted {metrics['wasted_seconds']:.2f}s"
+        )
+        speculative_router.close()
+
     if __name__ == "__main__":
         main()
+    return coordinator_router_chain, local_router, llm
+
+
+@app.cell
+def _(coordinator_router_chain, llm, local_router):
+    # --- Routing Benchmark: local router vs. LLM-only router ---
+    from embedding_router import benchmark_router
+
+    benchmark_requests = [
+        "Book me a flight to London.",
+        "I'd like a hotel in Madrid for two nights.",
+        "Can you get me tickets to Rome on Monday?",
+        "What is the capital of Italy?",
+        "How many people live in Tokyo?",
+        "Who painted the Mona Lisa?",
+        "Tell me about quantum physics.",
+        "umm",
+        "Help.",
+    ]
+    if llm:
+        report = benchmark_router(local_router, coordinator_router_chain, benchmark_requests)
+        print(f"Agreement with LLM router: {report['agreement']:.0%} (locally routed: {report['local_agreement']:.0%})")
+        print(f"Routed locally: {report['local_ratio']:.0%}")
+        print(f"Mean routing latency: {report['router_mean_latency'] * 1000:.1f} ms vs. LLM {report['llm_mean_latency'] * 1000:.1f} ms")
     return
 
 
@@ -6,42 +6,49 @@ app = marimo.App()
 
 @app.cell
 def _():
-    import requests
-    import json
-    import os
+    import asyncio
     from dotenv import load_dotenv
 
-    # Load API Key from .env
+    # Pooled keep-alive client with timeouts and fast JSON; set LLM_CASSETTE_DIR to
+    # record/replay this call, see llm_replay.py
+    from llm_http import shared_client
+    from llm_replay import api_key as replay_api_key
+
+    # Load API Key from .env (replaying a cassette needs none)
     load_dotenv()
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    api_key = replay_api_key("OPENROUTER_API_KEY")
 
-    if not api_key:
-        print("Error: OPENROUTER_API_KEY not found in environment.")
-    else:
-        response = requests.post(
-          url="https://openrouter.ai/api/v1/chat/completions",
-          headers={
-            "Authorization": f"Bearer {api_key}",
-            "HTTP-Referer": "https://github.com/robandrewford/agentic-design-patterns",
-            "X-Title": "Agentic Design Patterns Examples",
-          },
-          data=json.dumps({
+    async def ask_openrouter(question: str) -> None:
+        http = shared_client()
+        response = await http.post_json(
+          "https://openrouter.ai/api/v1/chat/completions",
+          {
             "model": "openai/gpt-4o",
             "messages": [
               {
                 "role": "user",
-                "content": "What is the meaning of life?"
+                "content": question
               }
             ]
-          })
+          },
+          headers={
+            "Authorization": f"Bearer {api_key}",
+            "HTTP-Referer": "https://github.com/robandrewford/agentic-design-patterns",
+            "X-Title": "Agentic Design Patterns Examples",
+          },
         )
-        
+
         if response.status_code == 200:
-            result = response.json()
+            result = http.json(response)
             print(f"Response from OpenRouter: {result['choices'][0]['message']['content']}")
         else:
             print(f"Error from OpenRouter: {response.status_code} - {response.text}")
 
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not found in environment.")
+    else:
+        asyncio.run(ask_openrouter("What is the meaning of life?"))
+
     return
 
 
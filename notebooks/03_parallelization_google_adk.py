@@ -14,11 +14,14 @@ def _():
     # Note: We are using LangChain here instead of Google ADK because
     # the environment is configured for OpenRouter (OPENROUTER_API_KEY)
     # and Google ADK requires a native Google API Key.
-    from utils import get_openrouter_model
+    from utils import get_openrouter_model, registry
+    from llm_prompt_cache import PromptCacheCallback, static_prefix_prompt
+    from llm_fanout import FanOut
+    from llm_concurrency import AdaptiveConcurrencyLimiter
 
     from langchain_core.prompts import ChatPromptTemplate
     from langchain_core.output_parsers import StrOutputParser
-    from langchain_core.runnables import Runnable, RunnableParallel, RunnablePassthrough
+    from langchain_core.runnables import Runnable, RunnablePassthrough
 
     # --- Configuration ---
     try:
@@ -67,34 +70,34 @@ def _():
     # --- Build the Parallel + Synthesis Chain ---
 
     # 1. Run researchers in parallel.
-    # Note: Since the prompts are static, we don't strictly need input, but RunnableParallel expects one.
+    # Note: Since the prompts are static, we don't strictly need input, but the branches expect one.
     # We pass a dummy input or just ignore it in the chains.
-    parallel_research = RunnableParallel(
+    # Each researcher has its own deadline: a slow or failing one is cancelled and reported
+    # to the merger as "[MISSING: ...]" instead of stalling or aborting the whole report.
+    # An adaptive limiter caps the researcher calls in flight across concurrent reports,
+    # backing off on 429/5xx (likely on this ":free" model) instead of firing them all at once.
+    limiter = AdaptiveConcurrencyLimiter()
+    research_fan_out = FanOut(
         {
-            "renewable_energy_result": renewable_chain,
-            "ev_technology_result": ev_chain,
-            "carbon_capture_result": carbon_chain,
-        }
+            "renewable_energy_result": limiter.wrap(renewable_chain),
+            "ev_technology_result": limiter.wrap(ev_chain),
+            "carbon_capture_result": limiter.wrap(carbon_chain),
+        },
+        timeout=20.0,
     )
+    parallel_research = research_fan_out.as_runnable()
 
     # 2. Define the Merger Agent (Synthesis)
-    merger_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an AI Assistant responsible for combining research findings into a structured report.
+    # The long instructions are static, so they come first and are marked cacheable;
+    # only the per-run research summaries follow in the user message. Providers can
+    # then serve the instruction prefix from their prompt cache on every call.
+    MERGER_INSTRUCTIONS = """You are an AI Assistant responsible for combining research findings into a structured report.
     
-    Your primary task is to synthesize the following research summaries, clearly attributing findings to their source areas. Structure your response using headings for each topic. Ensure the report is coherent and integrates the key points smoothly.
+    Your primary task is to synthesize the research summaries provided by the user, clearly attributing findings to their source areas. Structure your response using headings for each topic. Ensure the report is coherent and integrates the key points smoothly.
     
-    **Crucially: Your entire response MUST be grounded *exclusively* on the information provided in the 'Input Summaries' below. Do NOT add any external knowledge, facts, or details not present in these specific summaries.**
+    **Crucially: Your entire response MUST be grounded *exclusively* on the information provided in the 'Input Summaries'. Do NOT add any external knowledge, facts, or details not present in these specific summaries.**
     
-    **Input Summaries:**
-    
-    *   **Renewable Energy:**
-        {renewable_energy_result}
-    
-    *   **Electric Vehicles:**
-        {ev_technology_result}
-    
-    *   **Carbon Capture:**
-        {carbon_capture_result}
+    If a summary is marked "[MISSING: ...]", write under that heading that the findings are currently unavailable and leave the topic out of the conclusion. Never fill the gap yourself.
     
     **Output Format:**
     
@@ -102,24 +105,39 @@ def _():
     
     ### Renewable Energy Findings
     (Based on RenewableEnergyResearcher's findings)
-    [Synthesize and elaborate *only* on the renewable energy input summary provided above.]
+    [Synthesize and elaborate *only* on the renewable energy input summary provided.]
     
     ### Electric Vehicle Findings
     (Based on EVResearcher's findings)
-    [Synthesize and elaborate *only* on the EV input summary provided above.]
+    [Synthesize and elaborate *only* on the EV input summary provided.]
     
     ### Carbon Capture Findings
     (Based on CarbonCaptureResearcher's findings)
-    [Synthesize and elaborate *only* on the carbon capture input summary provided above.]
+    [Synthesize and elaborate *only* on the carbon capture input summary provided.]
     
     ### Overall Conclusion
-    [Provide a brief (1-2 sentence) concluding statement that connects *only* the findings presented above.]
-    """),
-        ("user", "Synthesize the report.")
-    ])
+    [Provide a brief (1-2 sentence) concluding statement that connects *only* the findings presented.]
+    """
+
+    merger_prompt = static_prefix_prompt(
+        MERGER_INSTRUCTIONS,
+        ("user", """**Input Summaries:**
+    
+    *   **Renewable Energy:**
+        {renewable_energy_result}
+    
+    *   **Electric Vehicles:**
+        {ev_technology_result}
+    
+    *   **Carbon Capture:**
+        {carbon_capture_result}
+    
+    Synthesize the report."""),
+    )
 
     # 3. Full Pipeline
-    pipeline = parallel_research | merger_prompt | llm | StrOutputParser()
+    synthesis = merger_prompt | llm | StrOutputParser()
+    pipeline = parallel_research | synthesis
 
 
     # --- Execution Logic ---
@@ -134,9 +152,31 @@ def _():
         
         try:
             # Invoking with a dict input as ChatPromptTemplate expects a mapping
-            response = await pipeline.ainvoke({"input": "Start research"})
+            # The two steps of `pipeline`, run separately to keep this call's per-researcher results.
+            cache_report = PromptCacheCallback()
+            config = {"callbacks": [cache_report]}
+            research = await research_fan_out.arun({"input": "Start research"}, config)
+            response = await synthesis.ainvoke(research.outputs, config=config)
             print("\n--- Final Report ---")
             print(response)
+            print(f"\nPrompt cache: {cache_report.summary()}")
+            print("\nResearcher latency (slowest first):")
+            for name, branch in sorted(research.branches.items(), key=lambda item: -item[1].latency):
+                detail = f" ({branch.error})" if branch.error else ""
+                print(f"  {name}: {branch.status}, {branch.latency:.2f}s{detail}")
+
+            # The research prompts are fully static, so concurrent users send identical
+            # requests. The registry's single-flight layer collapses those that are in
+            # flight at the same time into one upstream call and hands every caller the result.
+            print("\n--- Concurrent Traffic (5 simultaneous reports) ---")
+            await asyncio.gather(*(pipeline.ainvoke({"input": "Start research"}) for _ in range(5)))
+            single_flight = registry.active_single_flight()
+            if single_flight is not None:
+                for model, counts in single_flight.metrics().items():
+                    print(
+                        f"  {model}: {counts['requests']} requests, {counts['upstream_calls']} upstream calls, "
+                        f"{counts['coalesced']} coalesced ({counts['coalesce_ratio']:.0%})"
+                    )
         except Exception as e:
             print(f"\nAn error occurred during execution: {e}")
 
@@ -16,7 +16,9 @@ def _():
     from langchain_core.runnables import Runnable, RunnableParallel, RunnablePassthrough
     
     # Import the OpenRouter utility
-    from utils import get_openrouter_model
+    from utils import get_openrouter_model, stream_to_stdout
+    from llm_fanout import IncrementalSynthesizer
+    from llm_concurrency import AdaptiveConcurrencyLimiter
 
     # --- Configuration ---
     # Use the utility to get the OpenRouter-configured model
@@ -66,11 +68,14 @@ def _():
 
     # 1. Define the block of tasks to run in parallel. The results of these,
     #    along with the original topic, will be fed into the next step.
+    #    Every branch goes through one adaptive limiter, which grows the number of
+    #    calls in flight while latency stays healthy and cuts it on 429/5xx or spikes.
+    limiter = AdaptiveConcurrencyLimiter()
     map_chain = RunnableParallel(
         {
-            "summary": summarize_chain,
-            "questions": questions_chain,
-            "key_terms": terms_chain,
+            "summary": limiter.wrap(summarize_chain),
+            "questions": limiter.wrap(questions_chain),
+            "key_terms": limiter.wrap(terms_chain),
             "topic": RunnablePassthrough(),  # Pass the original topic through
         }
     )
@@ -90,6 +95,28 @@ def _():
     full_parallel_chain = map_chain | synthesis_prompt | llm | StrOutputParser()
 
 
+    # --- Incremental Synthesis ---
+    # Instead of waiting for all three results, each one is streamed as its own section the
+    # moment it arrives, while the other chains are still running. Only a short conclusion,
+    # written from the raw results once the last one arrives, is left for the end, so the
+    # first text appears after the fastest chain and the answer is complete at
+    # max(branch) + one short call instead of max(branch) + the full synthesis.
+    conclusion_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Write a 2-3 sentence conclusion tying the following findings together. Start with a "
+                   "'## Conclusion' heading. The findings are covered in earlier sections; do not repeat them."),
+        ("user", "Topic: {input}\n\nSummary: {summary}\n\nQuestions: {questions}\n\nKey Terms: {key_terms}")
+    ])
+    incremental_chain = IncrementalSynthesizer(
+        {
+            "summary": limiter.wrap(summarize_chain),
+            "questions": limiter.wrap(questions_chain),
+            "key_terms": limiter.wrap(terms_chain),
+        },
+        section_template="## {name}\n\n{output}",
+        conclusion=conclusion_prompt | llm | StrOutputParser(),
+    ).as_runnable()
+
+
     # --- Run the Chain ---
     async def run_parallel_example(topic: str) -> None:
         """
@@ -105,11 +132,16 @@ def _():
 
         print(f"\n--- Running Parallel LangChain Example for Topic: '{topic}' ---")
         try:
-            # The input to `ainvoke` is the single 'topic' string, which is
-            # then passed to each runnable in the `map_chain`.
-            response = await full_parallel_chain.ainvoke(topic)
+            # The input is the single 'topic' string, which is then passed to
+            # each runnable in the `map_chain`. The synthesis is streamed as it is generated.
             print("\n--- Final Response ---")
-            print(response)
+            response, stats = await stream_to_stdout(full_parallel_chain, topic)
+            print(f"\n({stats.summary()})")
+
+            print("\n--- Final Response (incremental synthesis) ---")
+            response, stats = await stream_to_stdout(incremental_chain, topic)
+            print(f"\n({stats.summary()})")
+            print(f"Concurrency limiter: {limiter.metrics()}")
         except Exception as e:
             print(f"\nAn error occurred during chain execution: {e}")
 
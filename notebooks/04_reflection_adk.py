@@ -11,11 +11,12 @@ def _():
     from typing import Optional
 
     from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
+    from langchain_core.output_parsers import StrOutputParser
     from langchain_core.runnables import Runnable, RunnablePassthrough
     
     # Use utils for OpenRouter
     from utils import get_openrouter_model
+    from json_stream import InvalidField, StreamingJsonOutputParser
 
     # --- Configuration ---
     try:
@@ -39,6 +40,13 @@ def _():
 
     # --- 2. Fact Checker (Reviewer) ---
     # Reviews a given text for factual accuracy and provides a structured critique.
+    # The JSON is parsed while it streams: "status" is validated (and reported) as soon
+    # as it closes, so a malformed verdict aborts the call instead of waiting for the reasoning.
+    review_parser = StreamingJsonOutputParser(
+        validators={"status": lambda status: status in ("ACCURATE", "INACCURATE")},
+        paths=["status"],
+        on_value=lambda event: print(f"\n[streaming] {event.dotted} = {event.value}"),
+    )
     reviewer_chain = (
         ChatPromptTemplate.from_messages([
             ("system", """You are a meticulous fact-checker.
@@ -51,7 +59,7 @@ def _():
             ("user", "Draft Text: {draft_text}")
         ])
         | llm
-        | JsonOutputParser() 
+        | review_parser
     )
 
     # --- 3. Pipeline Construction ---
@@ -65,7 +73,14 @@ def _():
     async def run_reflection_pipeline(subject: str):
         print(f"\n--- Running Reflection Pipeline (ADK Port) for Subject: '{subject}' ---")
         try:
-            result = await pipeline.ainvoke({"subject": subject})
+            # Streaming lets the reviewer's parser act on fields before the response is complete.
+            result = {}
+            async for chunk in pipeline.astream({"subject": subject}):
+                for key, value in chunk.items():
+                    if isinstance(value, str) and key in result:
+                        result[key] += value  # Draft text arrives as deltas
+                    else:
+                        result[key] = value  # Review output arrives as growing partial objects
             
             print("\n--- Initial Draft ---")
             print(result.get("draft_text"))
@@ -73,6 +88,8 @@ def _():
             print("\n--- Review Output ---")
             print(result.get("review_output"))
             
+        except InvalidField as e:
+            print(f"\nReview aborted early, invalid field: {e.path} = {e.value!r}")
         except Exception as e:
             print(f"\nAn error occurred during pipeline execution: {e}")
 
@@ -7,11 +7,9 @@ app = marimo.App()
 @app.cell
 def _():
     import os
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.messages import SystemMessage, HumanMessage
-    
     # Use utils for OpenRouter
     from utils import get_openrouter_model
+    from reflection_engine import ReflectionEngine
 
     # --- Configuration ---
     # Initialize the Chat LLM via OpenRouter
@@ -43,64 +41,22 @@ def _():
         """
 
         # --- The Reflection Loop ---
-        max_iterations = 3
-        current_code = ""
-        # We will build a conversation history to provide context in each step.
-        message_history = [HumanMessage(content=task_prompt)]
-
-        for i in range(max_iterations):
-            print("\n" + "="*25 + f" REFLECTION LOOP: ITERATION {i + 1} " + "="*25)
-
-            # --- 1. GENERATE / REFINE STAGE ---
-            # In the first iteration, it generates. In subsequent iterations, it refines.
-            if i == 0:
-                print("\n>>> STAGE 1: GENERATING initial code...")
-                # The first message is just the task prompt.
-                response = llm.invoke(message_history)
-                current_code = response.content
-            else:
-                print("\n>>> STAGE 1: REFINING code based on previous critique...")
-                # The message history now contains the task, the last code, and the last critique.
-                # We instruct the model to apply the critiques.
-                message_history.append(HumanMessage(content="Please refine the code using the critiques provided."))
-                response = llm.invoke(message_history)
-                current_code = response.content
-
-            print("\n--- Generated Code (v" + str(i + 1) + ") ---\n" + current_code)
-            message_history.append(response) # Add the generated code to history
-
-            # --- 2. REFLECT STAGE ---
-            print("\n>>> STAGE 2: REFLECTING on the generated code...")
-
-            # Create a specific prompt for the reflector agent.
-            # This asks the model to act as a senior code reviewer.
-            reflector_prompt = [
-                SystemMessage(content="""
-                    You are a senior software engineer and an expert in Python.
-                    Your role is to perform a meticulous code review.
-                    Critically evaluate the provided Python code based on the original task requirements.
-                    Look for bugs, style issues, missing edge cases, and areas for improvement.
-                    If the code is perfect and meets all requirements, respond with the single phrase 'CODE_IS_PERFECT'.
-                    Otherwise, provide a bulleted list of your critiques.
-                """),
-                HumanMessage(content=f"Original Task:\n{task_prompt}\n\nCode to Review:\n{current_code}")
-            ]
-
-            critique_response = llm.invoke(reflector_prompt)
-            critique = critique_response.content
-
-            # --- 3. STOPPING CONDITION ---
-            if "CODE_IS_PERFECT" in critique:
-                print("\n--- Critique ---\nNo further critiques found. The code is satisfactory.")
-                break
-
-            print("\n--- Critique ---\n" + critique)
-            # Add the critique to the history for the next refinement loop.
-            message_history.append(HumanMessage(content=f"Critique of the previous code:\n{critique}"))
+        # Each refinement sees only the task, the latest code, the latest critique and a
+        # short summary of earlier critiques, so prompts stay the same size every round.
+        # The loop also stops as soon as a revision no longer changes the code.
+        engine = ReflectionEngine(llm, max_iterations=3)
+        result = engine.run(task_prompt, verbose=True)
 
         print("\n" + "="*30 + " FINAL RESULT " + "="*30)
+        print(f"\nStopped: {result.stop_reason} after {len(result.iterations)} iteration(s)")
+        for report in result.iterations:
+            print(
+                f"  v{report.iteration}: {report.input_tokens} in / {report.output_tokens} out tokens, "
+                f"{report.changed_lines} lines changed"
+            )
+        print(f"  total: {result.total_tokens} tokens")
         print("\nFinal refined code after the reflection process:\n")
-        print(current_code)
+        print(result.code)
 
 
     if __name__ == "__main__":
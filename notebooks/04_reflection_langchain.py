@@ -14,7 +14,7 @@ def _():
     from langchain_core.runnables import RunnablePassthrough
     
     # Use utils for OpenRouter
-    from utils import get_openrouter_model
+    from utils import get_openrouter_model, stream_to_stdout
 
     # --- Configuration ---
     try:
@@ -85,11 +85,12 @@ def _():
         print(f"\n--- Running Reflection Example for Product: '{product_details}' ---")
         try:
             # The chain now expects a dictionary as input from the start.
-            final_refined_description = await full_reflection_chain.ainvoke(
-                {"product_details": product_details}
-            )
+            # Streaming prints the refined description as soon as the last step starts generating.
             print("\n--- Final Refined Product Description ---")
-            print(final_refined_description)
+            final_refined_description, stats = await stream_to_stdout(
+                full_reflection_chain, {"product_details": product_details}
+            )
+            print(f"\n({stats.summary()})")
         except Exception as e:
             print(f"\nAn error occurred during chain execution: {e}")
 
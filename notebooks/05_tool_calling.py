@@ -8,14 +8,18 @@ app = marimo.App()
 def _():
     import asyncio
     import nest_asyncio
-    from langgraph.prebuilt import create_react_agent
     from langchain_core.tools import tool as langchain_tool
     from langchain_core.messages import HumanMessage
-    from crewai import Agent as CrewAgent, Task, Crew
-    from crewai.tools import tool as crew_tool
+
+    # LangGraph and CrewAI take seconds to import; load each only when its example runs.
+    from lazy_imports import lazy_import
+    langgraph_prebuilt = lazy_import("langgraph.prebuilt")
+    crewai = lazy_import("crewai")
+    crewai_tools = lazy_import("crewai.tools")
     
     # Use utils
     from utils import get_openrouter_model
+    import llm_replay
 
     # --- Common Setup ---
     try:
@@ -47,7 +51,7 @@ def _():
         tools = [search_information]
         
         # Create ReAct Agent with LangGraph
-        graph = create_react_agent(llm, tools=tools, prompt="You are a helpful assistant.")
+        graph = langgraph_prebuilt.create_react_agent(llm, tools=tools, prompt="You are a helpful assistant.")
         
         try:
             inputs = {"messages": [HumanMessage(content="What is the capital of France?")]}
@@ -58,23 +62,27 @@ def _():
 
 
     # --- 2. CrewAI Agent Example ---
-    @crew_tool("Simulated Search Tool")
-    def crew_search_tool(query: str) -> str:
-        """Useful for searching information."""
-        # Re-using the logic for simulation
-        print(f"\n[CrewAI Tool] Searching for: '{query}'")
-        simulated_results = {
-             "aapl": "AAPL is trading at $178.15",
-             "apple": "AAPL is trading at $178.15",
-        }
-        return simulated_results.get(query.lower(), "Data not found.")
-
     def run_crewai_example():
         if not llm: return
+
+        # Defined here so the CrewAI decorator (and import) only runs for this example.
+        @crewai_tools.tool("Simulated Search Tool")
+        def crew_search_tool(query: str) -> str:
+            """Useful for searching information."""
+            # Re-using the logic for simulation
+            print(f"\n[CrewAI Tool] Searching for: '{query}'")
+            simulated_results = {
+                 "aapl": "AAPL is trading at $178.15",
+                 "apple": "AAPL is trading at $178.15",
+            }
+            return simulated_results.get(query.lower(), "Data not found.")
+
         print("\n=== Running CrewAI Tool Calling Example ===")
         # Use openrouter/ prefix for CrewAI to avoid native Google client
         crew_llm = f"openrouter/{llm.model_name}"
-        agent = CrewAgent(
+        # Route litellm through the record/replay cassette when LLM_CASSETTE_DIR is set
+        llm_replay.install_litellm()
+        agent = crewai.Agent(
             role='Researcher',
             goal='Find financial data.',
             backstory='You look up stock prices.',
@@ -82,12 +90,12 @@ def _():
             tools=[crew_search_tool],
             llm=crew_llm
         )
-        task = Task(
+        task = crewai.Task(
             description="Find the price of Apple stock.",
             expected_output="The price of AAPL.",
             agent=agent
         )
-        crew = Crew(agents=[agent], tasks=[task], verbose=True)
+        crew = crewai.Crew(agents=[agent], tasks=[task], verbose=True)
         result = crew.kickoff()
         print(f"Final CrewAI Response: {result}")
 
@@ -13,6 +13,7 @@ def _():
     
     # Use utils for OpenRouter
     from utils import get_openrouter_model
+    import llm_replay
 
     # --- Configuration ---
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -56,6 +57,8 @@ def _():
 
         # Use openrouter/ prefix for CrewAI to ensure Litellm routing
         crew_llm = f"openrouter/{llm.model_name}"
+        # Route litellm through the record/replay cassette when LLM_CASSETTE_DIR is set
+        llm_replay.install_litellm()
         
         # 1. Financial Analyst Agent
         financial_analyst_agent = Agent(
@@ -14,6 +14,7 @@ def _():
     
     # Use utils
     from utils import get_openrouter_model
+    from llm_concurrency import AdaptiveConcurrencyLimiter
 
     # --- Tool Definition ---
     @tool
@@ -60,11 +61,15 @@ def _():
         # New LangGraph Agent
         graph = create_react_agent(llm, tools=tools, prompt="You are a helpful assistant.")
 
+        # The queries run concurrently, but no more at once than the adaptive limiter allows.
+        limiter = AdaptiveConcurrencyLimiter()
+
         async def run_query(q):
             print(f"\nQuery: {q}")
             try:
                 inputs = {"messages": [HumanMessage(content=q)]}
-                result = await graph.ainvoke(inputs)
+                async with limiter.aslot():
+                    result = await graph.ainvoke(inputs)
                 print(f"Result: {result['messages'][-1].content}")
             except Exception as e:
                 print(f"Error: {e}")
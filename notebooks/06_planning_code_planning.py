@@ -12,6 +12,7 @@ def _():
     
     # Use utils for OpenRouter
     from utils import get_openrouter_model
+    import llm_replay
 
     # --- Configuration ---
     try:
@@ -28,6 +29,8 @@ def _():
 
         # Use openrouter/ prefix for CrewAI to ensure Litellm routing
         crew_llm = f"openrouter/{llm.model_name}"
+        # Route litellm through the record/replay cassette when LLM_CASSETTE_DIR is set
+        llm_replay.install_litellm()
 
         # 2. Define a clear and focused agent
         planner_writer_agent = Agent(
@@ -6,19 +6,22 @@ app = marimo.App()
 
 @app.cell
 def _():
-    import os
     from openai import OpenAI
     from dotenv import load_dotenv
 
-    # Load environment variables
+    # Set LLM_CASSETTE_DIR to record/replay this call, see llm_replay.py
+    import llm_replay
+
+    # Load environment variables (replaying a cassette needs no API key)
     load_dotenv()
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    api_key = llm_replay.api_key("OPENROUTER_API_KEY")
 
     if api_key:
         # Initialize the client with OpenRouter configuration
         client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=api_key,
+            http_client=llm_replay.http_client(),
         )
 
         # Restore the original research-focused query
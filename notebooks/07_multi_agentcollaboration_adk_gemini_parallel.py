@@ -8,6 +8,11 @@ app = marimo.App()
 def _():
     from google.adk.agents import Agent, ParallelAgent
 
+    from llm_concurrency import AdaptiveConcurrencyLimiter
+
+    # One adaptive limiter gates the model calls of every parallel sub-agent.
+    limiter = AdaptiveConcurrencyLimiter()
+
     # It's better to define the fetching logic as tools for the agents
     # For simplicity in this example, we'll embed the logic in the agent's instruction.
     # In a real-world scenario, you would use tools.
@@ -17,14 +22,16 @@ def _():
         name="weather_fetcher",
         model="google/gemini-3-flash-preview",
         instruction="Fetch the weather for the given location and return only the weather report.",
-        output_key="weather_data"  # The result will be stored in session.state["weather_data"]
+        output_key="weather_data",  # The result will be stored in session.state["weather_data"]
+        **limiter.adk_callbacks(),
     )
 
     news_fetcher = Agent(
         name="news_fetcher",
         model="gemini-2.0-flash-exp",
         instruction="Fetch the top news story for the given topic and return only that story.",
-        output_key="news_data"      # The result will be stored in session.state["news_data"]
+        output_key="news_data",     # The result will be stored in session.state["news_data"]
+        **limiter.adk_callbacks(),
     )
 
     # Create the ParallelAgent to orchestrate the sub-agents
@@ -8,14 +8,21 @@ app = marimo.App()
 def _():
     from google.adk.agents import SequentialAgent, Agent
 
+    from llm_tokens import TokenMonitor
+
+    # Records the token usage of every model call, per agent; read it with
+    # token_monitor.report(by=("agent",)) after the pipeline has run.
+    token_monitor = TokenMonitor()
+
     # This agent's output will be saved to session.state["data"]
-    step1 = Agent(name="Step1_Fetch", output_key="data")
+    step1 = Agent(name="Step1_Fetch", output_key="data", **token_monitor.adk_callbacks(pipeline="MyPipeline"))
 
     # This agent will use the data from the previous step.
     # We instruct it on how to find and use this data.
     step2 = Agent(
         name="Step2_Process",
-        instruction="Analyze the information found in state['data'] and provide a summary."
+        instruction="Analyze the information found in state['data'] and provide a summary.",
+        **token_monitor.adk_callbacks(pipeline="MyPipeline"),
     )
 
     pipeline = SequentialAgent(
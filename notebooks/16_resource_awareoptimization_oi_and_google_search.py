@@ -6,17 +6,24 @@ app = marimo.App()
 
 @app.cell
 def _():
+    import asyncio
     import os
-    import requests
     import json
+    import httpx
     from dotenv import load_dotenv
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 
+    # One pooled keep-alive client for OpenAI and Google Search. Set LLM_CASSETTE_DIR
+    # to record/replay all HTTP calls, see llm_replay.py
+    from llm_http import AsyncJSONClient
+    from llm_costs import BudgetExceeded, CostLedger
+    from llm_replay import api_key
 
-    # Load environment variables
+
+    # Load environment variables (replaying a cassette needs no API keys)
     load_dotenv()
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    GOOGLE_CUSTOM_SEARCH_API_KEY = os.getenv("GOOGLE_CUSTOM_SEARCH_API_KEY")
+    OPENAI_API_KEY = api_key("OPENAI_API_KEY")
+    GOOGLE_CUSTOM_SEARCH_API_KEY = api_key("GOOGLE_CUSTOM_SEARCH_API_KEY")
     GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
 
     if not OPENAI_API_KEY or not GOOGLE_CUSTOM_SEARCH_API_KEY or not GOOGLE_CSE_ID:
@@ -24,11 +31,15 @@ def _():
             "Please set OPENAI_API_KEY, GOOGLE_CUSTOM_SEARCH_API_KEY, and GOOGLE_CSE_ID in your .env file."
         )
 
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    http = AsyncJSONClient()
+    client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http.client)
+
+    # Prices every call and downgrades (or refuses) when a budget would be exceeded.
+    ledger = CostLedger(per_request_budget=0.05, per_minute_budget=1.00)
 
 
     # --- Step 1: Classify the Prompt ---
-    def classify_prompt(prompt: str) -> dict:
+    async def classify_prompt(prompt: str, request_id: str) -> dict:
         system_message = {
             "role": "system",
             "content": (
@@ -47,8 +58,23 @@ def _():
 
         user_message = {"role": "user", "content": prompt}
 
-        response = client.chat.completions.create(
-            model="gpt-4o", messages=[system_message, user_message], temperature=1
+        decision = ledger.authorize(
+            "gpt-4o", system_message["content"] + prompt, request_id, pipeline="classify", max_output_tokens=50
+        )
+        try:
+            response = await client.chat.completions.create(
+                model=decision.model, messages=[system_message, user_message], temperature=1
+            )
+        except BaseException:
+            ledger.release(decision)  # Give the reserved estimate back to the budget.
+            raise
+        ledger.record(
+            request_id,
+            decision.model,
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+            pipeline="classify",
+            decision=decision,
         )
 
         reply = response.choices[0].message.content
@@ -56,7 +82,7 @@ def _():
 
 
     # --- Step 2: Google Search ---
-    def google_search(query: str, num_results=1) -> list:
+    async def google_search(query: str, num_results=1) -> list:
         url = "https://www.googleapis.com/customsearch/v1"
         params = {
             "key": GOOGLE_CUSTOM_SEARCH_API_KEY,
@@ -66,9 +92,9 @@ def _():
         }
 
         try:
-            response = requests.get(url, params=params)
+            response = await http.get(url, params=params)
             response.raise_for_status()
-            results = response.json()
+            results = http.json(response)
 
             if "items" in results and results["items"]:
                 return [
@@ -81,12 +107,12 @@ def _():
                 ]
             else:
                 return []
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"error": str(e)}
 
 
     # --- Step 3: Generate Response ---
-    def generate_response(prompt: str, classification: str, search_results=None) -> str:
+    async def generate_response(prompt: str, classification: str, request_id: str, search_results=None) -> str:
         if classification == "simple":
             model = "gpt-4o-mini"
             full_prompt = prompt
@@ -111,37 +137,66 @@ def _():
 
     Query: {prompt}"""
 
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": full_prompt}],
-            temperature=1,
+        decision = ledger.authorize(model, full_prompt, request_id, pipeline=classification)
+        model = decision.model
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": full_prompt}],
+                temperature=1,
+            )
+        except BaseException:
+            ledger.release(decision)
+            raise
+        ledger.record(
+            request_id,
+            model,
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+            pipeline=classification,
+            decision=decision,
         )
 
         return response.choices[0].message.content, model
 
 
     # --- Step 4: Combined Router ---
-    def handle_prompt(prompt: str) -> dict:
-        classification_result = classify_prompt(prompt)
+    async def handle_prompt(prompt: str, request_id: str = "request-1") -> dict:
+        classification_result = await classify_prompt(prompt, request_id)
         # Remove or comment out the next line to avoid duplicate printing
         # print("\n🔍 Classification Result:", classification_result)
         classification = classification_result["classification"]
 
         search_results = None
         if classification == "internet_search":
-            search_results = google_search(prompt)
+            search_results = await google_search(prompt)
             # print("\n🔍 Search Results:", search_results)
 
-        answer, model = generate_response(prompt, classification, search_results)
-        return {"classification": classification, "response": answer, "model": model}
+        try:
+            answer, model = await generate_response(prompt, classification, request_id, search_results)
+        except BudgetExceeded as e:
+            answer, model = f"Request refused: {e}", None
+        return {
+            "classification": classification,
+            "response": answer,
+            "model": model,
+            "cost_usd": ledger.spend()[request_id],
+        }
+
+    async def run(prompt: str) -> dict:
+        async with http:
+            return await handle_prompt(prompt)
     test_prompt = "What is the capital of Australia?"
     # test_prompt = "Explain the impact of quantum computing on cryptography."
     # test_prompt = "When does the Australian Open 2026 start, give me full date?"
 
-    result = handle_prompt(test_prompt)
+    result = asyncio.run(run(test_prompt))
     print("🔍 Classification:", result["classification"])
     print("🧠 Model Used:", result["model"])
     print("🧠 Response:\n", result["response"])
+    print(f"💰 Cost: ${result['cost_usd']:.6f}")
+    for decision in ledger.audit_log:
+        print(f"   audit: {decision.pipeline}: {decision.requested_model} -> {decision.model} ({decision.reason})")
     #🔍 Classification: simple
     #🧠 Model Used: gpt-4o-mini
     #🧠 Response:
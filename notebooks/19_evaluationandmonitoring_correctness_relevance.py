@@ -37,22 +37,21 @@ def _():
     result, latency = timed_agent_action(simulated_tool_call, "get weather")
     print(f"Tool call result: {result}")
 
-    # This is conceptual as actual token counting depends on the LLM API
+    # Token counts come from a real BPE tokenizer (see llm_tokens.py). For live
+    # calls, attach `TokenMonitor().callback()` to a chain to use provider usage instead.
+    from llm_tokens import TokenMonitor
+
     class LLMInteractionMonitor:
-        def __init__(self):
-            self.total_input_tokens = 0
-            self.total_output_tokens = 0
+        def __init__(self, model: str = "openai/gpt-4o"):
+            self.model = model
+            self.monitor = TokenMonitor()
 
         def record_interaction(self, prompt: str, response: str):
-            # In a real scenario, use LLM API's token counter or a tokenizer
-            input_tokens = len(prompt.split()) # Placeholder
-            output_tokens = len(response.split()) # Placeholder
-            self.total_input_tokens += input_tokens
-            self.total_output_tokens += output_tokens
+            input_tokens, output_tokens = self.monitor.record_interaction(prompt, response, model=self.model)
             print(f"Recorded interaction: Input tokens={input_tokens}, Output tokens={output_tokens}")
 
         def get_total_tokens(self):
-            return self.total_input_tokens, self.total_output_tokens
+            return self.monitor.get_total_tokens()
 
     # Example usage
     monitor = LLMInteractionMonitor()
@@ -77,12 +77,14 @@ def _():
                                   'gemini-1.5-pro-latest' offers the highest quality.
                 temperature (float): The generation temperature. Lower is better for deterministic evaluation.
             """
-            self.model = genai.GenerativeModel(model_name)
+            # The rubric is identical for every call, so it is sent as the system
+            # instruction: a static prefix that Gemini's implicit prompt cache can reuse.
+            self.model = genai.GenerativeModel(model_name, system_instruction=LEGAL_SURVEY_RUBRIC)
             self.temperature = temperature
 
         def _generate_prompt(self, survey_question: str) -> str:
-            """Constructs the full prompt for the LLM judge."""
-            return f"{LEGAL_SURVEY_RUBRIC}\n\n---\n**LEGAL SURVEY QUESTION TO EVALUATE:**\n{survey_question}\n---"
+            """Constructs the per-question part of the prompt; the rubric is the system instruction."""
+            return f"---\n**LEGAL SURVEY QUESTION TO EVALUATE:**\n{survey_question}\n---"
 
         def judge_survey_question(self, survey_question: str) -> Optional[dict]:
             """
@@ -112,6 +114,10 @@ def _():
                     logging.error(f"LLM response was empty or blocked. Safety Ratings: {safety_ratings}")
                     return None
 
+                usage = response.usage_metadata
+                cached = getattr(usage, "cached_content_token_count", 0) or 0
+                logging.info(f"Prompt tokens: {usage.prompt_token_count}, served from cache: {cached}")
+
                 return json.loads(response.text)
 
             except json.JSONDecodeError:
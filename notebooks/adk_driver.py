@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import statistics
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+from google.adk.runners import Runner
+from google.genai import types
+
+
+@dataclass
+class RunRecord:
+    user_id: str
+    request: str
+    response: str
+    queued: float  # Seconds waiting for a concurrency slot or the user's session
+    service: float  # Seconds spent in the runner
+    error: Optional[str] = None
+
+    @property
+    def latency(self) -> float:
+        return self.queued + self.service
+
+
+def _distribution(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    if len(ordered) > 1:
+        percentiles = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p90, p99 = percentiles[49], percentiles[89], percentiles[98]
+    else:
+        p50 = p90 = p99 = ordered[0]
+    return {"mean": statistics.fmean(ordered), "p50": p50, "p90": p90, "p99": p99, "max": ordered[-1]}
+
+
+class ConcurrentRunnerDriver:
+    """
+    Runs many requests through one ADK runner concurrently.
+
+    A semaphore bounds the number of in-flight runs. With `reuse_sessions`,
+    each user keeps one session across requests (so the agent sees the
+    conversation so far), and that user's requests are serialized because a
+    session's history must not be appended to by two runs at once. Sessions are
+    rotated after `max_turns_per_session` turns to keep the context from growing
+    without bound. Without reuse every request gets a fresh session.
+
+    Args:
+        runner: The shared runner, e.g. `InMemoryRunner(coordinator)`.
+        max_concurrency: Maximum concurrent runs.
+        reuse_sessions: Keep one session per user instead of one per request.
+        max_turns_per_session: Start a new session for a user after this many turns.
+    """
+
+    def __init__(
+        self,
+        runner: Runner,
+        max_concurrency: int = 8,
+        reuse_sessions: bool = True,
+        max_turns_per_session: int = 20,
+    ):
+        self.runner = runner
+        self.reuse_sessions = reuse_sessions
+        self.max_turns_per_session = max_turns_per_session
+        self.records: list[RunRecord] = []
+        self.sessions_created = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._sessions: dict[str, tuple[str, int]] = {}  # user_id -> (session_id, turns)
+        self._user_locks: dict[str, asyncio.Lock] = {}
+        self._wall_start: Optional[float] = None
+        self._wall_end: Optional[float] = None
+
+    async def _new_session(self, user_id: str) -> str:
+        session_id = str(uuid.uuid4())
+        await self.runner.session_service.create_session(
+            app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+        )
+        self.sessions_created += 1
+        return session_id
+
+    async def _session_for(self, user_id: str) -> str:
+        if not self.reuse_sessions:
+            return await self._new_session(user_id)
+        session_id, turns = self._sessions.get(user_id, (None, 0))
+        if session_id is None or turns >= self.max_turns_per_session:
+            session_id, turns = await self._new_session(user_id), 0
+        self._sessions[user_id] = (session_id, turns + 1)
+        return session_id
+
+    async def _execute(self, user_id: str, request: str) -> str:
+        session_id = await self._session_for(user_id)
+        message = types.Content(role="user", parts=[types.Part(text=request)])
+        events = self.runner.run_async(user_id=user_id, session_id=session_id, new_message=message)
+        # aclosing: leaving the loop early must still run the runner's cleanup (tracing, session writes) now.
+        async with contextlib.aclosing(events):
+            async for event in events:
+                if event.is_final_response():
+                    if event.content and event.content.parts:
+                        return "".join(part.text for part in event.content.parts if part.text)
+                    break
+        return ""
+
+    async def run(self, request: str, user_id: str = "user_123") -> RunRecord:
+        """Runs one request and records its queueing and service time."""
+        submitted = time.perf_counter()
+        if self._wall_start is None:
+            self._wall_start = submitted
+        user_lock = self._user_locks.setdefault(user_id, asyncio.Lock()) if self.reuse_sessions else None
+        # The user's lock is taken first so waiting for an earlier turn does not hold a concurrency slot.
+        async with user_lock or contextlib.nullcontext():
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    response, error = await self._execute(user_id, request), None
+                except Exception as e:
+                    response, error = "", repr(e)
+                finished = time.perf_counter()
+        record = RunRecord(user_id, request, response, started - submitted, finished - started, error)
+        self.records.append(record)
+        self._wall_end = finished
+        return record
+
+    async def run_many(self, requests: Iterable[Union[str, tuple[str, str]]]) -> list[RunRecord]:
+        """Runs `requests` (texts or (user_id, text) pairs) concurrently, returning records in input order."""
+        pairs = [("user_123", r) if isinstance(r, str) else r for r in requests]
+        return await asyncio.gather(*(self.run(text, user_id) for user_id, text in pairs))
+
+    def report(self) -> dict:
+        """Throughput and latency distributions (seconds) over all recorded runs."""
+        wall = (self._wall_end or 0.0) - (self._wall_start or 0.0)
+        return {
+            "requests": len(self.records),
+            "errors": sum(r.error is not None for r in self.records),
+            "sessions_created": self.sessions_created,
+            "wall_seconds": wall,
+            "throughput_rps": len(self.records) / wall if wall > 0 else 0.0,
+            "latency": _distribution([r.latency for r in self.records]),
+            "queued": _distribution([r.queued for r in self.records]),
+            "service": _distribution([r.service for r in self.records]),
+        }
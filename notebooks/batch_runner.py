@@ -0,0 +1,226 @@
+"""
+Bulk document mode for the prompt-chaining pipeline (01_prompt_chaining_python).
+
+Streams a JSONL file of product descriptions through the spec extraction chain
+with bounded concurrency and appends each result to an output JSONL as soon as
+it completes. The output file doubles as the checkpoint: rerunning the same
+command after a crash skips every document already written.
+
+    python batch_runner.py descriptions.jsonl specs.jsonl --concurrency 32
+
+Input lines are either JSON strings or objects with a "text" field and an
+optional "id" (defaults to the line number).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, is_dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    """Yields {"id", "text"} records from a JSONL file."""
+    with open(path) as f:
+        for line_number, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"text": record}
+            record.setdefault("id", line_number)
+            yield record
+
+
+def completed_ids(output_path: str) -> set:
+    """IDs already present in the output file, i.e. the resume checkpoint."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def _drop_torn_line(path: str) -> None:
+    """
+    Truncates `path` after its last newline.
+
+    A crash mid-write can leave a partial last line. Appending after it would
+    glue the next record onto it, so it is cut off and its document redone.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        end = position = f.tell()
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != end:
+            f.truncate(position)
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if is_dataclass(value):
+        return {k: _to_jsonable(v) for k, v in asdict(value).items()}
+    return value
+
+
+async def run_batch(
+    runnable: Runnable,
+    records: Iterable[dict],
+    output_path: str,
+    max_concurrency: int = 16,
+    ordered: bool = False,
+    chunk_size: int = 1000,
+    to_input: Callable[[str], Any] = lambda text: {"text_input": text},
+    progress_every: int = 100,
+) -> dict:
+    """
+    Runs `runnable` over `records` and appends results to `output_path` as they complete.
+
+    Records whose ID is already in the output file are skipped, so an interrupted
+    run resumes where it stopped. Failures go to `<output_path>.errors.jsonl` and
+    are retried on the next run.
+
+    Args:
+        runnable: The chain to run; receives `to_input(record["text"])`.
+        records: Iterable of {"id", "text"} dicts; consumed lazily in chunks.
+        output_path: JSONL file receiving {"id", "output"} lines.
+        max_concurrency: Maximum documents in flight.
+        ordered: Write results in input order (buffers out-of-order results) instead
+            of completion order.
+        chunk_size: Records pulled from `records` per `abatch_as_completed` call.
+        to_input: Maps a document text to the runnable's input.
+        progress_every: Print throughput after this many documents. 0 disables it.
+
+    Returns:
+        Counts of processed, skipped and failed documents, plus docs/sec.
+    """
+    errors_path = f"{output_path}.errors.jsonl"
+    _drop_torn_line(output_path)
+    _drop_torn_line(errors_path)
+    done = completed_ids(output_path)
+    stats = {"processed": 0, "skipped": 0, "failed": 0}
+    start = time.perf_counter()
+    config = {"max_concurrency": max_concurrency}
+
+    def not_done():
+        for record in records:
+            if record["id"] in done:
+                stats["skipped"] += 1
+            else:
+                yield record
+
+    pending = not_done()
+
+    with open(output_path, "a") as out, open(errors_path, "a") as errors:
+        while chunk := list(islice(pending, chunk_size)):
+            inputs = [to_input(record["text"]) for record in chunk]
+            buffered, next_index = {}, 0
+            async for index, result in runnable.abatch_as_completed(inputs, config=config, return_exceptions=True):
+                record_id = chunk[index]["id"]
+                if isinstance(result, Exception):
+                    stats["failed"] += 1
+                    errors.write(json.dumps({"id": record_id, "error": repr(result)}) + "\n")
+                    errors.flush()
+                    line = None
+                else:
+                    stats["processed"] += 1
+                    line = json.dumps({"id": record_id, "output": _to_jsonable(result)}) + "\n"
+
+                if ordered:
+                    buffered[index] = line
+                    while next_index in buffered:
+                        if (ready := buffered.pop(next_index)) is not None:
+                            out.write(ready)
+                        next_index += 1
+                elif line is not None:
+                    out.write(line)
+                # Flush per document so a crash loses at most the line being written.
+                out.flush()
+
+                if line is not None and progress_every and stats["processed"] % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"{stats['processed']} docs, {stats['processed'] / elapsed:.1f} docs/sec")
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["docs_per_sec"] = stats["processed"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def build_runnable(mode: str, model_name: str, llm: Optional[BaseChatModel] = None) -> Runnable:
+    """
+    The prompt-chaining pipeline in "two-step" (original) or "single" (structured output) mode.
+
+    Both modes take the same {"text_input": text} input, so `run_batch`'s default
+    `to_input` works for either. `llm` overrides the OpenRouter model.
+    """
+    from spec_extraction import SpecExtractor, build_two_step_chain
+    from utils import get_openrouter_model
+
+    llm = llm or get_openrouter_model(model_name=model_name)
+    if mode == "two-step":
+        return build_two_step_chain(llm)
+    extractor = SpecExtractor(llm)
+
+    def invoke(inputs: dict):
+        return extractor.invoke(inputs["text_input"])
+
+    async def ainvoke(inputs: dict):
+        return await extractor.ainvoke(inputs["text_input"])
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="SpecExtractor")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file of product descriptions.")
+    parser.add_argument("output", help="JSONL file for results; also the resume checkpoint.")
+    parser.add_argument("--mode", choices=["single", "two-step"], default="single")
+    parser.add_argument("--model", default="google/gemini-2.5-flash-lite")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ordered", action="store_true", help="Write results in input order.")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    runnable = build_runnable(args.mode, args.model)
+    stats = asyncio.run(
+        run_batch(
+            runnable,
+            read_jsonl(args.input),
+            args.output,
+            max_concurrency=args.concurrency,
+            ordered=args.ordered,
+            chunk_size=args.chunk_size,
+        )
+    )
+    print(
+        f"Done: {stats['processed']} processed, {stats['skipped']} skipped (already done), "
+        f"{stats['failed']} failed in {stats['seconds']:.1f}s ({stats['docs_per_sec']:.1f} docs/sec)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import threading
+import time
+from typing import Any, Optional, Union
+
+import numpy as np
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from llm_cache import HashingEmbedder
+
+# Labelled requests for the booker/info/unclear coordinator in 02_routing_langgraph.
+ROUTING_EXAMPLES = {
+    "booker": [
+        "Book me a flight to London.",
+        "I need a hotel room in Paris for next weekend.",
+        "Reserve two plane tickets from New York to Tokyo.",
+        "Can you book a flight for tomorrow morning?",
+        "Find and book a cheap hotel near the airport.",
+        "Change my flight reservation to Friday.",
+        "Cancel my hotel booking in Rome.",
+        "Get me a round-trip ticket to Berlin in March.",
+        "I want to reserve a double room for three nights.",
+        "Book a business class seat on the next flight to Dubai.",
+    ],
+    "info": [
+        "What is the capital of Italy?",
+        "How tall is Mount Everest?",
+        "Who wrote Pride and Prejudice?",
+        "What is the population of Canada?",
+        "When did the Second World War end?",
+        "What currency is used in Japan?",
+        "How far is the Moon from the Earth?",
+        "What is the boiling point of water?",
+        "Explain how photosynthesis works.",
+        "What time zone is Sydney in?",
+        # Travel questions, so hotel and flight words alone do not decide for booker.
+        "What is the best hotel in Rome?",
+        "Which airlines fly from London to New York?",
+        "How long is the flight from Paris to Tokyo?",
+        "Is the Berlin airport far from the city centre?",
+        "What are the best places to stay in Madrid?",
+    ],
+    "unclear": [
+        "Hmm.",
+        "Can you help me?",
+        "Do the thing we talked about.",
+        "I'm not sure what I need.",
+        "Something is wrong.",
+        "asdf qwerty",
+        "Whatever works.",
+        "Tell me something.",
+        "Fix it.",
+        "Ok then.",
+    ],
+}
+
+
+class CentroidRouter:
+    """
+    Routes requests by nearest centroid over embeddings, with an LLM fallback.
+
+    Each route's labelled examples are embedded once and averaged into a
+    centroid. A request is routed locally, without any model call, when its
+    best cosine similarity beats the runner-up by at least `min_margin` and
+    reaches `min_similarity`. Otherwise `fallback` (the LLM router chain) decides.
+
+    Args:
+        examples: Mapping of route name to example requests.
+        fallback: Runnable returning a route name for ambiguous requests. Without one,
+            ambiguous requests go to `default`.
+        embeddings: Object with `embed_documents`/`embed_query`. Defaults to `HashingEmbedder`.
+        min_margin: Required similarity lead of the best route over the second best.
+        min_similarity: Required similarity of the best route.
+        default: Route for ambiguous requests when there is no fallback.
+    """
+
+    def __init__(
+        self,
+        examples: dict[str, list[str]] = ROUTING_EXAMPLES,
+        fallback: Optional[Runnable] = None,
+        embeddings: Any = None,
+        min_margin: float = 0.1,
+        min_similarity: float = 0.15,
+        default: str = "unclear",
+    ):
+        self.embeddings = embeddings or HashingEmbedder()
+        self.fallback = fallback
+        self.min_margin = min_margin
+        self.min_similarity = min_similarity
+        self.default = default
+        self.routes = list(examples)
+        centroids = [np.asarray(self.embeddings.embed_documents(examples[route])).mean(axis=0) for route in self.routes]
+        self.centroids = np.stack(centroids)
+        self.centroids /= np.maximum(np.linalg.norm(self.centroids, axis=1, keepdims=True), 1e-12)
+        self.local_calls = 0
+        self.fallback_calls = 0
+        self._lock = threading.Lock()
+
+    def classify(self, request: str) -> tuple[str, float, bool]:
+        """Returns (route, margin, confident) using embeddings only."""
+        similarities = self.centroids @ np.asarray(self.embeddings.embed_query(request))
+        second, best = np.argsort(similarities)[-2:]
+        margin = float(similarities[best] - similarities[second])
+        confident = bool(margin >= self.min_margin and similarities[best] >= self.min_similarity)
+        return self.routes[best], margin, confident
+
+    @staticmethod
+    def _request_text(value: Union[str, dict]) -> str:
+        return value["request"] if isinstance(value, dict) else value
+
+    def _local(self, value: Union[str, dict]) -> Optional[str]:
+        """The locally decided route, or None when the fallback has to decide."""
+        route, _, confident = self.classify(self._request_text(value))
+        use_fallback = not confident and self.fallback is not None
+        with self._lock:
+            if use_fallback:
+                self.fallback_calls += 1
+            else:
+                self.local_calls += 1
+        if use_fallback:
+            return None
+        return route if confident else self.default
+
+    def route(self, value: Union[str, dict]) -> str:
+        """Route name for a request string or a {"request": ...} input."""
+        route = self._local(value)
+        if route is None:
+            route = self.fallback.invoke(value).strip()
+        return route
+
+    async def aroute(self, value: Union[str, dict]) -> str:
+        route = self._local(value)
+        if route is None:
+            route = (await self.fallback.ainvoke(value)).strip()
+        return route
+
+    def as_runnable(self) -> Runnable:
+        """Drop-in replacement for the LLM router chain."""
+        return RunnableLambda(self.route, afunc=self.aroute, name="CentroidRouter")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            total = self.local_calls + self.fallback_calls
+            return {
+                "local_calls": self.local_calls,
+                "fallback_calls": self.fallback_calls,
+                "local_ratio": self.local_calls / total if total else 0.0,
+            }
+
+
+def benchmark_router(router: CentroidRouter, llm_router: Runnable, requests: list[str]) -> dict:
+    """
+    Compares routing latency and decisions of `router` against the LLM router alone.
+
+    `agreement` covers every request; `local_agreement` only those routed without
+    the fallback, which is the figure that tunes `min_margin`. The call counts are
+    those of this run, not the router's lifetime totals.
+    """
+    before = router.metrics()
+    local_latencies, llm_latencies, agree = [], [], 0
+    local_total, local_agree = 0, 0
+    for request in requests:
+        start = time.perf_counter()
+        local_route = router.route({"request": request})
+        local_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        llm_route = llm_router.invoke({"request": request}).strip()
+        llm_latencies.append(time.perf_counter() - start)
+
+        agree += local_route == llm_route
+        if router.classify(request)[2]:
+            local_total += 1
+            local_agree += local_route == llm_route
+    return {
+        "requests": len(requests),
+        "agreement": agree / len(requests) if requests else 0.0,
+        "local_agreement": local_agree / local_total if local_total else 0.0,
+        "router_mean_latency": float(np.mean(local_latencies)) if requests else 0.0,
+        "router_p95_latency": float(np.percentile(local_latencies, 95)) if requests else 0.0,
+        "llm_mean_latency": float(np.mean(llm_latencies)) if requests else 0.0,
+        **_metrics_delta(before, router.metrics()),
+    }
+
+
+def _metrics_delta(before: dict, after: dict) -> dict:
+    local_calls = after["local_calls"] - before["local_calls"]
+    fallback_calls = after["fallback_calls"] - before["fallback_calls"]
+    total = local_calls + fallback_calls
+    return {
+        "local_calls": local_calls,
+        "fallback_calls": fallback_calls,
+        "local_ratio": local_calls / total if total else 0.0,
+    }
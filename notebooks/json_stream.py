@@ -0,0 +1,320 @@
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import Generation
+
+Path = tuple[Union[str, int], ...]
+
+_WHITESPACE = " \t\r\n"
+
+
+@dataclass
+class JsonEvent:
+    """A JSON value that has been fully received. `path` is () for the root document."""
+
+    path: Path
+    value: Any
+
+    @property
+    def dotted(self) -> str:
+        return format_path(self.path)
+
+
+def format_path(path: Path) -> str:
+    """("trends", 0, "trend_name") -> "trends[0].trend_name"."""
+    out = ""
+    for part in path:
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out
+
+
+def parse_pattern(pattern: str) -> Path:
+    """"trends[*].trend_name" -> ("trends", "*", "trend_name"). "[*]" matches any index."""
+    parts: list = []
+    for name in pattern.replace("[", ".[").split("."):
+        if not name:
+            continue
+        if name.startswith("[") and name.endswith("]"):
+            index = name[1:-1]
+            parts.append("*" if index == "*" else int(index))
+        else:
+            parts.append(name)
+    return tuple(parts)
+
+
+def path_matches(path: Path, pattern: Path) -> bool:
+    return len(path) == len(pattern) and all(p == "*" or p == q for q, p in zip(path, pattern))
+
+
+class InvalidField(OutputParserException):
+    """Raised while streaming when a completed field fails its validator."""
+
+    def __init__(self, path: Path, value: Any, reason: str = ""):
+        super().__init__(f"Invalid value at {format_path(path) or '<root>'}: {value!r} {reason}".strip())
+        self.path = path
+        self.value = value
+
+
+class JsonEventParser:
+    """
+    Incremental JSON scanner that reports each value the moment it is complete.
+
+    Text is fed in arbitrary chunks (e.g. LLM tokens). Every scalar, object and
+    array is emitted as a `JsonEvent` as soon as its last character arrives, so
+    `trends[0]` is available while `trends[1]` is still being generated. Each
+    character is scanned once; only completed values are handed to `json.loads`.
+
+    Anything before the first "{" or "[" (prose, a ```json fence) and after the
+    root value is ignored.
+
+    Example:
+        parser = JsonEventParser(paths=["trends[*]"])
+        for chunk in stream:
+            for event in parser.feed(chunk):
+                print(event.dotted, event.value)
+    """
+
+    def __init__(self, paths: Optional[Iterable[Union[str, Path]]] = None):
+        self.patterns = [parse_pattern(p) if isinstance(p, str) else p for p in paths] if paths is not None else None
+        self.result: Any = None
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        # Each frame: [kind ("{" or "["), start offset, path, current key or index, expecting_key]
+        self._stack: list[list] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._value_start: Optional[int] = None  # Start of the pending string or scalar
+
+    def _child_path(self) -> Path:
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        return frame[2] + (frame[3],)
+
+    def _emit(self, path: Path, start: int, end: int, events: list) -> None:
+        if self.patterns is None or any(path_matches(path, p) for p in self.patterns) or not path:
+            value = json.loads(self._buffer[start:end])
+            if not path:
+                self.result = value
+                self.done = True
+            events.append(JsonEvent(path, value))
+
+    def _finish_scalar(self, end: int, events: list) -> None:
+        if self._value_start is not None:
+            self._emit(self._child_path(), self._value_start, end, events)
+            self._value_start = None
+
+    def feed(self, text: str) -> list[JsonEvent]:
+        """Consumes more text and returns the values completed by it, innermost first."""
+        events: list[JsonEvent] = []
+        if self.done:
+            return events
+        self._buffer += text
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and not self.done:
+            char = buffer[pos]
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    continue  # Re-read as the root container
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame is not None and frame[0] == "{" and frame[4]:
+                        frame[3] = json.loads(buffer[self._value_start : pos + 1])
+                        self._value_start = None
+                    else:
+                        self._finish_scalar(pos + 1, events)
+                pos += 1
+                continue
+
+            if char in "]},":
+                self._finish_scalar(pos, events)
+            elif char in _WHITESPACE:
+                self._finish_scalar(pos, events)
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._value_start = pos
+            elif char in "{[":
+                self._stack.append([char, pos, self._child_path(), 0 if char == "[" else None, char == "{"])
+            elif char in "]}":
+                _, start, path, _, _ = self._stack.pop()
+                self._emit(path, start, pos + 1, events)
+            elif char == ":":
+                self._stack[-1][4] = False
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame[0] == "[":
+                    frame[3] += 1
+                else:
+                    frame[4] = True
+            elif self._value_start is None:
+                self._value_start = pos  # Number, true, false or null
+            pos += 1
+
+        # Drop consumed text that no open value can refer to any more.
+        open_starts = [frame[1] for frame in self._stack]
+        if self._value_start is not None:
+            open_starts.append(self._value_start)
+        keep = min(open_starts, default=pos)
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        for frame in self._stack:
+            frame[1] -= keep
+        if self._value_start is not None:
+            self._value_start -= keep
+        return events
+
+
+def _chunk_text(chunk: Union[str, BaseMessage]) -> str:
+    if isinstance(chunk, BaseMessage):
+        content = chunk.content
+        if isinstance(content, str):
+            return content
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return chunk
+
+
+class _EventFilter:
+    """Shared path/validator bookkeeping of the streaming helpers below."""
+
+    def __init__(self, paths: Optional[Iterable[str]], validators: Optional[dict[str, Callable[[Any], bool]]]):
+        self.patterns = [parse_pattern(p) for p in paths] if paths is not None else None
+        self.validators = {parse_pattern(k): v for k, v in (validators or {}).items()}
+        # Only values someone watches or validates need decoding.
+        watched = None if self.patterns is None else self.patterns + list(self.validators)
+        self.parser = JsonEventParser(watched)
+
+    def feed(self, chunk: Union[str, BaseMessage]) -> Iterator[JsonEvent]:
+        for event in self.parser.feed(_chunk_text(chunk)):
+            for pattern, validator in self.validators.items():
+                if path_matches(event.path, pattern) and not validator(event.value):
+                    raise InvalidField(event.path, event.value)
+            if self.patterns is None or any(path_matches(event.path, p) for p in self.patterns):
+                yield event
+
+
+def iter_json_events(
+    chunks: Iterable[Union[str, BaseMessage]],
+    paths: Optional[Iterable[str]] = None,
+    validators: Optional[dict[str, Callable[[Any], bool]]] = None,
+) -> Iterator[JsonEvent]:
+    """
+    Yields `JsonEvent`s for `paths` (all values if None) from a stream of text or message chunks.
+
+    `validators` maps path patterns to predicates; the first value failing its
+    predicate raises `InvalidField` and closes `chunks`, which stops an LLM
+    stream from generating further tokens.
+
+    Example:
+        for event in iter_json_events(chain.stream(inputs), paths=["trends[*]"]):
+            handle_trend(event.value)
+    """
+    events = _EventFilter(paths, validators)
+    try:
+        for chunk in chunks:
+            yield from events.feed(chunk)
+            if events.parser.done:
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+async def aiter_json_events(
+    chunks: AsyncIterator[Union[str, BaseMessage]],
+    paths: Optional[Iterable[str]] = None,
+    validators: Optional[dict[str, Callable[[Any], bool]]] = None,
+) -> AsyncIterator[JsonEvent]:
+    """Async version of `iter_json_events`, e.g. over `chain.astream(inputs)`."""
+    events = _EventFilter(paths, validators)
+    try:
+        async for chunk in chunks:
+            for event in events.feed(chunk):
+                yield event
+            if events.parser.done:
+                break
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class StreamingJsonOutputParser(JsonOutputParser):
+    """
+    `JsonOutputParser` that validates fields while the response is still streaming.
+
+    Drop-in replacement in a chain: `invoke` returns the parsed object as
+    before, `stream`/`astream` still yield growing partial objects. In addition,
+    every completed value matching `validators` is checked as soon as it closes,
+    and `on_value(event)` is called for values matching `paths`. A failed check
+    raises `InvalidField` (an `OutputParserException`) mid-stream, which cancels
+    the LLM request instead of waiting for the rest of the response.
+
+    Example:
+        parser = StreamingJsonOutputParser(
+            validators={"status": lambda s: s in ("ACCURATE", "INACCURATE")},
+        )
+    """
+
+    validators: dict[str, Callable[[Any], bool]] = {}
+    paths: Optional[list[str]] = None
+    on_value: Optional[Callable[[JsonEvent], None]] = None
+
+    def _events(self) -> _EventFilter:
+        return _EventFilter(self.paths, self.validators)
+
+    def _notify(self, events: Iterator[JsonEvent]) -> None:
+        for event in events:
+            if self.on_value is not None:
+                self.on_value(event)
+
+    def _transform(self, input: Iterator[Union[str, BaseMessage]]) -> Iterator[Any]:
+        events = self._events()
+
+        def tap():
+            for chunk in input:
+                self._notify(events.feed(chunk))
+                yield chunk
+
+        yield from super()._transform(tap())
+
+    async def _atransform(self, input: AsyncIterator[Union[str, BaseMessage]]) -> AsyncIterator[Any]:
+        events = self._events()
+
+        async def tap():
+            async for chunk in input:
+                self._notify(events.feed(chunk))
+                yield chunk
+
+        async for parsed in super()._atransform(tap()):
+            yield parsed
+
+    def parse_result(self, result: list[Generation], *, partial: bool = False) -> Any:
+        if not partial:
+            # Non-streaming calls get the same checks on the complete text.
+            self._notify(self._events().feed(result[0].text))
+        return super().parse_result(result, partial=partial)
+
+    @property
+    def _type(self) -> str:
+        return "streaming_json_output_parser"
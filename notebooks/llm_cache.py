@@ -0,0 +1,353 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+
+class SQLiteResponseCache(BaseCache):
+    """
+    Persistent exact-match cache for LLM responses.
+
+    LangChain hands every cache lookup the serialized messages (`prompt`) and a
+    string describing the model call (`llm_string`), which already covers the
+    model name, temperature, bound tools and response format. Both are hashed
+    together into the cache key, so any change to the request is a miss.
+
+    Pass an instance to `get_openrouter_model(cache=...)`. Only use it for
+    deterministic calls (temperature 0); cached answers are replayed verbatim.
+
+    Args:
+        path: SQLite database file, relative to the working directory (so
+            notebooks/ when running a notebook; ignored by git wherever it lands).
+            Use ":memory:" for a process-local cache.
+        ttl: Seconds an entry stays valid. None keeps entries forever.
+        max_entries: Upper bound on stored entries; least recently used are evicted first.
+    """
+
+    def __init__(self, path: str = ".llm_cache.sqlite", ttl: Optional[float] = None, max_entries: int = 10_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.bypass:
+            return None
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.bypass:
+            return
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, dumps(return_val), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    @contextmanager
+    def bypassed(self):
+        """Temporarily skips the cache, e.g. to force a fresh answer."""
+        previous, self.bypass = self.bypass, True
+        try:
+            yield self
+        finally:
+            self.bypass = previous
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current number of stored entries."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_STOPWORDS = frozenset(
+    "a an the is are was were be of to in on for and or what who how when where which "
+    "do does did can could would should i me my you your it this that with please tell".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder based on hashed words and character n-grams.
+
+    Stopwords are dropped so that the content words decide similarity. Good
+    enough to catch near-duplicate phrasings ("capital of France?" vs "What is
+    the capital of France?") without a model call. Swap in a real LangChain
+    `Embeddings` object when paraphrases are less literal.
+
+    Args:
+        dim: Size of the output vectors.
+        ngram: Character n-gram length used inside each word.
+    """
+
+    def __init__(self, dim: int = 1024, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str) -> list[str]:
+        features = []
+        for word in re.findall(r"\w+", text.lower()):
+            if word in _STOPWORDS:
+                continue
+            features.append(f"w:{word}")
+            padded = f"<{word}>"
+            features.extend(f"c:{padded[i : i + self.ngram]}" for i in range(len(padded) - self.ngram + 1))
+        return features
+
+    def embed_documents(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                vectors[row, int.from_bytes(digest, "little") % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+
+class _Namespace:
+    """Embedding matrix and payloads for one isolated slice of the semantic cache."""
+
+    def __init__(self, dim: int):
+        # Rows beyond len(self.values) are spare capacity, grown by doubling.
+        self._matrix = np.zeros((16, dim), dtype=np.float32)
+        self.texts: list[str] = []
+        self.values: list[str] = []
+        self.accessed: list[float] = []
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: len(self.values)]
+
+    def add(self, vector: np.ndarray, text: str, value: str) -> None:
+        size = len(self.values)
+        if size == self._matrix.shape[0]:
+            self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+        self._matrix[size] = vector
+        self.texts.append(text)
+        self.values.append(value)
+        self.accessed.append(time.monotonic())
+
+    def retain(self, keep: np.ndarray) -> None:
+        """Keeps the entries where `keep` is True, shrinking the spare capacity to match."""
+        rows = np.flatnonzero(keep)
+        capacity = max(16, 1 << max(len(rows) - 1, 0).bit_length())
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[: len(rows)] = self._matrix[rows]
+        self._matrix = matrix
+        self.texts = [self.texts[i] for i in rows]
+        self.values = [self.values[i] for i in rows]
+        self.accessed = [self.accessed[i] for i in rows]
+
+
+class SemanticResponseCache(BaseCache):
+    """
+    In-memory cache that serves answers for prompts that are *similar* to a cached one.
+
+    Only the final human message is embedded and compared by cosine similarity
+    against every cached question of the same namespace in one float32 matrix
+    product. The best match above `threshold` is returned. Everything before it
+    (system prompt, few-shot examples, history) must match exactly: entries are
+    isolated by `namespace`, by the `llm_string` and by a hash of that prefix,
+    so different models, tools, response formats or instructions never share
+    answers, and a long shared system prompt cannot inflate the similarity of
+    two different questions.
+
+    Every hit is appended to `audit_log` with both prompts and the similarity,
+    which makes it easy to review false hits and tune the threshold.
+
+    Args:
+        threshold: Minimum cosine similarity for a hit, between 0 and 1. The default
+            suits `HashingEmbedder`, where "Is 7 prime?" and "Is 9 prime?" already
+            score around 0.85; retune it when swapping in a model embedder.
+        embeddings: Object with `embed_documents`/`embed_query`, e.g. a LangChain
+            `Embeddings`. Defaults to `HashingEmbedder`.
+        namespace: Extra isolation key, e.g. a tenant or pipeline name.
+        max_entries: Upper bound on entries across all namespaces, models and prefixes;
+            least recently used are evicted first, and emptied slices are dropped.
+        audit_size: Number of recent hits kept in `audit_log`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        embeddings: Any = None,
+        namespace: str = "default",
+        max_entries: int = 1_000,
+        audit_size: int = 1_000,
+    ):
+        self.threshold = threshold
+        self.embeddings = embeddings or HashingEmbedder()
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+        self.audit_log = deque(maxlen=audit_size)
+        self._lock = threading.Lock()
+        self._namespaces: dict[tuple[str, str, str], _Namespace] = {}
+
+    @staticmethod
+    def _split_prompt(prompt: str) -> tuple[str, str]:
+        """
+        Splits LangChain's serialized prompt into (prefix hash, question text).
+
+        The question is the content of the last human message; the prefix is
+        every other message, which has to match exactly for a hit.
+        """
+        try:
+            messages = loads(prompt)
+        except Exception:
+            messages = prompt
+        if not isinstance(messages, list) or not messages:
+            return hashlib.sha256(b"").hexdigest(), str(messages)
+        humans = [i for i, message in enumerate(messages) if getattr(message, "type", None) == "human"]
+        last = humans[-1] if humans else len(messages) - 1
+        prefix = "\x01".join(
+            f"{getattr(message, 'type', '')}\x00{getattr(message, 'content', message)}"
+            for i, message in enumerate(messages)
+            if i != last
+        )
+        return hashlib.sha256(prefix.encode()).hexdigest(), str(getattr(messages[last], "content", messages[last]))
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.bypass:
+            return None
+        prefix, text = self._split_prompt(prompt)
+        vector = self._embed(text)
+        with self._lock:
+            space = self._namespaces.get((self.namespace, llm_string, prefix))
+            if space is None or not space.values:
+                self.misses += 1
+                return None
+            scores = space.matrix @ vector
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            space.accessed[best] = time.monotonic()
+            value = space.values[best]
+            self.hits += 1
+            self.audit_log.append(
+                {"namespace": self.namespace, "prompt": text, "matched": space.texts[best], "similarity": similarity}
+            )
+        return loads(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.bypass:
+            return
+        prefix, text = self._split_prompt(prompt)
+        vector = self._embed(text)
+        with self._lock:
+            space = self._namespaces.setdefault((self.namespace, llm_string, prefix), _Namespace(vector.shape[0]))
+            space.add(vector, text, dumps(return_val))
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drops the least recently used entries beyond `max_entries`. Must hold the lock."""
+        excess = sum(len(space.values) for space in self._namespaces.values()) - self.max_entries
+        if excess <= 0:
+            return
+        accessed = np.concatenate([np.asarray(space.accessed) for space in self._namespaces.values()])
+        cutoff = np.partition(accessed, excess - 1)[excess - 1]
+        for key, space in list(self._namespaces.items()):
+            stamps = np.asarray(space.accessed)
+            if stamps.min() > cutoff:
+                continue
+            space.retain(stamps > cutoff)
+            if not space.values:
+                del self._namespaces[key]
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._namespaces.clear()
+
+    @contextmanager
+    def bypassed(self):
+        """Temporarily skips the cache, e.g. to force a fresh answer."""
+        previous, self.bypass = self.bypass, True
+        try:
+            yield self
+        finally:
+            self.bypass = previous
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters, the number of stored entries and the mean hit similarity."""
+        with self._lock:
+            entries = sum(len(space.values) for space in self._namespaces.values())
+            similarities = [entry["similarity"] for entry in self.audit_log]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "mean_hit_similarity": float(np.mean(similarities)) if similarities else None,
+        }
@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+# HTTP status codes that mean "the provider is overloaded, back off".
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True for rate limit, 5xx and timeout errors raised by the OpenAI SDK, httpx or litellm."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in OVERLOAD_STATUS_CODES:
+        return True
+    return type(error).__name__ in {"RateLimitError", "APITimeoutError", "InternalServerError", "ReadTimeout"}
+
+
+class _Waiter:
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def wake(self) -> None:
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) limit on in-flight LLM calls.
+
+    Every successful call with healthy latency raises the limit by `1 / limit`,
+    i.e. by about one slot per full window of calls. An overload error (429, 5xx,
+    timeout) or a latency spike above `spike_factor` times the smoothed baseline
+    multiplies the limit by `backoff`, at most once per `cooldown` seconds.
+
+    Waiting callers are served in arrival order. The same limiter can gate
+    blocking and asyncio callers, wrap LangChain runnables (`wrap`) and ADK
+    agents (`adk_callbacks`).
+
+    Args:
+        initial: Starting limit.
+        min_limit: The limit never drops below this.
+        max_limit: The limit never grows beyond this.
+        backoff: Multiplier applied on overload, between 0 and 1.
+        spike_factor: Latency above `spike_factor * baseline` counts as overload.
+        smoothing: EWMA weight of new latency samples in the baseline.
+        cooldown: Minimum seconds between two decreases.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        spike_factor: float = 2.0,
+        smoothing: float = 0.1,
+        cooldown: float = 1.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.spike_factor = spike_factor
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._adk_started: dict = {}
+        self.successes = 0
+        self.overloads = 0
+        self.decreases = 0
+        self.history: deque[tuple[float, int]] = deque(maxlen=1000)
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def config(self) -> dict:
+        """
+        A LangChain `RunnableConfig` capping concurrency at the current limit.
+
+        Example: `await chain.abatch(inputs, config=limiter.config())`. The value
+        is a snapshot; wrap the runnable with `wrap` to adapt while the batch runs.
+        """
+        return {"max_concurrency": self.limit}
+
+    def _wake_waiters(self) -> None:
+        # Caller holds the lock. Slots are handed to waiters directly so a newly
+        # arriving caller cannot overtake them.
+        while self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            self._waiters.popleft().wake()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def aacquire(self) -> None:
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._wake_waiters()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Frees a slot and adapts the limit to the outcome of the call."""
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            overloaded = error is not None and is_overload_error(error)
+            if error is None:
+                spike = self._baseline is not None and latency > self.spike_factor * self._baseline
+                self._baseline = latency if self._baseline is None else (
+                    (1 - self.smoothing) * self._baseline + self.smoothing * latency
+                )
+                overloaded = spike
+                if not spike:
+                    self.successes += 1
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            if overloaded:
+                self.overloads += 1
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.decreases += 1
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+            self.history.append((now, self.limit))
+            self._wake_waiters()
+
+    @contextmanager
+    def slot(self):
+        """Holds one concurrency slot for the duration of a blocking call."""
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as error:
+            self.release(time.perf_counter() - start, error)
+            raise
+        self.release(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Holds one concurrency slot for the duration of an async call."""
+        await self.aacquire()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as error:
+            self.release(time.perf_counter() - start, error)
+            raise
+        self.release(time.perf_counter() - start)
+
+    def wrap(self, runnable: Runnable) -> Runnable:
+        """
+        Returns `runnable` gated by this limiter.
+
+        Wrap the branches of a `RunnableParallel`, or the chain passed to
+        `abatch`, so fan-outs respect the adaptive limit:
+
+            map_chain = RunnableParallel({"summary": limiter.wrap(summarize_chain), ...})
+        """
+
+        def _invoke(value, config):
+            with self.slot():
+                return runnable.invoke(value, config)
+
+        async def _ainvoke(value, config):
+            async with self.aslot():
+                return await runnable.ainvoke(value, config)
+
+        return RunnableLambda(_invoke, afunc=_ainvoke, name=f"Adaptive[{runnable.get_name()}]")
+
+    def adk_callbacks(self) -> dict:
+        """
+        ADK callbacks that gate the model calls of an agent.
+
+        Pass them to every `LlmAgent` under a `ParallelAgent`:
+        `Agent(..., **limiter.adk_callbacks())`. A slot is taken before each
+        model call and released after its final response, when the call raises
+        (`on_model_error_callback`; 429/5xx/timeouts count as overload), and at
+        the latest when the agent finishes (`after_agent_callback`), so a
+        failed call can never keep its slot.
+        """
+
+        def finish(callback_context, error: Optional[BaseException]) -> None:
+            start = self._adk_started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+            if start is not None:
+                self.release(time.perf_counter() - start, error)
+
+        async def before_model_callback(callback_context, llm_request):
+            # A slot still held here belongs to a call that ended without any callback; free it unjudged.
+            finish(callback_context, RuntimeError("model call ended without a response"))
+            await self.aacquire()
+            self._adk_started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+            return None
+
+        async def after_model_callback(callback_context, llm_response):
+            # Partial streaming chunks also pass through here; only the final one frees the slot.
+            if getattr(llm_response, "partial", False):
+                return None
+            error = RuntimeError(llm_response.error_code) if getattr(llm_response, "error_code", None) else None
+            finish(callback_context, error)
+            return None
+
+        async def on_model_error_callback(callback_context, llm_request, error):
+            finish(callback_context, error)
+            return None  # Let the error propagate.
+
+        async def after_agent_callback(callback_context):
+            finish(callback_context, RuntimeError("agent finished while its model call was unaccounted for"))
+            return None
+
+        return {
+            "before_model_callback": before_model_callback,
+            "after_model_callback": after_model_callback,
+            "on_model_error_callback": on_model_error_callback,
+            "after_agent_callback": after_agent_callback,
+        }
+
+    def metrics(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "baseline_latency_s": self._baseline,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "decreases": self.decreases,
+        }
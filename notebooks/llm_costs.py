@@ -0,0 +1,216 @@
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from llm_tokens import count_tokens
+
+# USD per 1M tokens as (input, output). Update from the provider pricing pages;
+# OpenRouter model IDs ("openai/gpt-4o") resolve to the same entries.
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "o4-mini": (1.10, 4.40),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "mistral-7b-instruct:free": (0.0, 0.0),
+}
+
+# Cheaper model to fall back to when a budget would be exceeded.
+DOWNGRADES = {
+    "gpt-4o": "gpt-4o-mini",
+    "o4-mini": "gpt-4o-mini",
+    "gemini-2.5-flash": "gemini-2.5-flash-lite",
+}
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when no model in the downgrade chain fits the remaining budget."""
+
+    def __init__(self, decision: "Decision"):
+        super().__init__(decision.reason)
+        self.decision = decision
+
+
+@dataclass
+class Decision:
+    """Outcome of `CostLedger.authorize`, kept in the audit log."""
+
+    request_id: str
+    requested_model: str
+    model: Optional[str]
+    action: str  # "allow", "downgrade" or "refuse"
+    estimated_cost: float
+    reason: str
+    user: Optional[str] = None
+    pipeline: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+    reservation_id: Optional[int] = None  # Set while the estimate is held against the budgets.
+
+
+def _base_name(model: str) -> str:
+    return model.split("/", 1)[-1]
+
+
+class CostLedger:
+    """
+    Prices every LLM call and enforces per-request and per-minute budgets.
+
+    Call `authorize` before a request: it estimates the cost from the prompt
+    and the output allowance, and if a budget would be exceeded it walks the
+    `downgrades` chain to a cheaper model, or refuses with `BudgetExceeded`.
+    An allowed estimate is reserved against both budgets right away, so
+    concurrent callers cannot all pass on the same remaining budget. Call
+    `record` afterwards with the real token usage, which replaces the
+    reservation with the actual cost, or `release` if the call failed. Every
+    decision is kept in `audit_log`.
+
+    Args:
+        per_request_budget: Max USD spent across all calls of one request ID. None disables it.
+        per_minute_budget: Max USD spent over any 60-second window. None disables it.
+        prices: Model price table, defaults to `PRICES`.
+        downgrades: Model fallback chain, defaults to `DOWNGRADES`.
+    """
+
+    def __init__(
+        self,
+        per_request_budget: Optional[float] = None,
+        per_minute_budget: Optional[float] = None,
+        prices: dict = None,
+        downgrades: dict = None,
+    ):
+        self.per_request_budget = per_request_budget
+        self.per_minute_budget = per_minute_budget
+        self.prices = dict(PRICES if prices is None else prices)
+        self.downgrades = dict(DOWNGRADES if downgrades is None else downgrades)
+        self.audit_log: list[Decision] = []
+        self._lock = threading.Lock()
+        self._window: deque[tuple[float, float]] = deque()
+        self._reservations: dict[int, Decision] = {}
+        self._reservation_ids = itertools.count(1)
+        self._spend = {"request": defaultdict(float), "user": defaultdict(float), "pipeline": defaultdict(float)}
+
+    def price(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """USD cost of a call. Unknown models raise KeyError so they are never silently free."""
+        input_price, output_price = self.prices[_base_name(model)]
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def estimate(self, model: str, prompt: str, max_output_tokens: int = 1024) -> float:
+        return self.price(model, count_tokens(prompt, model), max_output_tokens)
+
+    def _minute_spend(self, now: float) -> float:
+        while self._window and now - self._window[0][0] > 60:
+            self._window.popleft()
+        return sum(cost for _, cost in self._window)
+
+    def _reserved(self, request_id: str = None) -> float:
+        return sum(
+            decision.estimated_cost
+            for decision in self._reservations.values()
+            if request_id is None or decision.request_id == request_id
+        )
+
+    def _release(self, decision: Optional[Decision], request_id: str, model: str) -> None:
+        """Drops a reservation: `decision`'s, or else the oldest open one for this request and model."""
+        if decision is None:
+            decision = next(
+                (d for d in self._reservations.values() if d.request_id == request_id and d.model == model), None
+            )
+        if decision is not None and decision.reservation_id is not None:
+            self._reservations.pop(decision.reservation_id, None)
+            decision.reservation_id = None
+
+    def authorize(
+        self,
+        model: str,
+        prompt: str,
+        request_id: str,
+        user: str = None,
+        pipeline: str = None,
+        max_output_tokens: int = 1024,
+    ) -> Decision:
+        """
+        Picks the model to call for this prompt within the budgets.
+
+        Returns a `Decision` whose `model` may be a cheaper substitute; its
+        estimated cost stays reserved until `record` or `release`. Raises
+        `BudgetExceeded` if even the cheapest fallback does not fit.
+        """
+        with self._lock:
+            request_spent = self._spend["request"][request_id] + self._reserved(request_id)
+            minute_spent = self._minute_spend(time.time()) + self._reserved()
+            candidate, seen = model, set()
+            while candidate is not None and candidate not in seen:
+                seen.add(candidate)
+                cost = self.estimate(candidate, prompt, max_output_tokens)
+                over_request = self.per_request_budget is not None and request_spent + cost > self.per_request_budget
+                over_minute = self.per_minute_budget is not None and minute_spent + cost > self.per_minute_budget
+                if not (over_request or over_minute):
+                    downgraded = candidate != model
+                    decision = Decision(
+                        request_id,
+                        model,
+                        candidate,
+                        "downgrade" if downgraded else "allow",
+                        cost,
+                        f"{model} exceeds budget, using {candidate}" if downgraded else "within budget",
+                        user,
+                        pipeline,
+                        reservation_id=next(self._reservation_ids),
+                    )
+                    self._reservations[decision.reservation_id] = decision
+                    self.audit_log.append(decision)
+                    return decision
+                fallback = self.downgrades.get(_base_name(candidate))
+                # Keep the provider prefix (e.g. "openai/") when stepping down.
+                if fallback is not None and "/" in candidate:
+                    fallback = f"{candidate.split('/', 1)[0]}/{fallback}"
+                candidate = fallback
+
+            budget = "per-request" if over_request else "per-minute"
+            decision = Decision(request_id, model, None, "refuse", cost, f"{budget} budget exhausted", user, pipeline)
+            self.audit_log.append(decision)
+        raise BudgetExceeded(decision)
+
+    def record(
+        self,
+        request_id: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        user: str = None,
+        pipeline: str = None,
+        decision: Optional[Decision] = None,
+    ) -> float:
+        """
+        Books the actual cost of a finished call and returns it.
+
+        Settles the reservation of `decision`; without it, the oldest open
+        reservation for this request ID and model.
+        """
+        cost = self.price(model, input_tokens, output_tokens)
+        with self._lock:
+            self._release(decision, request_id, model)
+            self._window.append((time.time(), cost))
+            self._spend["request"][request_id] += cost
+            if user:
+                self._spend["user"][user] += cost
+            if pipeline:
+                self._spend["pipeline"][pipeline] += cost
+        return cost
+
+    def release(self, decision: Decision) -> None:
+        """Returns the reservation of a call that failed or was cancelled before it could be recorded."""
+        with self._lock:
+            self._release(decision, decision.request_id, decision.model)
+
+    def spend(self, by: str = "request") -> dict:
+        """Spend in USD grouped by "request", "user" or "pipeline"."""
+        with self._lock:
+            return dict(self._spend[by])
+
+    def minute_spend(self) -> float:
+        with self._lock:
+            return self._minute_spend(time.time())
@@ -0,0 +1,348 @@
+import asyncio
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional, Union
+
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableGenerator, RunnableLambda
+
+MISSING_TEMPLATE = "[MISSING: {reason}]"
+
+# Runs the branches of every blocking `FanOut.invoke`. Threads cannot be interrupted,
+# so a branch abandoned at its deadline keeps its worker until it returns; the bound
+# keeps such stragglers from growing the thread count without limit.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fanout")
+
+
+@dataclass
+class BranchResult:
+    name: str
+    status: str  # "ok", "timeout" or "error"
+    latency: float
+    output: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class FanOutRun:
+    """Result of one `FanOut` call: the merged outputs plus each branch's status and latency."""
+
+    outputs: dict[str, Any]
+    branches: dict[str, BranchResult] = field(default_factory=dict)
+
+
+class FanOut:
+    """
+    Fan-out/fan-in over named branches with per-branch deadlines.
+
+    A replacement for `RunnableParallel` that never lets one branch stall or
+    break the whole pipeline: each branch gets its own timeout, branches still
+    running at their deadline are cancelled, and a branch that timed out or
+    raised is returned as an explicit missing marker string (e.g.
+    "[MISSING: timed out after 20s]") so the merger prompt can say the
+    information is unavailable instead of failing. Latencies are recorded per
+    branch to show which one dominates; `run`/`arun` also return them for the
+    call itself.
+
+    Args:
+        branches: Name to Runnable, as for `RunnableParallel`.
+        timeout: Seconds per branch, either one value or a dict by branch name.
+        default_timeout: Timeout for branches missing from a `timeout` dict.
+        missing_template: Format of missing markers; receives `reason`.
+        history: Latency samples kept per branch for `stats()`.
+        executor: Thread pool for the blocking `invoke`. Defaults to a bounded
+            pool shared by all instances.
+    """
+
+    def __init__(
+        self,
+        branches: dict[str, Runnable],
+        timeout: Union[float, dict[str, float]] = 30.0,
+        default_timeout: float = 30.0,
+        missing_template: str = MISSING_TEMPLATE,
+        history: int = 200,
+        executor: Optional[Executor] = None,
+    ):
+        self.branches = branches
+        self.timeouts = {
+            name: (timeout.get(name, default_timeout) if isinstance(timeout, dict) else timeout) for name in branches
+        }
+        self.missing_template = missing_template
+        self._latencies = {name: deque(maxlen=history) for name in branches}
+        self._failures = {name: {"timeout": 0, "error": 0} for name in branches}
+        self._lock = threading.Lock()
+        self._executor = executor or _executor
+
+    def _missing(self, result: BranchResult) -> str:
+        if result.status == "timeout":
+            reason = f"timed out after {self.timeouts[result.name]:g}s"
+        else:
+            reason = f"failed ({result.error})"
+        return self.missing_template.format(reason=reason)
+
+    def _collect(self, results: list[BranchResult]) -> FanOutRun:
+        with self._lock:
+            for result in results:
+                self._latencies[result.name].append(result.latency)
+                if result.status != "ok":
+                    self._failures[result.name][result.status] += 1
+        return FanOutRun(
+            outputs={r.name: r.output if r.status == "ok" else self._missing(r) for r in results},
+            branches={r.name: r for r in results},
+        )
+
+    async def _arun_branch(self, name: str, value: Any, config: Optional[RunnableConfig]) -> BranchResult:
+        start = time.perf_counter()
+        try:
+            # wait_for cancels the branch (and its HTTP request) when the deadline passes.
+            output = await asyncio.wait_for(self.branches[name].ainvoke(value, config), self.timeouts[name])
+            return BranchResult(name, "ok", time.perf_counter() - start, output)
+        except asyncio.TimeoutError:
+            return BranchResult(name, "timeout", time.perf_counter() - start)
+        except Exception as e:
+            return BranchResult(name, "error", time.perf_counter() - start, error=repr(e))
+
+    async def arun(self, value: Any, config: Optional[RunnableConfig] = None) -> FanOutRun:
+        """Runs all branches and returns their outputs together with this call's per-branch results."""
+        results = await asyncio.gather(*(self._arun_branch(name, value, config) for name in self.branches))
+        return self._collect(list(results))
+
+    def run(self, value: Any, config: Optional[RunnableConfig] = None) -> FanOutRun:
+        """Thread-based `arun`. Threads cannot be interrupted, so stragglers are abandoned, not cancelled."""
+        start = time.perf_counter()
+
+        def run(branch: Runnable) -> tuple[Any, float]:
+            return branch.invoke(value, config), time.perf_counter()
+
+        futures = {name: self._executor.submit(run, branch) for name, branch in self.branches.items()}
+        results = []
+        for name, future in futures.items():
+            remaining = self.timeouts[name] - (time.perf_counter() - start)
+            try:
+                output, finished = future.result(timeout=max(remaining, 0.0))
+                results.append(BranchResult(name, "ok", finished - start, output))
+            except FutureTimeout:
+                future.cancel()
+                results.append(BranchResult(name, "timeout", time.perf_counter() - start))
+            except Exception as e:
+                results.append(BranchResult(name, "error", time.perf_counter() - start, error=repr(e)))
+        return self._collect(results)
+
+    async def ainvoke(self, value: Any, config: Optional[RunnableConfig] = None) -> dict[str, Any]:
+        return (await self.arun(value, config)).outputs
+
+    def invoke(self, value: Any, config: Optional[RunnableConfig] = None) -> dict[str, Any]:
+        return self.run(value, config).outputs
+
+    def as_runnable(self) -> Runnable:
+        """Drop-in replacement for the `RunnableParallel` of the same branches."""
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="FanOut")
+
+    def stats(self) -> dict[str, dict]:
+        """Per-branch latency (seconds) and failure counts, slowest branch first."""
+        with self._lock:
+            rows = {}
+            for name, samples in self._latencies.items():
+                ordered = sorted(samples)
+                rows[name] = {
+                    "runs": len(ordered),
+                    "mean": statistics.fmean(ordered) if ordered else 0.0,
+                    "p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+                    "max": ordered[-1] if ordered else 0.0,
+                    **self._failures[name],
+                }
+        return dict(sorted(rows.items(), key=lambda item: item[1]["mean"], reverse=True))
+
+
+@dataclass
+class SynthesisRun:
+    """Result of one `IncrementalSynthesizer` call: the text plus its event timeline."""
+
+    text: str
+    timeline: dict[str, float] = field(default_factory=dict)  # Event name -> seconds since start
+
+
+class IncrementalSynthesizer:
+    """
+    Fan-in that streams the answer while the branches are still running.
+
+    With `RunnableParallel | synthesis`, nothing is written until the slowest
+    branch is done, and then one call writes the whole answer: max(branch) +
+    full synthesis. Here each branch's output becomes its own section the
+    moment that branch returns, and sections are streamed in arrival order.
+    Only a short `conclusion`, written from the raw outputs, is left for after
+    the last branch, so the answer is complete at max(branch) + one short call
+    (max(branch) without a conclusion) and the first text appears after
+    min(branch). That takes no more calls than the baseline: the branches plus
+    one.
+
+    By default a section is the branch output itself, formatted with
+    `section_template`. Pass `section` to have an LLM write each one up
+    instead; that costs a call per branch, and the last branch's section then
+    runs alongside the conclusion, so the tail becomes the longer of the two.
+
+    With `quorum`, the synthesizer stops waiting once that many branches have
+    returned and `grace` seconds have passed; remaining branches are cancelled
+    and reported as missing.
+
+    Args:
+        branches: Name to Runnable; each receives the synthesizer's input.
+        section: Optional Runnable mapping {"input", "name", "output"} to section text.
+        conclusion: Runnable mapping {"input", **branch outputs} to closing text.
+            Omitted when None. Keep it short: its latency is the whole tail.
+        quorum: Number of branches after which stragglers get only `grace` more seconds.
+        grace: Seconds to wait for stragglers once the quorum is reached.
+        section_template: Format of a section when `section` is None; receives
+            `input`, `name` and `output`.
+        separator: Text placed between streamed sections.
+        missing_template: Format of the markers passed to `conclusion` for failed or cut-off branches.
+    """
+
+    def __init__(
+        self,
+        branches: dict[str, Runnable],
+        section: Optional[Runnable] = None,
+        conclusion: Optional[Runnable] = None,
+        quorum: Optional[int] = None,
+        grace: float = 0.0,
+        section_template: str = "{output}",
+        separator: str = "\n\n",
+        missing_template: str = MISSING_TEMPLATE,
+    ):
+        self.branches = branches
+        self.section = section
+        self.conclusion = conclusion
+        self.quorum = quorum
+        self.grace = grace
+        self.section_template = section_template
+        self.separator = separator
+        self.missing_template = missing_template
+
+    def _start_writer(
+        self, runnable: Runnable, payload: dict, config: Optional[RunnableConfig], state: dict
+    ) -> asyncio.Queue:
+        """Starts streaming `runnable` into a new queue (ended by None) and returns the queue."""
+        chunks: asyncio.Queue = asyncio.Queue()
+        state["writers"].append(asyncio.create_task(self._write(runnable, payload, config, chunks)))
+        return chunks
+
+    def _start_section(self, payload: dict, config: Optional[RunnableConfig], state: dict) -> asyncio.Queue:
+        if self.section is not None:
+            return self._start_writer(self.section, payload, config, state)
+        chunks: asyncio.Queue = asyncio.Queue()
+        chunks.put_nowait(self.section_template.format(**payload))
+        chunks.put_nowait(None)
+        return chunks
+
+    async def _gather_branches(
+        self, value: Any, config: Optional[RunnableConfig], sections: asyncio.Queue, state: dict
+    ) -> None:
+        """Awaits the branches, starting a section for each as it arrives and the conclusion after the last."""
+        start, timeline = state["start"], state["timeline"]
+        outputs: dict[str, Any] = {}
+        branch_tasks = {
+            asyncio.create_task(branch.ainvoke(value, config)): name for name, branch in self.branches.items()
+        }
+        pending = set(branch_tasks)
+        deadline = None
+        try:
+            while pending:
+                timeout = None if deadline is None else max(deadline - time.perf_counter(), 0.0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # The grace period after the quorum is over.
+                for task in done:
+                    name = branch_tasks[task]
+                    timeline[f"branch:{name}"] = time.perf_counter() - start
+                    if task.exception() is not None:
+                        outputs[name] = self.missing_template.format(reason=f"failed ({task.exception()!r})")
+                        continue
+                    outputs[name] = task.result()
+                    payload = {"input": value, "name": name, "output": task.result()}
+                    await sections.put(self._start_section(payload, config, state))
+                if self.quorum is not None and deadline is None and len(outputs) >= self.quorum:
+                    deadline = time.perf_counter() + self.grace
+            timeline["branches_done"] = time.perf_counter() - start
+            for task in pending:
+                task.cancel()
+                outputs[branch_tasks[task]] = self.missing_template.format(
+                    reason="not finished before the quorum deadline"
+                )
+            if self.conclusion is not None:
+                timeline["conclusion_start"] = time.perf_counter() - start
+                payload = {"input": value, **{name: outputs.get(name, "") for name in self.branches}}
+                await sections.put(self._start_writer(self.conclusion, payload, config, state))
+        finally:
+            for task in pending:
+                task.cancel()
+            await sections.put(None)
+
+    async def _write(
+        self, runnable: Runnable, payload: dict, config: Optional[RunnableConfig], chunks: asyncio.Queue
+    ) -> None:
+        try:
+            async for chunk in runnable.astream(payload, config):
+                await chunks.put(chunk)
+        finally:
+            await chunks.put(None)
+
+    async def astream(
+        self, value: Any, config: Optional[RunnableConfig] = None, timeline: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yields each section as it is generated (in branch arrival order), then the conclusion.
+
+        Pass a dict as `timeline` to receive this run's events (seconds since start).
+        """
+        timeline = {} if timeline is None else timeline
+        state = {"start": time.perf_counter(), "writers": [], "timeline": timeline}
+        sections: asyncio.Queue = asyncio.Queue()
+        collector = asyncio.create_task(self._gather_branches(value, config, sections, state))
+        first = True
+        try:
+            # Sections are generated concurrently but streamed one after another so they do not interleave.
+            while (chunks := await sections.get()) is not None:
+                if not first:
+                    yield self.separator
+                first = False
+                while (chunk := await chunks.get()) is not None:
+                    timeline.setdefault("first_output", time.perf_counter() - state["start"])
+                    yield chunk
+            await collector
+            await asyncio.gather(*state["writers"])  # Surfaces section and conclusion errors
+        finally:
+            collector.cancel()
+            for task in state["writers"]:
+                task.cancel()
+            timeline["done"] = time.perf_counter() - state["start"]
+
+    async def arun(self, value: Any, config: Optional[RunnableConfig] = None) -> SynthesisRun:
+        """Runs to completion and returns the text together with this run's timeline."""
+        run = SynthesisRun(text="")
+        run.text = "".join([chunk async for chunk in self.astream(value, config, run.timeline)])
+        return run
+
+    async def _atransform(self, inputs: AsyncIterator[Any], config: RunnableConfig) -> AsyncIterator[str]:
+        # Streamed input is merged the way LangChain merges chunks (strings and AddableDicts add up).
+        value, first = None, True
+        async for chunk in inputs:
+            if first:
+                value, first = chunk, False
+                continue
+            try:
+                value = value + chunk
+            except TypeError:
+                raise ValueError(
+                    f"IncrementalSynthesizer got its input in several {type(chunk).__name__} chunks "
+                    "that cannot be merged; pass it as one value."
+                ) from None
+        async for chunk in self.astream(value, config):
+            yield chunk
+
+    def as_runnable(self) -> Runnable:
+        """Async-only Runnable (`ainvoke`/`astream`) streaming the synthesized text."""
+        return RunnableGenerator(self._atransform, name="IncrementalSynthesizer")
@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+import llm_singleflight
+
+
+class HedgePolicy:
+    """
+    Decides when to send a duplicate ("hedge") request and caps how often it happens.
+
+    The hedge delay is the `percentile` of recently observed latencies, so only
+    the slowest calls get a duplicate. `budget` caps hedges to that fraction of
+    all calls, so hedging cannot double the spend when the provider is slow
+    across the board.
+
+    Args:
+        percentile: Latency percentile (0-100) after which a hedge is sent.
+        budget: Maximum hedged calls as a fraction of all calls.
+        initial_delay: Hedge delay in seconds until `min_samples` latencies were seen.
+        min_samples: Observations needed before the percentile is trusted.
+        window: Number of recent latencies kept.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget: float = 0.1,
+        initial_delay: float = 5.0,
+        min_samples: int = 20,
+        window: int = 500,
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> float:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def start_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def try_hedge(self) -> bool:
+        """Reserves a hedge if the budget allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def observe(self, latency: float, hedge_won: bool = False) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_rate": self.hedges / self.calls if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_s": self.delay(),
+        }
+
+
+def hedged(model: Runnable, alternate: Optional[Runnable] = None, policy: Optional[HedgePolicy] = None) -> Runnable:
+    """
+    Wraps a model (or any runnable) so slow calls are raced against a duplicate.
+
+    If the primary call has not finished after `policy.delay()`, the same input is
+    sent to `alternate` (default: the same model). The first successful response
+    wins and the other call is cancelled. If one of them fails, the other one is
+    still awaited. The duplicate runs under `llm_singleflight.bypass()`, so it
+    is a real second request even when single-flight coalescing is enabled.
+
+    Example:
+        llm = hedged(get_openrouter_model(), alternate=get_openrouter_model("openai/gpt-4o-mini"))
+        chain = prompt | llm | StrOutputParser()
+
+    The blocking `invoke` path runs the two calls on threads; a losing thread
+    cannot be interrupted, so its result is simply discarded.
+    """
+    policy = policy or HedgePolicy()
+    alternate = alternate or model
+
+    async def _ainvoke(value, config):
+        policy.start_call()
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(model.ainvoke(value, config))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=policy.delay())
+            if done or not policy.try_hedge():
+                result = await primary
+                policy.observe(time.perf_counter() - start)
+                return result
+
+            with llm_singleflight.bypass():  # The task copies the context, bypass included.
+                backup = asyncio.ensure_future(alternate.ainvoke(value, config))
+            tasks.add(backup)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        policy.observe(time.perf_counter() - start, hedge_won=task is backup)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # Cancels the losing call, or both calls if the caller itself was cancelled.
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _invoke(value, config):
+        policy.start_call()
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(model.invoke, value, config)
+            done, _ = wait({primary}, timeout=policy.delay())
+            if done or not policy.try_hedge():
+                result = primary.result()
+                policy.observe(time.perf_counter() - start)
+                return result
+
+            with llm_singleflight.bypass():
+                context = contextvars.copy_context()
+            backup = executor.submit(context.run, alternate.invoke, value, config)
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        policy.observe(time.perf_counter() - start, hedge_won=future is backup)
+                        return future.result()
+                    error = error or future.exception()
+            raise error
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    runnable = RunnableLambda(_invoke, afunc=_ainvoke, name=f"Hedged[{model.get_name()}]")
+    runnable.policy = policy
+    return runnable
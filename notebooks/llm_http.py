@@ -0,0 +1,116 @@
+import asyncio
+import importlib.util
+import json
+import threading
+import weakref
+from typing import Any, Optional
+
+import httpx
+
+import llm_replay
+from llm_replay import Cassette
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when orjson is missing.
+    orjson = None
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`).
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0, pool=10.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+# Default for `cassette`: the one described by the environment, so an explicit None can disable replay.
+_FROM_ENV: Any = object()
+
+
+def json_dumps(value: Any) -> bytes:
+    """Serializes to compact UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class AsyncJSONClient:
+    """
+    Pooled async HTTP client for raw JSON APIs (OpenRouter, Google Custom Search, ...).
+
+    Wraps one `httpx.AsyncClient` so that keep-alive connections, TLS sessions
+    and (if `h2` is installed) HTTP/2 multiplexing are shared by every call.
+    Requests advertise gzip, bodies are encoded and decoded with orjson when
+    present, and the record/replay cassette from `llm_replay` is honoured.
+
+    Use `shared_client()` rather than creating instances per call.
+
+    Args:
+        headers: Headers sent with every request.
+        timeout: Seconds or an `httpx.Timeout`; the default separates connect and pool timeouts.
+        limits: Connection pool limits.
+        http2: Use HTTP/2. Defaults to whether `h2` is installed.
+        cassette: Record/replay cassette. Defaults to the one from the environment;
+            None disables record/replay even when LLM_CASSETTE_DIR is set.
+    """
+
+    def __init__(
+        self,
+        headers: Optional[dict] = None,
+        timeout: Any = DEFAULT_TIMEOUT,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        http2: Optional[bool] = None,
+        cassette: Optional[Cassette] = _FROM_ENV,
+    ):
+        http2 = HTTP2_AVAILABLE if http2 is None else http2
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        if cassette is _FROM_ENV:
+            cassette = llm_replay.cassette_from_env()
+        if cassette is not None:
+            transport = llm_replay.AsyncReplayTransport(cassette, transport)
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            headers={"Accept-Encoding": "gzip, deflate", "Accept": "application/json", **(headers or {})},
+        )
+
+    async def post_json(self, url: str, payload: Any, headers: Optional[dict] = None, **kwargs) -> httpx.Response:
+        """POSTs `payload` as JSON."""
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        return await self.client.post(url, content=json_dumps(payload), headers=headers, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.client.get(url, **kwargs)
+
+    @staticmethod
+    def json(response: httpx.Response) -> Any:
+        """Decodes a response body (already un-gzipped by httpx)."""
+        return json_loads(response.content)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncJSONClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+# httpx connections belong to the event loop that opened them, so there is one shared client per loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncJSONClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def shared_client() -> AsyncJSONClient:
+    """The pooled client of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.client.is_closed:
+            client = _clients[loop] = AsyncJSONClient()
+        return client
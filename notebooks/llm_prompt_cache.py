@@ -0,0 +1,114 @@
+import threading
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.prompts import ChatPromptTemplate
+
+from llm_costs import PRICES
+
+# Fraction of the normal input price charged for cache reads, by provider prefix.
+CACHE_READ_DISCOUNTS = {
+    "openai": 0.5,
+    "google": 0.25,
+    "anthropic": 0.1,
+    "deepseek": 0.1,
+}
+
+
+def cacheable_system_message(text: str) -> SystemMessage:
+    """
+    A system message whose text is marked as a cacheable prefix.
+
+    The `cache_control` breakpoint is forwarded by OpenRouter to providers with
+    explicit caching (Anthropic, Gemini). Providers with automatic prefix caching
+    (OpenAI, DeepSeek, Gemini 2.5) ignore it but still benefit because the
+    static text comes first. The text is used verbatim, so braces need no escaping.
+    """
+    return SystemMessage(content=[{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}])
+
+
+def static_prefix_prompt(static_text: str, *variable_messages: tuple) -> ChatPromptTemplate:
+    """
+    Builds a prompt with the static instructions first and all templated parts after.
+
+    Provider caches match on the longest identical prefix, so anything that
+    changes per call (inputs, retrieved context, earlier results) must follow
+    the static text, never be interleaved with it.
+
+    Example:
+        prompt = static_prefix_prompt(MERGER_INSTRUCTIONS, ("user", "Summaries:\\n{summaries}"))
+    """
+    return ChatPromptTemplate.from_messages([cacheable_system_message(static_text), *variable_messages])
+
+
+class PromptCacheCallback(BaseCallbackHandler):
+    """
+    LangChain callback reporting cached prompt tokens and the money they saved.
+
+    Reads `input_token_details.cache_read` from the response usage, which
+    `ChatOpenAI` fills from OpenRouter's `prompt_tokens_details.cached_tokens`.
+    Each call is appended to `calls`; `summary()` aggregates them.
+
+    Args:
+        verbose: Print one line per call.
+    """
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.calls: list[dict] = []
+        self._models: dict[UUID, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        self._models[run_id] = params.get("model") or params.get("model_name")
+
+    @staticmethod
+    def savings(model: Optional[str], cached_tokens: int) -> Optional[float]:
+        """USD saved by `cached_tokens` cache reads, if the model is in the price table."""
+        if not model:
+            return None
+        provider, _, name = model.rpartition("/")
+        price = PRICES.get(name)
+        discount = CACHE_READ_DISCOUNTS.get(provider or "openai")
+        if price is None or discount is None:
+            return None
+        return cached_tokens * price[0] * (1 - discount) / 1_000_000
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        model = self._models.pop(run_id, None)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                input_tokens = usage.get("input_tokens", 0)
+                cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+                call = {
+                    "model": model,
+                    "input_tokens": input_tokens,
+                    "cached_tokens": cached,
+                    "cached_ratio": cached / input_tokens if input_tokens else 0.0,
+                    "saved_usd": self.savings(model, cached),
+                }
+                with self._lock:
+                    self.calls.append(call)
+                if self.verbose:
+                    saved = "n/a" if call["saved_usd"] is None else f"${call['saved_usd']:.6f}"
+                    print(f"[prompt cache] {model}: {cached}/{input_tokens} input tokens cached, saved {saved}")
+
+    def summary(self) -> dict:
+        with self._lock:
+            calls = list(self.calls)
+        input_tokens = sum(c["input_tokens"] for c in calls)
+        cached = sum(c["cached_tokens"] for c in calls)
+        return {
+            "calls": len(calls),
+            "input_tokens": input_tokens,
+            "cached_tokens": cached,
+            "cached_ratio": cached / input_tokens if input_tokens else 0.0,
+            "saved_usd": sum(c["saved_usd"] or 0.0 for c in calls),
+        }
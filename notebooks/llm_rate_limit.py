@@ -0,0 +1,278 @@
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+# OpenRouter allows roughly 20 requests per minute on ":free" model variants.
+FREE_MODEL_RPM = 20
+
+
+@dataclass
+class ModelLimit:
+    """
+    Requests-per-minute and tokens-per-minute budget for one model.
+
+    Args:
+        rpm: Requests per minute. None means unlimited.
+        tpm: Tokens per minute (prompt estimate plus completion allowance). None means unlimited.
+    """
+
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+
+class _Bucket:
+    """
+    Token bucket that hands out reservations instead of refusing.
+
+    Callers always take their share immediately; when the bucket goes negative
+    the deficit tells them how long to wait. This queues callers in arrival
+    order and works identically for threads and coroutines.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class _ModelState:
+    requests: Optional[_Bucket]
+    tokens: Optional[_Bucket]
+    waiting: int = 0
+    calls: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    wait_samples: list = field(default_factory=list)
+
+
+class RateLimiter:
+    """
+    Client-side per-model RPM/TPM limiter shared by every client built in `utils`.
+
+    Instead of letting a fan-out burst hit the provider and fail with 429s, calls
+    are delayed until the model's budget allows them. Both blocking (`acquire`)
+    and asyncio (`aacquire`) callers draw from the same buckets.
+
+    Args:
+        limits: Per-model limits, keyed by model ID.
+        default: Limit for models not listed in `limits`. Models ending in ":free"
+            fall back to `FREE_MODEL_RPM` when no explicit limit applies.
+    """
+
+    def __init__(self, limits: dict = None, default: ModelLimit = None):
+        self.limits = dict(limits or {})
+        self.default = default or ModelLimit()
+        self._lock = threading.Lock()
+        self._states: dict[str, _ModelState] = {}
+
+    def set_limit(self, model: str, rpm: float = None, tpm: float = None) -> None:
+        """Sets (or replaces) the limit for a model; its buckets start full again."""
+        with self._lock:
+            self.limits[model] = ModelLimit(rpm=rpm, tpm=tpm)
+            self._states.pop(model, None)
+
+    def _limit_for(self, model: str) -> ModelLimit:
+        if model in self.limits:
+            return self.limits[model]
+        if self.default.rpm is None and self.default.tpm is None and model.endswith(":free"):
+            return ModelLimit(rpm=FREE_MODEL_RPM)
+        return self.default
+
+    def _reserve(self, model: str, tokens: float) -> tuple[_ModelState, float]:
+        with self._lock:
+            state = self._states.get(model)
+            if state is None:
+                limit = self._limit_for(model)
+                state = _ModelState(
+                    requests=_Bucket(limit.rpm) if limit.rpm else None,
+                    tokens=_Bucket(limit.tpm) if limit.tpm else None,
+                )
+                self._states[model] = state
+            now = time.monotonic()
+            wait = 0.0
+            if state.requests is not None:
+                wait = max(wait, state.requests.reserve(1, now))
+            if state.tokens is not None:
+                wait = max(wait, state.tokens.reserve(tokens, now))
+            state.calls += 1
+            if wait > 0:
+                state.delayed += 1
+                state.total_wait += wait
+                state.max_wait = max(state.max_wait, wait)
+                state.wait_samples = (state.wait_samples + [wait])[-1000:]
+            state.waiting += 1
+            return state, wait
+
+    def _release(self, state: _ModelState) -> None:
+        with self._lock:
+            state.waiting -= 1
+
+    def _cancel(self, state: _ModelState, tokens: float) -> None:
+        """Returns a reservation whose call was never made, so later callers do not wait for it."""
+        with self._lock:
+            if state.requests is not None:
+                state.requests.refund(1)
+            if state.tokens is not None:
+                state.tokens.refund(min(tokens, state.tokens.capacity))
+
+    def acquire(self, model: str, tokens: float = 0) -> float:
+        """Blocks until `model` may be called with roughly `tokens` tokens. Returns the seconds waited."""
+        state, wait = self._reserve(model, tokens)
+        try:
+            if wait:
+                time.sleep(wait)
+        except BaseException:
+            self._cancel(state, tokens)
+            raise
+        finally:
+            self._release(state)
+        return wait
+
+    async def aacquire(self, model: str, tokens: float = 0) -> float:
+        """Async counterpart of `acquire`; yields to the event loop while waiting."""
+        state, wait = self._reserve(model, tokens)
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # E.g. a FanOut deadline passed while queued: nothing was sent.
+            self._cancel(state, tokens)
+            raise
+        finally:
+            self._release(state)
+        return wait
+
+    def settle(self, model: str, estimated: float, actual: float) -> None:
+        """Corrects the token bucket once the real usage of a call is known (0 for a failed call)."""
+        with self._lock:
+            state = self._states.get(model)
+            if state is None or state.tokens is None:
+                return
+            if actual < estimated:
+                state.tokens.refund(estimated - actual)
+            else:
+                state.tokens.level -= actual - estimated
+
+    def metrics(self) -> dict:
+        """Per-model queue depth and wait-time statistics."""
+        with self._lock:
+            result = {}
+            for model, state in self._states.items():
+                samples = sorted(state.wait_samples)
+                result[model] = {
+                    "queue_depth": state.waiting,
+                    "calls": state.calls,
+                    "delayed": state.delayed,
+                    "total_wait_s": state.total_wait,
+                    "mean_wait_s": state.total_wait / state.delayed if state.delayed else 0.0,
+                    "p95_wait_s": samples[int(0.95 * (len(samples) - 1))] if samples else 0.0,
+                    "max_wait_s": state.max_wait,
+                }
+            return result
+
+
+def _estimate(request: httpx.Request) -> tuple[Optional[str], float]:
+    """Extracts the model ID and a rough token estimate (~4 bytes per token) from a request body."""
+    try:
+        body = json.loads(request.content)
+    except (ValueError, UnicodeDecodeError):
+        return None, 0.0
+    if not isinstance(body, dict) or "model" not in body:
+        return None, 0.0
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or 0
+    return body["model"], len(request.content) / 4 + completion
+
+
+def _usage_tokens(response: httpx.Response) -> Optional[float]:
+    if "application/json" not in response.headers.get("content-type", ""):
+        return None
+    try:
+        return response.json().get("usage", {}).get("total_tokens")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _spent_tokens(response: httpx.Response, estimated: float) -> float:
+    """
+    Tokens a call actually used: the reported usage, none for an error response,
+    and the estimate when a successful response does not say (e.g. streams).
+    """
+    if not response.is_success:
+        return 0.0
+    actual = _usage_tokens(response)
+    return estimated if actual is None else actual
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that waits for the shared `RateLimiter` before each model call."""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        model, tokens = _estimate(request)
+        if model is None:
+            return self.transport.handle_request(request)
+        self.limiter.acquire(model, tokens)
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            self.limiter.settle(model, tokens, 0)
+            raise
+        if "application/json" in response.headers.get("content-type", ""):
+            response.read()
+        self.limiter.settle(model, tokens, _spent_tokens(response, tokens))
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of `RateLimitedTransport`."""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        model, tokens = _estimate(request)
+        if model is None:
+            return await self.transport.handle_async_request(request)
+        await self.limiter.aacquire(model, tokens)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            self.limiter.settle(model, tokens, 0)
+            raise
+        if "application/json" in response.headers.get("content-type", ""):
+            await response.aread()
+        self.limiter.settle(model, tokens, _spent_tokens(response, tokens))
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# Process-wide limiter used by `utils.registry`.
+rate_limiter = RateLimiter()
@@ -0,0 +1,265 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+# Headers that describe the wire encoding of the recorded body rather than its content.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request has no recording."""
+
+
+class LatencyModel:
+    """
+    Synthetic latency applied to replayed responses.
+
+    The delay is `recorded * scale + base + per_kb * size_kb`, multiplied by a
+    log-normal jitter factor. With the defaults a replay takes as long as the
+    original call did; `scale=0` replays instantly.
+
+    Args:
+        scale: Multiplier for the latency observed when the call was recorded.
+        base: Fixed seconds added to every response.
+        per_kb: Seconds added per KiB of response body, a proxy for token generation.
+        jitter: Sigma of the log-normal jitter. 0 disables jitter.
+        seed: Seed for the jitter, for reproducible timings.
+    """
+
+    def __init__(self, scale: float = 1.0, base: float = 0.0, per_kb: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.scale = scale
+        self.base = base
+        self.per_kb = per_kb
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, recorded: float, size: int) -> float:
+        delay = recorded * self.scale + self.base + self.per_kb * size / 1024
+        if self.jitter:
+            with self._lock:
+                delay *= self._random.lognormvariate(0.0, self.jitter)
+        return max(delay, 0.0)
+
+
+class Cassette:
+    """
+    Directory of recorded HTTP exchanges, one JSON file per request hash.
+
+    The hash covers the method, the URL (minus secret query parameters such as
+    `key`) and the body, with JSON bodies canonicalised so key order does not
+    matter. Authorization headers are never part of the key nor stored.
+
+    Args:
+        path: Directory holding the recordings.
+        mode: "replay" serves recordings only and raises `CassetteMiss` otherwise,
+            "record" always calls the network and overwrites recordings, "auto"
+            replays hits and records misses.
+        latency: Latency model for replayed responses. Defaults to replaying the
+            recorded latency.
+        ignore_params: Query parameters left out of the hash.
+        record_errors: Also record non-2xx responses. Off by default so a 429 or
+            5xx seen while recording is retried on the next run instead of being
+            replayed forever.
+    """
+
+    MODES = ("replay", "record", "auto")
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "auto",
+        latency: Optional[LatencyModel] = None,
+        ignore_params: tuple = ("key",),
+        record_errors: bool = False,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}; expected one of {self.MODES}.")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.latency = latency or LatencyModel()
+        self.ignore_params = set(ignore_params)
+        self.record_errors = record_errors
+
+    def key(self, method: str, url: str, body: bytes) -> str:
+        parts = urlsplit(str(url))
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k not in self.ignore_params))
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+        except (ValueError, UnicodeDecodeError):
+            pass
+        return hashlib.sha256(b"\x00".join([method.upper().encode(), url.encode(), body or b""])).hexdigest()
+
+    def load(self, key: str) -> Optional[dict]:
+        if self.mode == "record":
+            return None
+        file = self.path / f"{key}.json"
+        if not file.exists():
+            if self.mode == "replay":
+                raise CassetteMiss(f"No recording for request {key} in {self.path}.")
+            return None
+        entry = json.loads(file.read_text())
+        entry["body"] = base64.b64decode(entry["body"])
+        return entry
+
+    def save(self, key: str, method: str, url: str, status: int, headers: dict, body: bytes, elapsed: float) -> None:
+        """Writes the exchange, unless it is an error response and `record_errors` is off."""
+        if not (200 <= status < 300 or self.record_errors):
+            return
+        entry = {
+            "method": method,
+            "url": str(url),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+            "body": base64.b64encode(body).decode(),
+            "elapsed": elapsed,
+        }
+        tmp = self.path / f"{key}.json.tmp"
+        tmp.write_text(json.dumps(entry, indent=2))
+        tmp.replace(self.path / f"{key}.json")
+
+    def delay(self, entry: dict) -> float:
+        return self.latency.delay(entry["elapsed"], len(entry["body"]))
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """
+    Builds a cassette from LLM_CASSETTE_DIR and LLM_CASSETTE_MODE, or returns None.
+
+    LLM_REPLAY_LATENCY_SCALE optionally scales the replayed latency.
+    """
+    path = os.getenv("LLM_CASSETTE_DIR")
+    if not path:
+        return None
+    latency = LatencyModel(scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0")))
+    return Cassette(path, mode=os.getenv("LLM_CASSETTE_MODE", "auto"), latency=latency)
+
+
+def api_key(name: str) -> Optional[str]:
+    """
+    Returns the environment variable `name`, or a placeholder when replaying.
+
+    Recordings never contain credentials, so a notebook replaying from the
+    cassette described by the environment can run without the real key.
+    """
+    key = os.getenv(name)
+    if key:
+        return key
+    cassette = cassette_from_env()
+    if cassette is not None and cassette.mode == "replay":
+        return "replay"
+    return None
+
+
+def _replayed_response(entry: dict, request: httpx.Request) -> httpx.Response:
+    headers = {k: v for k, v in entry["headers"].items() if k.lower() not in _HOP_HEADERS}
+    return httpx.Response(entry["status"], headers=headers, content=entry["body"], request=request)
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """httpx transport that serves requests from a cassette, recording through `transport` on a miss."""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.BaseTransport] = None):
+        self.cassette = cassette
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        key = self.cassette.key(request.method, request.url, body)
+        entry = self.cassette.load(key)
+        if entry is not None:
+            time.sleep(self.cassette.delay(entry))
+            return _replayed_response(entry, request)
+
+        start = time.perf_counter()
+        response = self.transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - start
+        self.cassette.save(key, request.method, request.url, response.status_code, response.headers, content, elapsed)
+        return _replayed_response({"status": response.status_code, "headers": response.headers, "body": content}, request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of `ReplayTransport`."""
+
+    def __init__(self, cassette: Cassette, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = self.cassette.key(request.method, request.url, body)
+        entry = self.cassette.load(key)
+        if entry is not None:
+            await asyncio.sleep(self.cassette.delay(entry))
+            return _replayed_response(entry, request)
+
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - start
+        self.cassette.save(key, request.method, request.url, response.status_code, response.headers, content, elapsed)
+        return _replayed_response({"status": response.status_code, "headers": response.headers, "body": content}, request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def http_client(cassette: Optional[Cassette] = None, **kwargs) -> httpx.Client:
+    """
+    Returns an httpx client that records/replays through `cassette` (default: from the environment).
+
+    Pass it to SDK clients, e.g. `OpenAI(http_client=llm_replay.http_client())`.
+    Without a cassette this is a plain `httpx.Client`.
+    """
+    cassette = cassette or cassette_from_env()
+    if cassette is None:
+        return httpx.Client(**kwargs)
+    limits = kwargs.pop("limits", httpx.Limits())
+    return httpx.Client(transport=ReplayTransport(cassette, httpx.HTTPTransport(limits=limits)), **kwargs)
+
+
+def http_async_client(cassette: Optional[Cassette] = None, **kwargs) -> httpx.AsyncClient:
+    """Async counterpart of `http_client`."""
+    cassette = cassette or cassette_from_env()
+    if cassette is None:
+        return httpx.AsyncClient(**kwargs)
+    limits = kwargs.pop("limits", httpx.Limits())
+    return httpx.AsyncClient(transport=AsyncReplayTransport(cassette, httpx.AsyncHTTPTransport(limits=limits)), **kwargs)
+
+
+def install_litellm(cassette: Optional[Cassette] = None) -> None:
+    """
+    Routes litellm (and therefore CrewAI agents) through the cassette.
+
+    litellm reuses `litellm.client_session`/`litellm.aclient_session` for its
+    OpenAI-compatible providers, including `openrouter/...` models.
+    """
+    cassette = cassette or cassette_from_env()
+    if cassette is None:
+        return
+    import litellm
+
+    litellm.client_session = http_client(cassette)
+    litellm.aclient_session = http_async_client(cassette)
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+# Headers that describe the wire encoding of the shared body rather than its content.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+_bypass: ContextVar[bool] = ContextVar("single_flight_bypass", default=False)
+
+
+@contextmanager
+def bypass():
+    """
+    Sends every request made in this context upstream on its own.
+
+    Tasks created inside the block inherit it. `llm_hedging.hedged` uses it
+    for the duplicate request, which would otherwise be coalesced into the
+    slow call it is meant to race.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def request_key(request: httpx.Request) -> Optional[tuple[str, str]]:
+    """
+    Returns (model, key) for a request that may be coalesced, or None.
+
+    Only non-streaming JSON model calls with temperature 0 qualify: sampled
+    calls are expected to return independent answers, and sharing one would
+    silently change their behaviour. Requests made under `bypass()` never
+    qualify. The key covers the URL, the Authorization header and the
+    canonicalised body, so requests that differ in nothing but JSON key order
+    share a key while different API keys never do.
+    """
+    if request.method != "POST" or _bypass.get():
+        return None
+    try:
+        body = json.loads(request.content)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(body, dict) or "model" not in body or body.get("stream"):
+        return None
+    if body.get("temperature") != 0:  # The API default is 1, so a missing temperature samples too.
+        return None
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    auth = request.headers.get("authorization", "").encode()
+    return body["model"], hashlib.sha256(b"\x00".join([str(request.url).encode(), auth, canonical])).hexdigest()
+
+
+@dataclass
+class _Flight:
+    waiters: int = 1
+    done: threading.Event = field(default_factory=threading.Event)
+    task: Optional[asyncio.Task] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class _ModelStats:
+    requests: int = 0
+    upstream_calls: int = 0
+    coalesced: int = 0
+    max_waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Collapses identical in-flight calls into one upstream call.
+
+    The first caller for a key (the leader) makes the call; callers arriving
+    with the same key before it finishes wait for it and all receive its
+    result, or its exception. Nothing is kept once the call is done, so this is
+    not a cache: a request made after the first one returned goes upstream again.
+
+    Async callers share an `asyncio.Task` per event loop. A waiter that is
+    cancelled (e.g. by a `FanOut` deadline) only leaves the flight; the upstream
+    call is cancelled once no waiter is left. Blocking and asyncio callers do not
+    coalesce with each other.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[Any, _Flight] = {}
+        self._stats: dict[str, _ModelStats] = {}
+
+    def _join(self, key: Any, model: str) -> tuple[_Flight, bool]:
+        """Returns the flight for `key` and whether the caller leads it. Must hold the lock."""
+        flight = self._flights.get(key)
+        # A finished task is only waiting for its done callback to forget it; never join it.
+        leader = flight is None or (flight.task is not None and flight.task.done())
+        if leader:
+            flight = self._flights[key] = _Flight()
+        else:
+            flight.waiters += 1
+        stats = self._stats.setdefault(model, _ModelStats())
+        stats.requests += 1
+        if leader:
+            stats.upstream_calls += 1
+        else:
+            stats.coalesced += 1
+        stats.max_waiters = max(stats.max_waiters, flight.waiters)
+        return flight, leader
+
+    def _forget(self, key: Any, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def call(self, key: str, model: str, fn: Callable[[], Any]) -> Any:
+        """Returns `fn()`, sharing one execution among concurrent callers with the same key."""
+        with self._lock:
+            flight, leader = self._join(key, model)
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                self._forget(key, flight)
+                flight.done.set()
+            return flight.result
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    async def acall(self, key: str, model: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of `call`; `fn` is a coroutine function."""
+        loop = asyncio.get_running_loop()
+        loop_key = (loop, key)
+        with self._lock:
+            flight, leader = self._join(loop_key, model)
+            if leader:
+                flight.task = loop.create_task(fn())
+                flight.task.add_done_callback(lambda _: self._forget(loop_key, flight))
+        try:
+            # shield: cancelling one waiter must not cancel the call the others wait for.
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0
+                if abandoned and self._flights.get(loop_key) is flight:
+                    # Forgotten before it is cancelled, so a caller arriving now starts a new call
+                    # instead of joining one that is about to raise CancelledError.
+                    del self._flights[loop_key]
+            if abandoned:
+                flight.task.cancel()
+            raise
+
+    def metrics(self) -> dict:
+        """Per-model request, upstream call and coalesced counts."""
+        with self._lock:
+            return {
+                model: {
+                    "requests": stats.requests,
+                    "upstream_calls": stats.upstream_calls,
+                    "coalesced": stats.coalesced,
+                    "coalesce_ratio": stats.coalesced / stats.requests if stats.requests else 0.0,
+                    "max_waiters": stats.max_waiters,
+                }
+                for model, stats in self._stats.items()
+            }
+
+
+def _shared_response(result: tuple, request: httpx.Request) -> httpx.Response:
+    status, headers, content = result
+    headers = {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS}
+    return httpx.Response(status, headers=headers, content=content, request=request)
+
+
+class SingleFlightTransport(httpx.BaseTransport):
+    """httpx transport that coalesces identical concurrent model calls through a `SingleFlight`."""
+
+    def __init__(self, group: SingleFlight, transport: httpx.BaseTransport):
+        self.group = group
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        coalescable = request_key(request)
+        if coalescable is None:
+            return self.transport.handle_request(request)
+        model, key = coalescable
+
+        def fetch() -> tuple:
+            response = self.transport.handle_request(request)
+            try:
+                content = response.read()
+            finally:
+                response.close()
+            return response.status_code, response.headers, content
+
+        return _shared_response(self.group.call(key, model, fetch), request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncSingleFlightTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of `SingleFlightTransport`."""
+
+    def __init__(self, group: SingleFlight, transport: httpx.AsyncBaseTransport):
+        self.group = group
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        coalescable = request_key(request)
+        if coalescable is None:
+            return await self.transport.handle_async_request(request)
+        model, key = coalescable
+
+        async def fetch() -> tuple:
+            response = await self.transport.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+            return response.status_code, response.headers, content
+
+        return _shared_response(await self.group.acall(key, model, fetch), request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# Process-wide group used by `utils.registry`.
+single_flight = SingleFlight()
@@ -0,0 +1,259 @@
+"""
+Local OpenAI-compatible stub server for load and latency testing.
+
+Implements `/v1/chat/completions` (plain and SSE streaming, including tool calls)
+and `/v1/models` with configurable latency, token rate, error injection and 429
+rate limiting. Needs `aiohttp` (in the dev dependency group). Point the
+notebooks at it with:
+
+    python llm_stub_server.py --port 8089 --latency lognormal --mean 0.4
+    export LLM_STUB_URL=http://127.0.0.1:8089/v1
+
+`get_openrouter_model` then talks to the stub instead of OpenRouter.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from aiohttp import web
+
+_FILLER = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+@dataclass
+class StubConfig:
+    """
+    Behaviour of the stub server.
+
+    Args:
+        latency: Distribution of the time to first token: "fixed", "uniform",
+            "exponential" or "lognormal".
+        mean: Mean time to first token in seconds.
+        spread: Distribution width; the upper bound offset for "uniform" and the
+            log-space sigma for "lognormal". Ignored otherwise.
+        tokens_per_second: Generation speed after the first token. 0 means instant.
+        completion_tokens: Number of tokens in each generated answer.
+        error_rate: Fraction of requests answered with HTTP 500.
+        rate_limit: Sustained requests per second before answering 429. 0 disables it.
+        burst: Requests allowed above the sustained rate.
+        seed: Seed for latency sampling and error injection.
+    """
+
+    latency: str = "fixed"
+    mean: float = 0.2
+    spread: float = 0.5
+    tokens_per_second: float = 200.0
+    completion_tokens: int = 50
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+    burst: int = 10
+    seed: int = None
+
+
+class StubServer:
+    """aiohttp application implementing the stub endpoints for a `StubConfig`."""
+
+    def __init__(self, config: StubConfig = None):
+        self.config = config or StubConfig()
+        self._random = random.Random(self.config.seed)
+        self._tokens = float(self.config.burst)
+        self._refilled = time.monotonic()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "streamed": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/v1/models", self.models)
+        return app
+
+    def _sample_latency(self) -> float:
+        config = self.config
+        if config.latency == "uniform":
+            return self._random.uniform(config.mean - config.spread / 2, config.mean + config.spread / 2)
+        if config.latency == "exponential":
+            return self._random.expovariate(1 / config.mean) if config.mean > 0 else 0.0
+        if config.latency == "lognormal":
+            # Pick mu so that the distribution mean equals `config.mean`.
+            mu = -config.spread**2 / 2
+            return config.mean * self._random.lognormvariate(mu, config.spread)
+        return config.mean
+
+    def _admit(self) -> bool:
+        """Token bucket deciding whether a request is served or rate limited."""
+        if not self.config.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.config.burst, self._tokens + (now - self._refilled) * self.config.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _completion_words(self, messages: list) -> list[str]:
+        last = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "") or ""
+        if not isinstance(last, str):
+            last = " ".join(part.get("text", "") for part in last if isinstance(part, dict))
+        words = f"Stub answer to: {' '.join(last.split()[:12])}".split()
+        while len(words) < self.config.completion_tokens:
+            words.append(_FILLER[len(words) % len(_FILLER)])
+        return words[: max(self.config.completion_tokens, 1)]
+
+    @staticmethod
+    def _tool_call(body: dict) -> dict:
+        """Builds a call to the first offered tool, unless the model was just given a tool result."""
+        tools = body.get("tools") or []
+        messages = body.get("messages") or []
+        if not tools or body.get("tool_choice") == "none" or (messages and messages[-1].get("role") == "tool"):
+            return None
+        function = tools[0].get("function", {})
+        properties = function.get("parameters", {}).get("properties", {})
+        placeholders = {"integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+        arguments = {name: placeholders.get(spec.get("type"), "stub") for name, spec in properties.items()}
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": function.get("name", "tool"), "arguments": json.dumps(arguments)},
+        }
+
+    @staticmethod
+    def _usage(body: dict, completion_tokens: int) -> dict:
+        prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in body.get("messages") or [])
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "stub/model", "object": "model"}]})
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        if not self._admit():
+            self.stats["rate_limited"] += 1
+            retry_after = max(1, round(1 / self.config.rate_limit))
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded (stub).", "type": "rate_limit_error", "code": 429}},
+                status=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": {"message": "Injected failure (stub).", "type": "server_error"}}, status=500)
+
+        body = await request.json()
+        model = body.get("model", "stub/model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        tool_call = self._tool_call(body)
+        words = [] if tool_call else self._completion_words(body.get("messages") or [])
+        token_delay = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0.0
+
+        await asyncio.sleep(max(self._sample_latency(), 0.0))
+
+        if not body.get("stream"):
+            await asyncio.sleep(token_delay * max(len(words) - 1, 0))
+            message = {"role": "assistant", "content": None if tool_call else " ".join(words)}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return web.json_response(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+                    "usage": self._usage(body, len(words) or 1),
+                }
+            )
+
+        self.stats["streamed"] += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(choices: list, **extra) -> None:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+            await response.write(f"data: {json.dumps({**chunk, 'choices': choices, **extra})}\n\n".encode())
+
+        def choice(delta: dict, finish_reason: str = None) -> list:
+            return [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+
+        if tool_call:
+            await send(choice({"role": "assistant", "tool_calls": [{"index": 0, **tool_call}]}))
+        else:
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(token_delay)
+                await send(choice({"role": "assistant", "content": word} if i == 0 else {"content": f" {word}"}))
+        await send(choice({}, "tool_calls" if tool_call else "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await send([], usage=self._usage(body, len(words) or 1))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+@asynccontextmanager
+async def run_stub_server(config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Runs the stub server in the current event loop and yields its `/v1` base URL.
+
+    Example (LLM_STUB_URL also stands in for OPENROUTER_API_KEY):
+        async with run_stub_server(StubConfig(mean=0.5)) as base_url:
+            os.environ["LLM_STUB_URL"] = base_url
+            llm = get_openrouter_model()
+    """
+    server = StubServer(config)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}/v1"
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--mean", type=float, default=0.2, help="Mean time to first token in seconds.")
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s.")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        mean=args.mean,
+        spread=args.spread,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        seed=args.seed,
+    )
+    print(f"Stub server listening on http://{args.host}:{args.port}/v1")
+    web.run_app(StubServer(config).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import threading
+import weakref
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ships with litellm, but keep the monitor usable without it.
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        # The vocabulary is downloaded on first use; offline hosts fall back to estimation.
+        return None
+
+
+def encoding_name_for(model: Optional[str]) -> str:
+    """Picks the BPE vocabulary closest to `model`; newer OpenAI-style models use o200k."""
+    model = (model or "").lower().split("/")[-1]
+    if model.startswith(("gpt-3.5", "gpt-4-", "text-embedding")) or model == "gpt-4":
+        return "cl100k_base"
+    return "o200k_base"
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Counts tokens in `text` with a real BPE tokenizer, loaded once per vocabulary.
+
+    Non-OpenAI models (Gemini, Mistral, ...) use their own tokenizers; o200k is a
+    close stand-in for capacity planning. Falls back to ~4 characters per token
+    when tiktoken or its vocabulary files are unavailable.
+    """
+    if not text:
+        return 0
+    encoding = _encoding(encoding_name_for(model))
+    if encoding is None:
+        return max(1, round(len(text) / 4))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class _Shard:
+    __slots__ = ("counts", "lock", "thread")
+
+    def __init__(self):
+        self.counts = defaultdict(lambda: [0, 0, 0])
+        self.lock = threading.Lock()  # Taken by the owning thread and by readers, never by other writers.
+        self.thread = weakref.ref(threading.current_thread())
+
+    def finished(self) -> bool:
+        thread = self.thread()
+        return thread is None or not thread.is_alive()
+
+
+class _ShardedCounters:
+    """
+    Counters that writers on different threads never contend on: every thread
+    updates its own shard.
+
+    A shard's lock is only shared between its thread and `totals`/`reset`, so
+    it is uncontended on the write path while reads and resets still see whole
+    updates. Shards of finished threads are folded into a single retired total
+    whenever a shard is registered or the totals are read, so short-lived
+    threads do not accumulate.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._retired = defaultdict(lambda: [0, 0, 0])
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._lock:
+                self._collect_finished()
+                self._shards.append(shard)
+        return shard
+
+    def _collect_finished(self) -> None:
+        # Caller holds self._lock.
+        live = []
+        for shard in self._shards:
+            if not shard.finished():
+                live.append(shard)
+                continue
+            with shard.lock:
+                _merge(self._retired, shard.counts)
+        self._shards = live
+
+    def add(self, key: tuple, input_tokens: int, output_tokens: int) -> None:
+        shard = self._shard()
+        with shard.lock:
+            totals = shard.counts[key]
+            totals[0] += input_tokens
+            totals[1] += output_tokens
+            totals[2] += 1
+
+    def totals(self) -> dict:
+        merged = defaultdict(lambda: [0, 0, 0])
+        with self._lock:
+            self._collect_finished()
+            _merge(merged, self._retired)
+            for shard in self._shards:
+                with shard.lock:
+                    _merge(merged, shard.counts)
+        return merged
+
+    def reset(self) -> None:
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards:
+                with shard.lock:
+                    shard.counts.clear()
+
+
+def _merge(target: dict, counts: dict) -> None:
+    for key, values in counts.items():
+        totals = target[key]
+        for i, value in enumerate(values):
+            totals[i] += value
+
+
+class TokenMonitor:
+    """
+    Aggregates token usage per model, agent and pipeline.
+
+    Provider-reported usage is preferred; when a response carries none, prompt
+    and completion are counted with `count_tokens`. Attach it to LangChain with
+    `monitor.callback(...)` and to ADK agents with `monitor.adk_callbacks(...)`.
+    """
+
+    def __init__(self):
+        self._counters = _ShardedCounters()
+
+    def record(self, model: str, input_tokens: int, output_tokens: int, agent: str = None, pipeline: str = None) -> None:
+        self._counters.add((model or "unknown", agent or "-", pipeline or "-"), input_tokens, output_tokens)
+
+    def record_interaction(self, prompt: str, response: str, model: str = None, agent: str = None, pipeline: str = None) -> tuple[int, int]:
+        """Counts and records one prompt/response pair. Returns (input_tokens, output_tokens)."""
+        input_tokens = count_tokens(prompt, model)
+        output_tokens = count_tokens(response, model)
+        self.record(model, input_tokens, output_tokens, agent=agent, pipeline=pipeline)
+        return input_tokens, output_tokens
+
+    def report(self, by: tuple = ("model", "agent", "pipeline")) -> dict:
+        """
+        Totals grouped by any subset of ("model", "agent", "pipeline").
+
+        Returns a mapping of group key tuple to
+        {"calls", "input_tokens", "output_tokens", "total_tokens"}.
+        """
+        fields = ("model", "agent", "pipeline")
+        grouped = defaultdict(lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+        for key, (input_tokens, output_tokens, calls) in self._counters.totals().items():
+            group = grouped[tuple(key[fields.index(name)] for name in by)]
+            group["calls"] += calls
+            group["input_tokens"] += input_tokens
+            group["output_tokens"] += output_tokens
+            group["total_tokens"] += input_tokens + output_tokens
+        return dict(grouped)
+
+    def get_total_tokens(self) -> tuple[int, int]:
+        totals = self.report(by=())
+        group = totals.get((), {"input_tokens": 0, "output_tokens": 0})
+        return group["input_tokens"], group["output_tokens"]
+
+    def reset(self) -> None:
+        self._counters.reset()
+
+    def callback(self, agent: str = None, pipeline: str = None) -> "TokenMonitorCallback":
+        """A LangChain callback handler feeding this monitor."""
+        return TokenMonitorCallback(self, agent=agent, pipeline=pipeline)
+
+    def adk_callbacks(self, pipeline: str = None) -> dict:
+        """
+        `before_model_callback`/`after_model_callback` for an ADK `LlmAgent`.
+
+        Usage comes from `llm_response.usage_metadata`; without it the request
+        contents and response text are counted locally.
+        """
+        prompts = {}
+
+        def _text(content) -> str:
+            parts = getattr(content, "parts", None) or []
+            return "".join(getattr(part, "text", None) or "" for part in parts)
+
+        def before_model_callback(callback_context, llm_request):
+            key = (callback_context.invocation_id, callback_context.agent_name)
+            prompts[key] = (llm_request.model, "\n".join(_text(c) for c in llm_request.contents or []))
+            return None
+
+        def after_model_callback(callback_context, llm_response):
+            if getattr(llm_response, "partial", False):
+                return None
+            key = (callback_context.invocation_id, callback_context.agent_name)
+            model, prompt = prompts.pop(key, (None, ""))
+            usage = getattr(llm_response, "usage_metadata", None)
+            if usage is not None and usage.prompt_token_count is not None:
+                self.record(
+                    model,
+                    usage.prompt_token_count or 0,
+                    usage.candidates_token_count or 0,
+                    agent=callback_context.agent_name,
+                    pipeline=pipeline,
+                )
+            else:
+                self.record_interaction(
+                    prompt, _text(llm_response.content), model=model, agent=callback_context.agent_name, pipeline=pipeline
+                )
+            return None
+
+        return {"before_model_callback": before_model_callback, "after_model_callback": after_model_callback}
+
+
+class TokenMonitorCallback(BaseCallbackHandler):
+    """
+    LangChain callback that records every LLM call into a `TokenMonitor`.
+
+    The agent and pipeline labels can also be set per call through
+    `config={"metadata": {"agent": ..., "pipeline": ...}}`.
+    """
+
+    def __init__(self, monitor: TokenMonitor, agent: str = None, pipeline: str = None):
+        self.monitor = monitor
+        self.agent = agent
+        self.pipeline = pipeline
+        self._runs: dict[UUID, dict] = {}
+
+    def _start(self, run_id: UUID, prompt: str, metadata: Optional[dict], kwargs: dict) -> None:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        self._runs[run_id] = {
+            "model": params.get("model") or params.get("model_name") or metadata.get("ls_model_name"),
+            "prompt": prompt,
+            "agent": metadata.get("agent", self.agent),
+            "pipeline": metadata.get("pipeline", self.pipeline),
+        }
+
+    def on_llm_start(self, serialized: dict, prompts: list[str], *, run_id: UUID, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        self._start(run_id, "\n".join(prompts), metadata, kwargs)
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        prompt = "\n".join(str(m.content) for batch in messages for m in batch)
+        self._start(run_id, prompt, metadata, kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens")
+        output_tokens = usage.get("completion_tokens")
+        if input_tokens is None:
+            # Streaming responses and newer integrations report usage on the message instead.
+            for generations in response.generations:
+                for generation in generations:
+                    message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if message_usage:
+                        input_tokens = (input_tokens or 0) + message_usage.get("input_tokens", 0)
+                        output_tokens = (output_tokens or 0) + message_usage.get("output_tokens", 0)
+        if input_tokens is None:
+            text = "".join(g.text for generations in response.generations for g in generations)
+            self.monitor.record_interaction(run["prompt"], text, model=run["model"], agent=run["agent"], pipeline=run["pipeline"])
+            return
+        self.monitor.record(run["model"], input_tokens, output_tokens or 0, agent=run["agent"], pipeline=run["pipeline"])
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
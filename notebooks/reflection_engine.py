@@ -0,0 +1,212 @@
+import ast
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from llm_tokens import count_tokens
+
+PERFECT_MARKER = "CODE_IS_PERFECT"
+
+GENERATOR_INSTRUCTIONS = (
+    "You are an expert Python developer. Respond with only the complete code in a single ```python block."
+)
+
+REVIEWER_INSTRUCTIONS = f"""You are a senior software engineer and an expert in Python.
+Your role is to perform a meticulous code review.
+Critically evaluate the provided Python code based on the original task requirements.
+Look for bugs, style issues, missing edge cases, and areas for improvement.
+If the code is perfect and meets all requirements, respond with the single phrase '{PERFECT_MARKER}'.
+Otherwise, provide a bulleted list of your critiques, one line per point, most important first."""
+
+
+def extract_code(text: str) -> str:
+    """Returns the first fenced code block of a model reply, or the whole reply if it has none."""
+    match = re.search(r"```(?:python|py)?[ \t]*\n(.*?)```", text, re.DOTALL)
+    return (match.group(1) if match else text).strip()
+
+
+def normalize_code(code: str) -> str:
+    """
+    Canonical form used to compare versions.
+
+    Valid Python is compared by AST, so formatting, comments and quote style do
+    not count as changes; anything else by its non-blank, right-stripped lines.
+    """
+    try:
+        return ast.dump(ast.parse(code))
+    except SyntaxError:
+        return "\n".join(line.rstrip() for line in code.splitlines() if line.strip())
+
+
+def diff_versions(old: str, new: str) -> tuple[int, float]:
+    """Returns (changed lines, change ratio in [0, 1]) between two code versions."""
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+    changed = sum(
+        1
+        for line in difflib.unified_diff(old_lines, new_lines, lineterm="", n=0)
+        if line[:1] in "+-" and not line.startswith(("+++", "---"))
+    )
+    return changed, 1.0 - difflib.SequenceMatcher(None, old_lines, new_lines).ratio()
+
+
+def _critique_points(critique: str) -> list[str]:
+    """The first line of each bullet in a critique, or its first line if it has no bullets."""
+    points = [
+        re.sub(r"^\s*(?:[-*•]|\d+[.)])\s+", "", line).strip()
+        for line in critique.splitlines()
+        if re.match(r"^\s*(?:[-*•]|\d+[.)])\s+", line)
+    ]
+    if not points:
+        points = critique.strip().splitlines()[:1]
+    return [point for point in points if point]
+
+
+@dataclass
+class IterationReport:
+    iteration: int
+    input_tokens: int  # Generation plus critique prompts of this iteration.
+    output_tokens: int
+    changed_lines: int = 0
+    change_ratio: float = 1.0
+    critique: Optional[str] = None  # None when the iteration stopped before the review.
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+@dataclass
+class ReflectionResult:
+    code: str
+    stop_reason: str  # "approved", "no-op revision", "converged" or "max iterations"
+    iterations: list[IterationReport] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(report.total_tokens for report in self.iterations)
+
+
+class ReflectionEngine:
+    """
+    Generate/critique/refine loop whose prompts do not grow with the iteration count.
+
+    The original loop resends the whole conversation (every version and every
+    critique) on each refinement, so prompt tokens grow linearly per iteration
+    and quadratically over a run. Here each refinement prompt carries only the
+    task, the latest code, the latest critique and a rolling summary of earlier
+    review points, capped at `summary_tokens`.
+
+    The loop stops when the reviewer approves (reply contains `perfect_marker`),
+    when a revision does not change the code (compared by AST, so reformatting
+    is a no-op) or changes less than `min_change` of its lines, or after
+    `max_iterations`. A no-op revision skips its review call entirely.
+
+    Args:
+        llm: Chat model used for generation and review.
+        max_iterations: Upper bound on generate/refine rounds.
+        min_change: Change ratio (0-1, by lines) below which a revision counts as converged.
+        summary_tokens: Token budget of the rolling summary of earlier critiques.
+        perfect_marker: Reviewer reply that approves the code.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        max_iterations: int = 3,
+        min_change: float = 0.02,
+        summary_tokens: int = 200,
+        perfect_marker: str = PERFECT_MARKER,
+    ):
+        self.llm = llm
+        self.max_iterations = max_iterations
+        self.min_change = min_change
+        self.summary_tokens = summary_tokens
+        self.perfect_marker = perfect_marker
+        self.model_name = getattr(llm, "model_name", None)
+
+    def _invoke(self, messages: list[BaseMessage]) -> tuple[str, int, int]:
+        """Returns (reply, input tokens, output tokens), preferring provider-reported usage."""
+        response = self.llm.invoke(messages)
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            return response.content, usage["input_tokens"], usage["output_tokens"]
+        prompt = "\n".join(str(message.content) for message in messages)
+        return response.content, count_tokens(prompt, self.model_name), count_tokens(response.content, self.model_name)
+
+    def _summarize(self, summary: list[str], critique: str) -> list[str]:
+        """Adds the critique's points to the rolling summary, dropping the oldest beyond the budget."""
+        summary = summary + [point for point in _critique_points(critique) if point not in summary]
+        while len(summary) > 1 and count_tokens("\n".join(summary), self.model_name) > self.summary_tokens:
+            summary.pop(0)
+        return summary
+
+    def _generate_prompt(self, task: str) -> list[BaseMessage]:
+        return [SystemMessage(content=GENERATOR_INSTRUCTIONS), HumanMessage(content=task)]
+
+    def _refine_prompt(self, task: str, code: str, critique: str, summary: list[str]) -> list[BaseMessage]:
+        earlier = "\n".join(f"- {point}" for point in summary) or "(none)"
+        return [
+            SystemMessage(content=GENERATOR_INSTRUCTIONS),
+            HumanMessage(
+                content=f"Task:\n{task}\n\nCurrent code:\n```python\n{code}\n```\n\n"
+                f"Earlier review points (keep them addressed):\n{earlier}\n\n"
+                f"Latest critique:\n{critique}\n\n"
+                "Refine the code using the latest critique. Change only what the critique requires."
+            ),
+        ]
+
+    def _review_prompt(self, task: str, code: str) -> list[BaseMessage]:
+        return [
+            SystemMessage(content=REVIEWER_INSTRUCTIONS),
+            HumanMessage(content=f"Original Task:\n{task}\n\nCode to Review:\n```python\n{code}\n```"),
+        ]
+
+    def run(self, task: str, verbose: bool = False) -> ReflectionResult:
+        """Runs the loop for `task` and returns the final code with per-iteration token reports."""
+        result = ReflectionResult(code="", stop_reason="max iterations")
+        critique, summary = "", []
+        for i in range(1, self.max_iterations + 1):
+            if i == 1:
+                reply, input_tokens, output_tokens = self._invoke(self._generate_prompt(task))
+            else:
+                prompt = self._refine_prompt(task, result.code, critique, summary)
+                summary = self._summarize(summary, critique)
+                reply, input_tokens, output_tokens = self._invoke(prompt)
+            code = extract_code(reply)
+            report = IterationReport(i, input_tokens, output_tokens)
+            result.iterations.append(report)
+
+            if i > 1:
+                report.changed_lines, report.change_ratio = diff_versions(result.code, code)
+                if normalize_code(code) == normalize_code(result.code):
+                    result.stop_reason = "no-op revision"
+                    break
+                if report.change_ratio < self.min_change:
+                    result.code = code
+                    result.stop_reason = "converged"
+                    break
+            result.code = code
+            if verbose:
+                print(f"\n--- Code (v{i}, {report.changed_lines} lines changed) ---\n{code}")
+
+            if i == self.max_iterations:
+                break  # A review of the last version could not be acted on.
+            critique, input_tokens, output_tokens = self._invoke(self._review_prompt(task, code))
+            report.critique = critique
+            report.input_tokens += input_tokens
+            report.output_tokens += output_tokens
+            if verbose:
+                print(f"\n--- Critique (v{i}) ---\n{critique}")
+            if self.perfect_marker in critique:
+                result.stop_reason = "approved"
+                break
+        return result
+
+    def as_runnable(self) -> Runnable:
+        """Runnable mapping a task string to a `ReflectionResult`."""
+        return RunnableLambda(self.run, name="ReflectionEngine")
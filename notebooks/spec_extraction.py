@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel, Field, ValidationError
+
+# The two prompts of the original extract-then-transform chain (01_prompt_chaining_python).
+prompt_extract = ChatPromptTemplate.from_template(
+    "Extract the technical specifications from the following text:\n\n{text_input}"
+)
+prompt_transform = ChatPromptTemplate.from_template(
+    "Transform the following specifications into a JSON object with 'cpu', 'memory', and 'storage' as keys:\n\n{specifications}"
+)
+
+# Single-call prompt: extraction and shaping in one round trip, the schema is enforced by the API.
+prompt_structured = ChatPromptTemplate.from_template(
+    "Extract the technical specifications (cpu, memory, storage) from the following text. "
+    "Use an empty string for anything the text does not mention.\n\n{text_input}"
+)
+
+
+class Specs(BaseModel):
+    """Technical specifications extracted from a product description."""
+
+    cpu: str = Field(description="Processor, e.g. '3.5 GHz octa-core'.")
+    memory: str = Field(description="RAM, e.g. '16GB'.")
+    storage: str = Field(description="Storage, e.g. '1TB NVMe SSD'.")
+
+
+def build_two_step_chain(llm: BaseChatModel) -> Runnable:
+    """The original chain: extract specifications, then transform them to JSON text."""
+    extraction_chain = prompt_extract | llm | StrOutputParser()
+    return {"specifications": extraction_chain} | prompt_transform | llm | StrOutputParser()
+
+
+def parse_specs(text: str) -> Specs:
+    """Validates JSON text (optionally wrapped in a ```json fence) into `Specs`."""
+    match = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    return Specs.model_validate_json(match.group(1) if match else text)
+
+
+@dataclass
+class ExtractionResult:
+    specs: Specs
+    mode: str  # "single", "fallback" or "empty" when neither path produced valid specs
+    latency: float
+    saved: Optional[float]  # Seconds saved versus the two-step chain, once a baseline is known.
+    error: Optional[str] = None  # Why the two-step output was rejected, for mode "empty".
+
+
+class SpecExtractor:
+    """
+    Extracts `Specs` in one LLM call, falling back to the two-step chain.
+
+    The single call asks for JSON-schema constrained output (`method="json_schema"`)
+    and validates it into `Specs`. Only if that call raises (e.g. the provider
+    rejects `json_schema`) or its output does not validate is the original
+    extract-then-transform chain run. If the two-step output does not validate
+    either, the result holds empty specs with mode "empty" and the validation
+    error. The latency of two-step runs is tracked as a moving average so every
+    single-call result reports the time it saved.
+
+    Args:
+        llm: A chat model supporting structured output, e.g. from `get_openrouter_model`.
+        smoothing: EWMA weight of new two-step latency samples.
+    """
+
+    def __init__(self, llm: BaseChatModel, smoothing: float = 0.2):
+        self.structured_chain = prompt_structured | llm.with_structured_output(
+            Specs, method="json_schema", include_raw=True
+        )
+        self.two_step_chain = build_two_step_chain(llm)
+        self.smoothing = smoothing
+        self.two_step_latency: Optional[float] = None
+        self.fallbacks = 0
+        self.structured_errors = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _observe_two_step(self, latency: float) -> None:
+        with self._lock:
+            if self.two_step_latency is None:
+                self.two_step_latency = latency
+            else:
+                self.two_step_latency += self.smoothing * (latency - self.two_step_latency)
+
+    def _saved(self, latency: float) -> Optional[float]:
+        return None if self.two_step_latency is None else self.two_step_latency - latency
+
+    def _single_result(self, output: dict) -> Optional[Specs]:
+        parsed = output.get("parsed")
+        if isinstance(parsed, Specs):
+            return parsed
+        if parsed is not None:
+            try:
+                return Specs.model_validate(parsed)
+            except ValidationError:
+                return None
+        return None
+
+    def _structured_failed(self) -> None:
+        with self._lock:
+            self.structured_errors += 1
+
+    def _two_step_result(self, text: str, start: float, two_step_start: float) -> ExtractionResult:
+        self._observe_two_step(time.perf_counter() - two_step_start)
+        try:
+            specs = parse_specs(text)
+        except ValidationError as error:
+            empty = Specs(cpu="", memory="", storage="")
+            return ExtractionResult(empty, "empty", time.perf_counter() - start, None, str(error))
+        return ExtractionResult(specs, "fallback", time.perf_counter() - start, None)
+
+    def invoke(self, text: str) -> ExtractionResult:
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            specs = self._single_result(self.structured_chain.invoke({"text_input": text}))
+        except Exception:
+            self._structured_failed()
+            specs = None
+        if specs is not None:
+            latency = time.perf_counter() - start
+            return ExtractionResult(specs, "single", latency, self._saved(latency))
+        self.fallbacks += 1
+        two_step_start = time.perf_counter()
+        output = self.two_step_chain.invoke({"text_input": text})
+        return self._two_step_result(output, start, two_step_start)
+
+    async def ainvoke(self, text: str) -> ExtractionResult:
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            specs = self._single_result(await self.structured_chain.ainvoke({"text_input": text}))
+        except Exception:
+            self._structured_failed()
+            specs = None
+        if specs is not None:
+            latency = time.perf_counter() - start
+            return ExtractionResult(specs, "single", latency, self._saved(latency))
+        self.fallbacks += 1
+        two_step_start = time.perf_counter()
+        output = await self.two_step_chain.ainvoke({"text_input": text})
+        return self._two_step_result(output, start, two_step_start)
+
+    def calibrate(self, text: str) -> float:
+        """Runs the two-step chain once to establish the latency baseline. Returns its latency."""
+        start = time.perf_counter()
+        self.two_step_chain.invoke({"text_input": text})
+        latency = time.perf_counter() - start
+        self._observe_two_step(latency)
+        return latency
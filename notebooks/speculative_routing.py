@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+Handler = Union[Runnable, Callable[[Any], Any]]
+
+
+async def _acall(handler: Handler, value: Any) -> Any:
+    if isinstance(handler, Runnable):
+        return await handler.ainvoke(value)
+    if asyncio.iscoroutinefunction(handler):
+        return await handler(value)
+    # Plain functions run in a thread; a cancelled speculation cannot interrupt them.
+    return await asyncio.to_thread(handler, value)
+
+
+def _call(handler: Handler, value: Any) -> Any:
+    if isinstance(handler, Runnable):
+        return handler.invoke(value)
+    if asyncio.iscoroutinefunction(handler):
+        return asyncio.run(handler(value))
+    return handler(value)
+
+
+def _discard(task: asyncio.Task) -> None:
+    """Cancels an unwanted speculative task and retrieves its outcome so asyncio never logs it as unhandled."""
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    task.cancel()
+
+
+class SpeculativeRouter:
+    """
+    Starts the most likely handler while the router is still deciding.
+
+    Without speculation a routed request costs router latency plus handler
+    latency. Here the handler predicted by `prior` runs concurrently with
+    `router`; if the decision matches, its result is used and the router's
+    latency is hidden. On a mismatch the speculative run is cancelled and the
+    chosen handler runs as usual, so the only cost is wasted work.
+
+    Only routes in `speculate_on` are started early. Leave out handlers with
+    side effects (bookings, payments) that must not run for a request that
+    turns out to belong elsewhere.
+
+    Args:
+        router: Runnable or function mapping the input to a route name.
+        handlers: Route name to Runnable or (async) function receiving the same input.
+        prior: Per-request guess of the route, e.g. a cheap classifier. Defaults to
+            the most frequent decision so far.
+        default: Route used for decisions that are not in `handlers`.
+        speculate_on: Routes safe to start speculatively. Defaults to all handlers.
+        executor: Pool running the speculative handlers of `run`. Defaults to a pool
+            owned by the router, created on first use and shut down by `close`.
+    """
+
+    def __init__(
+        self,
+        router: Handler,
+        handlers: dict[str, Handler],
+        prior: Optional[Callable[[Any], Optional[str]]] = None,
+        default: Optional[str] = None,
+        speculate_on: Optional[set[str]] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.router = router
+        self.handlers = handlers
+        self.prior = prior
+        self.default = default if default is not None else next(iter(handlers))
+        self.speculate_on = set(handlers) if speculate_on is None else set(speculate_on)
+        self.history: Counter = Counter()
+        self.decisions = 0
+        self.speculations = 0
+        self.hits = 0
+        self.wasted_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def guess(self, value: Any) -> Optional[str]:
+        """The route to start speculatively, or None to wait for the router."""
+        if self.prior is not None:
+            route = self.prior(value)
+        else:
+            with self._lock:
+                most_common = self.history.most_common(1)
+            route = most_common[0][0] if most_common else None
+        return route if route in self.speculate_on else None
+
+    def _resolve(self, decision: Any) -> str:
+        decision = decision.strip() if isinstance(decision, str) else decision
+        return decision if decision in self.handlers else self.default
+
+    def _record(self, decision: str, guess: Optional[str], hit: bool, wasted: float, saved: float) -> None:
+        with self._lock:
+            self.history[decision] += 1
+            self.decisions += 1
+            self.speculations += guess is not None
+            self.hits += hit
+            self.wasted_seconds += wasted
+            self.saved_seconds += saved
+
+    async def arun(self, value: Any, decide: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Routes and handles `value` with speculation.
+
+        `decide` overrides the router for this call; it can be any async step that
+        ends in a route name, e.g. consuming agent events up to a transfer.
+        """
+        guess = self.guess(value)
+        start = time.perf_counter()
+        speculative_done: list[float] = []
+
+        async def speculate():
+            try:
+                return await _acall(self.handlers[guess], value)
+            finally:
+                speculative_done.append(time.perf_counter())
+
+        task = asyncio.create_task(speculate()) if guess is not None else None
+        try:
+            decision = self._resolve(await _acall(decide or self.router, value))
+        except BaseException:
+            if task is not None:
+                _discard(task)
+            raise
+        decided = time.perf_counter()
+
+        if task is not None and decision == guess:
+            result = await task
+            # The handler ran alongside the router: up to the router's latency is saved.
+            handler_time = speculative_done[0] - start
+            self._record(decision, guess, True, 0.0, min(decided - start, handler_time))
+            return result
+
+        wasted = 0.0
+        if task is not None:
+            _discard(task)
+            wasted = (speculative_done[0] if speculative_done else decided) - start
+        self._record(decision, guess, False, wasted, 0.0)
+        return await _acall(self.handlers[decision], value)
+
+    def run(self, value: Any) -> Any:
+        """Synchronous `arun`. Threads cannot be interrupted, so a wrong speculation runs to completion unused."""
+        guess = self.guess(value)
+        start = time.perf_counter()
+        future = None
+        if guess is not None:
+            handler = self.handlers[guess]
+            future = self._pool().submit(lambda: (_call(handler, value), time.perf_counter()))
+        try:
+            decision = self._resolve(_call(self.router, value))
+        except BaseException:
+            if future is not None:
+                future.cancel()
+            raise
+        decided = time.perf_counter()
+
+        if future is not None and decision == guess:
+            result, finished = future.result()
+            self._record(decision, guess, True, 0.0, min(decided - start, finished - start))
+            return result
+
+        wasted = 0.0
+        if future is not None and not future.cancel():
+            wasted = decided - start  # Already running; at least this much was spent for nothing.
+        self._record(decision, guess, False, wasted, 0.0)
+        return _call(self.handlers[decision], value)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative")
+            return self._executor
+
+    def close(self) -> None:
+        """Shuts down the router's own pool without waiting for speculations still running."""
+        if not self._owns_executor:
+            return
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def as_runnable(self) -> Runnable:
+        """Speculative replacement for a router | RunnableBranch pair."""
+        return RunnableLambda(self.run, afunc=self.arun, name="SpeculativeRouter")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            misses = self.speculations - self.hits
+            return {
+                "decisions": self.decisions,
+                "speculations": self.speculations,
+                "hits": self.hits,
+                "misses": misses,
+                "hit_rate": self.hits / self.speculations if self.speculations else 0.0,
+                "wasted_seconds": self.wasted_seconds,
+                "saved_seconds": self.saved_seconds,
+                "route_counts": dict(self.history),
+            }
@@ -1,28 +1,424 @@
+from __future__ import annotations
+
+import hashlib
 import os
-from langchain_openai import ChatOpenAI
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Literal, Optional, Union
+
 from dotenv import load_dotenv
 
-def get_openrouter_model(model_name: str = "google/gemini-2.5-flash-lite", temperature: float = 0.0):
+from lazy_imports import lazy_import
+
+# Heavy dependencies are imported on first use to keep notebook cold starts fast.
+asyncio = lazy_import("asyncio")
+httpx = lazy_import("httpx")
+langchain_openai = lazy_import("langchain_openai")
+llm_rate_limit = lazy_import("llm_rate_limit")
+llm_replay = lazy_import("llm_replay")
+llm_singleflight = lazy_import("llm_singleflight")
+
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_core.runnables import Runnable
+    from langchain_openai import ChatOpenAI
+    from llm_rate_limit import RateLimiter
+    from llm_replay import Cassette
+    from llm_singleflight import SingleFlight
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+DEFAULT_HEADERS = {
+    "HTTP-Referer": "https://github.com/robertford/agentic-design-patterns",  # Optional, for including your app on openrouter.ai rankings.
+    "X-Title": "Agentic Design Patterns", # Optional. Shows in rankings on openrouter.ai.
+}
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+    """Loads the .env file once per process."""
+    load_dotenv()
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of ChatOpenAI instances.
+
+    Models are memoized on (model_name, temperature, api key digest, base_url, headers, cache)
+    and all of them share one pooled sync and one pooled async HTTP client, so repeated calls
+    to `get_openrouter_model` reuse open connections instead of paying for a new
+    client and TLS handshake each time.
+
+    Args:
+        max_connections: Upper bound on open connections per HTTP client.
+        max_keepalive_connections: Idle connections kept in the pool for reuse.
+        keepalive_expiry: Seconds an idle connection is kept before being closed.
+        timeout: Default request timeout in seconds.
+        cassette: Record/replay cassette for all model traffic. Defaults to the
+            one described by LLM_CASSETTE_DIR/LLM_CASSETTE_MODE, if any, read once
+            and again after `close()`/`aclose()`.
+        limiter: Per-model RPM/TPM limiter shared by every model. Defaults to
+            `llm_rate_limit.rate_limiter`; pass None to disable client-side limiting.
+        single_flight: Group that collapses identical concurrent temperature-0 model
+            calls into one upstream call. Defaults to `llm_singleflight.single_flight`;
+            pass None to send every call upstream.
+    """
+
+    # Marker for "use the process-wide `llm_rate_limit.rate_limiter`", resolved on first use.
+    SHARED_LIMITER = "shared"
+    # Marker for "use the process-wide `llm_singleflight.single_flight`", resolved on first use.
+    SHARED_SINGLE_FLIGHT = "shared"
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        cassette: Optional[Cassette] = None,
+        limiter: Union[RateLimiter, Literal["shared"], None] = SHARED_LIMITER,
+        single_flight: Union[SingleFlight, Literal["shared"], None] = SHARED_SINGLE_FLIGHT,
+    ):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._http_client = None
+        self._http_async_client = None
+        self._env_cassette = None
+        self._env_cassette_loaded = False
+        self.cassette = cassette
+        self.limiter = limiter
+        self.single_flight = single_flight
+        self.configure(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            timeout=timeout,
+        )
+
+    def configure(
+        self,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        timeout: float = None,
+        cassette: Optional[Cassette] = None,
+    ) -> None:
+        """
+        Updates the pool settings. Takes effect the next time the HTTP clients are
+        created, i.e. before first use or after `close()`/`aclose()`.
+        """
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            self.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            self.keepalive_expiry = keepalive_expiry
+        if timeout is not None:
+            self.timeout = timeout
+        if cassette is not None:
+            self.cassette = cassette
+
+    def active_cassette(self) -> Optional[Cassette]:
+        """The configured cassette, falling back to the one described by the environment."""
+        if self.cassette is not None:
+            return self.cassette
+        if not self._env_cassette_loaded:
+            # Building a cassette creates its directory; do it once, not on every model lookup.
+            self._env_cassette = llm_replay.cassette_from_env()
+            self._env_cassette_loaded = True
+        return self._env_cassette
+
+    def active_limiter(self) -> Optional[RateLimiter]:
+        """The configured rate limiter, if client-side limiting is enabled."""
+        if self.limiter == self.SHARED_LIMITER:
+            return llm_rate_limit.rate_limiter
+        return self.limiter
+
+    def active_single_flight(self) -> Optional[SingleFlight]:
+        """The configured single-flight group, if request coalescing is enabled."""
+        if self.single_flight == self.SHARED_SINGLE_FLIGHT:
+            return llm_singleflight.single_flight
+        return self.single_flight
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """The shared synchronous HTTP client, created on first access."""
+        with self._lock:
+            if self._http_client is None or self._http_client.is_closed:
+                transport = httpx.HTTPTransport(limits=self._limits())
+                # Inside the cassette, so only calls that really go to the network are limited.
+                limiter = self.active_limiter()
+                if limiter is not None:
+                    transport = llm_rate_limit.RateLimitedTransport(limiter, transport)
+                cassette = self.active_cassette()
+                if cassette is not None:
+                    transport = llm_replay.ReplayTransport(cassette, transport)
+                # Outermost, so coalesced calls neither take rate-limit budget nor hit the cassette.
+                single_flight = self.active_single_flight()
+                if single_flight is not None:
+                    transport = llm_singleflight.SingleFlightTransport(single_flight, transport)
+                self._http_client = httpx.Client(transport=transport, timeout=self.timeout)
+            return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        """The shared asynchronous HTTP client, created on first access."""
+        with self._lock:
+            if self._http_async_client is None or self._http_async_client.is_closed:
+                transport = httpx.AsyncHTTPTransport(limits=self._limits())
+                limiter = self.active_limiter()
+                if limiter is not None:
+                    transport = llm_rate_limit.AsyncRateLimitedTransport(limiter, transport)
+                cassette = self.active_cassette()
+                if cassette is not None:
+                    transport = llm_replay.AsyncReplayTransport(cassette, transport)
+                single_flight = self.active_single_flight()
+                if single_flight is not None:
+                    transport = llm_singleflight.AsyncSingleFlightTransport(single_flight, transport)
+                self._http_async_client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+            return self._http_async_client
+
+    def get(
+        self,
+        model_name: str,
+        temperature: float,
+        api_key: str,
+        base_url: str = OPENROUTER_BASE_URL,
+        headers: dict = None,
+        cache: BaseCache = None,
+    ) -> ChatOpenAI:
+        """Returns the shared ChatOpenAI instance for this configuration, creating it if needed."""
+        headers = DEFAULT_HEADERS if headers is None else headers
+        # A rotated or per-user key must get its own instance; only a digest is kept in the key.
+        key_digest = hashlib.sha256(api_key.encode()).hexdigest()
+        key = (model_name, temperature, key_digest, base_url, tuple(sorted(headers.items())), cache)
+
+        with self._lock:
+            model = self._models.get(key)
+        if model is not None:
+            return model
+
+        model = langchain_openai.ChatOpenAI(
+            model=model_name,
+            openai_api_key=api_key,
+            openai_api_base=base_url,
+            temperature=temperature,
+            default_headers=dict(headers),
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            cache=cache,
+            stream_usage=True,
+        )
+        with self._lock:
+            # Another thread may have won the race; keep the first instance.
+            return self._models.setdefault(key, model)
+
+    def _detach(self) -> tuple[Optional[httpx.Client], Optional[httpx.AsyncClient]]:
+        """Forgets the clients, cached models and environment cassette; returns the clients to close."""
+        with self._lock:
+            self._models.clear()
+            self._env_cassette_loaded = False
+            clients = (self._http_client, self._http_async_client)
+            self._http_client = self._http_async_client = None
+        return clients
+
+    def close(self) -> None:
+        """
+        Closes both HTTP clients and forgets all cached models.
+
+        In async code prefer `aclose`. Here the async client is closed in a task
+        on the running event loop or, when none is running, on a temporary one.
+        """
+        client, async_client = self._detach()
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            _close_async_client(async_client)
+
+    async def aclose(self) -> None:
+        """Closes both HTTP clients and forgets all cached models."""
+        client, async_client = self._detach()
+        if async_client is not None:
+            await async_client.aclose()
+        if client is not None:
+            client.close()
+
+
+# Keeps the closing tasks started by `ModelRegistry.close` alive until they finish.
+_closing: set = set()
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None:
+        task = loop.create_task(client.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+        return
+    try:
+        asyncio.run(client.aclose())
+    except RuntimeError:
+        pass  # Its connections belong to an event loop that is already closed; they go with the client.
+
+
+registry = ModelRegistry()
+
+
+def get_openrouter_model(
+    model_name: str = "google/gemini-2.5-flash-lite",
+    temperature: float = 0.0,
+    base_url: str = OPENROUTER_BASE_URL,
+    headers: dict = None,
+    cache: BaseCache = None,
+):
     """
     Returns a LangChain ChatOpenAI instance configured for OpenRouter.
-    
+
+    Instances are shared through the process-wide `registry`, so calling this
+    repeatedly with the same arguments is cheap and reuses pooled connections.
+
+    Set LLM_CASSETTE_DIR (and optionally LLM_CASSETTE_MODE=replay) to record and
+    replay all traffic, see `llm_replay`. Set LLM_STUB_URL to send all traffic to
+    a local `llm_stub_server` instead of OpenRouter. Neither needs an API key.
+
     Args:
-        model_name: The OpenRouter model ID. Defaults to "google/gemini-2.0-flash-exp:free".
+        model_name: The OpenRouter model ID. Defaults to "google/gemini-2.5-flash-lite".
         temperature: The temperature for generation. Defaults to 0.0.
+        base_url: The OpenAI-compatible API base URL. Defaults to OpenRouter.
+        headers: Extra request headers. Defaults to the OpenRouter ranking headers.
+        cache: Optional response cache (e.g. `llm_cache.SQLiteResponseCache`) for
+            deterministic calls. Defaults to no caching.
     """
-    load_dotenv()
+    _load_env()
     api_key = os.getenv("OPENROUTER_API_KEY")
-    
+
+    stub_url = os.getenv("LLM_STUB_URL")
+    if stub_url:
+        base_url = stub_url
+        api_key = api_key or "stub"
+
+    if not api_key:
+        cassette = registry.active_cassette()
+        if cassette is not None and cassette.mode == "replay":
+            api_key = "replay"
+
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY not found in environment variables.")
 
-    return ChatOpenAI(
-        model=model_name,
-        openai_api_key=api_key,
-        openai_api_base="https://openrouter.ai/api/v1",
-        temperature=temperature,
-        default_headers={
-            "HTTP-Referer": "https://github.com/robertford/agentic-design-patterns",  # Optional, for including your app on openrouter.ai rankings.
-            "X-Title": "Agentic Design Patterns", # Optional. Shows in rankings on openrouter.ai.
-        },
-    )
+    return registry.get(model_name, temperature, api_key, base_url=base_url, headers=headers, cache=cache)
+
+
+@dataclass
+class StreamStats:
+    """
+    Timing of one streamed call, filled in by `astream_with_stats`.
+
+    `tokens` counts streamed chunks, which for chat models is roughly one token
+    each; the provider's own count is used instead when the stream carries usage.
+    """
+
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    tokens: int = 0
+    inter_token: list = field(default_factory=list)
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Time to first token in seconds."""
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def total(self) -> Optional[float]:
+        return None if self.finished_at is None else self.finished_at - self.started
+
+    @property
+    def mean_inter_token(self) -> Optional[float]:
+        return sum(self.inter_token) / len(self.inter_token) if self.inter_token else None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generation speed after the first token."""
+        if self.first_token_at is None or self.finished_at is None or self.tokens < 2:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return (self.tokens - 1) / elapsed if elapsed > 0 else None
+
+    def summary(self) -> str:
+        def fmt(value, unit):
+            return "n/a" if value is None else f"{value:.3f}{unit}"
+
+        return (
+            f"TTFT {fmt(self.ttft, 's')}, total {fmt(self.total, 's')}, {self.tokens} tokens, "
+            f"ITL {fmt(self.mean_inter_token, 's')}, {fmt(self.tokens_per_second, ' tok/s')}"
+        )
+
+
+async def astream_with_stats(
+    runnable: Runnable, value: Any, stats: Optional[StreamStats] = None, config: Optional[dict] = None
+) -> AsyncIterator[Any]:
+    """
+    Streams `runnable` via `astream`, recording TTFT and inter-token latency into `stats`.
+
+    Chunks are yielded as they arrive, so a caller can hand them to the next stage
+    right away. Chains ending in streaming-aware parsers (`StrOutputParser`,
+    `JsonOutputParser`) already pass partial output through, so
+    `prompt | llm | StrOutputParser()` yields text deltas here.
+
+    Args:
+        runnable: Any LangChain runnable, typically a chain ending in the model or a parser.
+        value: The chain input.
+        stats: Object to fill in; pass one in to read the numbers after the loop.
+        config: Optional `RunnableConfig`.
+    """
+    stats = stats if stats is not None else StreamStats()
+    stats.started = time.perf_counter()
+    last = None
+    usage_tokens = None
+    async for chunk in runnable.astream(value, config):
+        now = time.perf_counter()
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            usage_tokens = usage.get("output_tokens")
+        content = getattr(chunk, "content", chunk)
+        if not content:
+            continue
+        if stats.first_token_at is None:
+            stats.first_token_at = now
+        else:
+            stats.inter_token.append(now - last)
+        last = now
+        stats.tokens += 1
+        yield chunk
+    stats.finished_at = time.perf_counter()
+    if usage_tokens:
+        stats.tokens = usage_tokens
+
+
+async def stream_to_stdout(runnable: Runnable, value: Any, config: Optional[dict] = None) -> tuple[str, StreamStats]:
+    """
+    Prints a streamed text response as it arrives and returns the full text with its stats.
+    """
+    stats = StreamStats()
+    parts = []
+    async for chunk in astream_with_stats(runnable, value, stats, config):
+        text = getattr(chunk, "content", chunk)
+        text = text if isinstance(text, str) else str(text)
+        parts.append(text)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    print()
+    return "".join(parts), stats
@@ -0,0 +1,99 @@
+"""
+HTTP client benchmark: requests per second for raw chat-completion calls.
+
+Compares the pattern the raw-API notebooks used to have (a bare `requests.post`
+per call with `json.dumps`, i.e. a new connection every time) with the pooled
+`llm_http.AsyncJSONClient`, sequentially and with concurrency. Requests go to
+the local stub server from `llm_stub_server.py`, so no API key or network is
+needed and server latency is controlled.
+
+Usage:
+    python scripts/benchmark_http.py [--requests 200] [--concurrency 16] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks"))
+
+from llm_http import HTTP2_AVAILABLE, AsyncJSONClient, orjson  # noqa: E402
+from llm_stub_server import StubConfig, run_stub_server  # noqa: E402
+
+PAYLOAD = {
+    "model": "stub/model",
+    "messages": [{"role": "user", "content": "What is the meaning of life?"}],
+    "max_tokens": 16,
+}
+
+
+def start_server(latency: float) -> str:
+    """Runs the stub server on a background event loop and returns its base URL."""
+    ready = threading.Event()
+    state = {}
+
+    async def serve():
+        config = StubConfig(latency="fixed", mean=latency, tokens_per_second=1e6, completion_tokens=16)
+        async with run_stub_server(config) as base_url:
+            state["url"] = base_url
+            ready.set()
+            await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    ready.wait()
+    return state["url"]
+
+
+def bare_requests(url: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        response = requests.post(url, data=json.dumps(PAYLOAD), headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        response.json()
+    return n / (time.perf_counter() - start)
+
+
+async def pooled(url: str, n: int, concurrency: int) -> float:
+    async with AsyncJSONClient(cassette=None) as http:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                response = await http.post_json(url, PAYLOAD)
+                response.raise_for_status()
+                http.json(response)
+
+        await call()  # Warm the pool so the handshake is not part of the measurement.
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(n)))
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare raw HTTP client throughput against the stub server.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub server latency in seconds.")
+    args = parser.parse_args()
+
+    url = start_server(args.latency) + "/chat/completions"
+    print(f"HTTP/2: {'yes' if HTTP2_AVAILABLE else 'no (install h2)'}, orjson: {'yes' if orjson else 'no'}")
+    print(f"{args.requests} requests, server latency {args.latency * 1000:.0f} ms\n")
+
+    before = bare_requests(url, args.requests)
+    sequential = asyncio.run(pooled(url, args.requests, 1))
+    concurrent = asyncio.run(pooled(url, args.requests, args.concurrency))
+
+    print(f"{'requests.post per call':<32}{before:8.1f} req/s")
+    print(f"{'pooled client, sequential':<32}{sequential:8.1f} req/s  ({sequential / before:.1f}x)")
+    print(f"{f'pooled client, concurrency {args.concurrency}':<32}{concurrent:8.1f} req/s  ({concurrent / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
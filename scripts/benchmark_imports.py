@@ -0,0 +1,166 @@
+"""
+Startup benchmark: reports the import and first-use cost of every notebook.
+
+For each notebook the import statements that run when its cells execute
+(module level and cell level, not those deferred inside functions) are
+collected with `ast`, together with the `name = lazy_import("...")` bindings
+of those cells, and run in a fresh interpreter under `-X importtime`.
+
+Lazy imports (`lazy_imports.lazy_import`) move cost from the import to the
+first attribute access, so timing the imports alone overstates what they
+save. The same interpreter therefore also runs a first-use phase: every lazily
+bound module (the notebook's own bindings and those of the helper modules it
+imports) is resolved and, if the notebook imports `get_openrouter_model`,
+its default model is constructed (with a dummy API key; no request is sent).
+The report shows both phases and their sum, plus the most expensive top-level
+packages of each phase, like a condensed `python -X importtime`.
+
+Usage:
+    python scripts/benchmark_imports.py [--top 5] [notebooks/05_tool_calling.py ...]
+"""
+
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+NOTEBOOKS_DIR = "notebooks"
+
+# Separates the import phase from the first-use phase on stderr.
+PHASE_MARKER = "--- first use ---"
+
+FIRST_USE = f"""
+import sys, time
+start = time.perf_counter()
+sys.stderr.write({PHASE_MARKER!r} + "\\n")
+try:
+    from lazy_imports import LazyModule
+    # sys.modules includes __main__, i.e. the notebook's own lazy_import bindings.
+    lazy = {{id(value): value for module in list(sys.modules.values()) for value in list(vars(module).values())
+            if isinstance(value, LazyModule)}}
+    for value in lazy.values():
+        try:
+            value._load()
+        except Exception:
+            print("first use: " + value.__name__)
+except ImportError:
+    pass
+if "get_openrouter_model" in globals():
+    try:
+        get_openrouter_model()
+    except Exception as e:
+        print("first use: get_openrouter_model() raised " + repr(e))
+print("FIRST_USE_SECONDS", time.perf_counter() - start)
+"""
+
+
+def _is_lazy_binding(node):
+    """True for `name = lazy_import("...")`."""
+    return (
+        isinstance(node, ast.Assign)
+        and isinstance(node.value, ast.Call)
+        and isinstance(node.value.func, ast.Name)
+        and node.value.func.id == "lazy_import"
+    )
+
+
+def eager_imports(path):
+    """Returns the import statements and `lazy_import` bindings executed when the notebook's cells run."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    statements = []
+
+    def visit(node, depth):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.Import, ast.ImportFrom)) or _is_lazy_binding(child):
+                statements.append(ast.unparse(child))
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                # Marimo cells are functions decorated with @app.cell; anything deeper is deferred.
+                if depth == 0 and any(ast.unparse(d).startswith("app.cell") for d in child.decorator_list):
+                    visit(child, depth + 1)
+            elif isinstance(child, (ast.If, ast.Try, ast.With)):
+                visit(child, depth)
+
+    visit(tree, 0)
+    return statements
+
+
+def measure(statements, cwd):
+    """
+    Runs the statements, then the first-use phase, in a fresh interpreter under -X importtime.
+
+    Returns (import_us, first_use_us, per_package_us by phase, failures). The
+    import phase is the sum of import times; the first-use phase is wall time,
+    so it also covers work other than imports, such as building the model.
+    """
+    # Each import is guarded so one missing optional dependency does not hide the rest.
+    code = "\n".join(
+        f"try:\n    {statement}\nexcept Exception:\n    print({statement!r})" for statement in statements
+    )
+    env = {**os.environ, "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "benchmark")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + "\n" + FIRST_USE],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    per_package = {"import": defaultdict(int), "first use": defaultdict(int)}
+    phase, total = "import", 0
+    for line in result.stderr.splitlines():
+        if line == PHASE_MARKER:
+            phase = "first use"
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.split(":", 1)[1].split("|")
+        if phase == "import":
+            total += int(self_us)
+        per_package[phase][name.strip().split(".")[0]] += int(self_us)
+    first_use, failed = 0, []
+    for line in result.stdout.splitlines():
+        if line.startswith("FIRST_USE_SECONDS"):
+            first_use = int(float(line.split()[1]) * 1e6)
+        else:
+            failed.append(line)
+    return total, first_use, per_package, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-notebook import cost.")
+    parser.add_argument("notebooks", nargs="*", help="Notebook files (default: all in notebooks/).")
+    parser.add_argument("--top", type=int, default=5, help="Packages to list per notebook.")
+    args = parser.parse_args()
+
+    paths = args.notebooks or sorted(glob.glob(os.path.join(NOTEBOOKS_DIR, "[0-9]*.py")))
+    rows = []
+    for path in paths:
+        statements = eager_imports(path)
+        imported, first_use, per_package, failed = measure(statements, cwd=os.path.dirname(path) or ".")
+        rows.append((imported, first_use, path, per_package, failed))
+
+    print(f"{'import':>8}{'first use':>11}{'total':>9}  notebook")
+    for imported, first_use, path, per_package, failed in sorted(rows, key=lambda row: row[0] + row[1], reverse=True):
+        total = (imported + first_use) / 1e6
+        print(f"{imported / 1e6:7.3f}s{first_use / 1e6:10.3f}s{total:8.3f}s  {os.path.basename(path)}")
+        for phase, packages in per_package.items():
+            top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]
+            for name, cost in top:
+                print(f"{'':30}{cost / 1e6:7.3f}s  {name} ({phase})")
+        for statement in failed:
+            print(f"{'':30}(failed: {statement})")
+
+    imported = sum(row[0] for row in rows) / 1e6
+    first_use = sum(row[1] for row in rows) / 1e6
+    print(
+        f"\nTotal across {len(rows)} notebooks: {imported:.3f}s import + {first_use:.3f}s first use "
+        f"= {imported + first_use:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Parallelization benchmark: measures what the parallel paths in `llm_fanout` actually buy.
+
+Runs the parallel chains of the 03_* notebooks around a fake chat model that
+sleeps for a sampled latency instead of calling an API. Only the branch,
+section, conclusion and synthesis runnables are built here (prompt | fake
+model | parser, as in the notebooks); the fan-out and fan-in are the shipped
+code. Modes:
+
+    sequential        branches invoked one after another, then the synthesis
+    parallel-threads  RunnableParallel({**branches, "topic": passthrough}) | synthesis, invoked;
+                      the shape of `full_parallel_chain` in 03_parallelization_langchain
+    parallel-async    the same chain, streamed on the event loop
+    fanout-threads    FanOut.invoke (shared thread pool) | synthesis; the shape of `pipeline`
+                      in 03_parallelization_google_adk
+    fanout-async      FanOut.ainvoke | synthesis
+    incremental       IncrementalSynthesizer: each branch output streamed as it arrives, plus a
+                      short conclusion
+
+Each call waits a sampled time to first token, then generation time for its
+reply at `--tokens-per-second`: a branch writes `--section-tokens`, the
+synthesis rewrites every branch and concludes (branches * section + conclusion
+tokens), the incremental conclusion writes only `--conclusion-tokens`.
+
+The branch count and the latency variance (sigma of a lognormal with fixed
+mean) are swept. Reported per cell:
+
+    speedup     sequential time / measured time
+    first       time to the first streamed output (async modes only)
+    overhead    (measured - ideal) / branches, where ideal follows from the latency
+                injected into each call (max branch + synthesis, their sum for sequential,
+                and max branch + conclusion for incremental)
+    loop lag    worst lateness of a 1 ms ticker on the event loop (async modes only)
+
+Usage:
+    python scripts/benchmark_parallel.py [--branches 2 4 8 16] [--sigma 0 0.5 1] [--mean 0.05]
+    python scripts/benchmark_parallel.py --tokens-per-second 0   # time to first token only
+    python scripts/benchmark_parallel.py --fail-overhead 5   # exit 1 if any overhead > 5 ms/branch
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "notebooks"))
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.output_parsers import StrOutputParser  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+from langchain_core.runnables import Runnable, RunnableParallel, RunnablePassthrough  # noqa: E402
+
+from pydantic import Field, PrivateAttr  # noqa: E402
+
+from llm_fanout import FanOut, IncrementalSynthesizer  # noqa: E402
+
+MODES = ("sequential", "parallel-threads", "parallel-async", "fanout-threads", "fanout-async", "incremental")
+
+
+class LatencyFakeChatModel(BaseChatModel):
+    """
+    Chat model that waits a lognormal time to first token (given mean and sigma),
+    then generation time for its reply, and returns that many placeholder tokens.
+    """
+
+    mean: float = 0.05
+    sigma: float = 0.0
+    seed: Optional[int] = None
+    tokens_per_second: float = 0.0  # 0 disables generation time
+    # Reply length per call kind, keyed by the first word of the system prompt ("Task", "Synthesize", ...).
+    reply_tokens: dict[str, int] = Field(default_factory=dict)
+    # Injected latency per call, keyed by the call's system prompt (e.g. "Task 3.", "Section branch_3.").
+    delays: dict[str, float] = Field(default_factory=dict)
+    _random: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    def _reply(self, messages: list[BaseMessage]) -> tuple[float, str]:
+        """Returns (total latency, reply text) for one call and records the latency."""
+        system = str(messages[0].content)
+        tokens = self.reply_tokens.get(system.split()[0].rstrip(".:"), 1)
+        with self._lock:
+            if self.sigma:
+                mu = math.log(self.mean) - self.sigma**2 / 2
+                delay = self._random.lognormvariate(mu, self.sigma)
+            else:
+                delay = self.mean
+            if self.tokens_per_second:
+                delay += tokens / self.tokens_per_second
+            self.delays[system.split(":")[0]] = delay
+        return delay, " ".join(["ok"] * tokens)
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, reply = self._reply(messages)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay, reply = self._reply(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-fake"
+
+
+def build_branches(llm: BaseChatModel, count: int) -> dict[str, Runnable]:
+    return {
+        f"branch_{i}": ChatPromptTemplate.from_messages([("system", f"Task {i}."), ("user", "{topic}")])
+        | llm
+        | StrOutputParser()
+        for i in range(count)
+    }
+
+
+def build_synthesis(llm: BaseChatModel, names: list[str]) -> Runnable:
+    body = "\n".join(f"{name}: {{{name}}}" for name in names)
+    prompt = ChatPromptTemplate.from_messages([("system", "Synthesize:\n" + body), ("user", "{topic}")])
+    return prompt | llm | StrOutputParser()
+
+
+def build_parallel_chain(branches: dict, synthesis: Runnable) -> Runnable:
+    """`map_chain | synthesis` as in 03_parallelization_langchain."""
+    return RunnableParallel({**branches, "topic": RunnablePassthrough()}) | synthesis
+
+
+def build_fanout_chain(branches: dict, synthesis: Runnable) -> Runnable:
+    fan_out = FanOut(branches, timeout=600.0).as_runnable()
+    return fan_out | (lambda results: {**results, "topic": "benchmark"}) | synthesis
+
+
+def build_incremental(llm: BaseChatModel, branches: dict) -> Runnable:
+    """Built like `incremental_chain` in 03_parallelization_langchain."""
+    conclusion = ChatPromptTemplate.from_messages([("system", "Conclusion."), ("user", "{input}")])
+    return IncrementalSynthesizer(
+        branches,
+        section_template="## {name}\n\n{output}",
+        conclusion=conclusion | llm | StrOutputParser(),
+    ).as_runnable()
+
+
+def run_sequential(branches: dict, synthesis: Runnable, topic: str) -> str:
+    results = {name: branch.invoke(topic) for name, branch in branches.items()}
+    return synthesis.invoke({**results, "topic": topic})
+
+
+async def _timed_with_lag(chain: Runnable, topic: str) -> tuple[float, float, float]:
+    """Streams `chain` while a 1 ms ticker measures event loop lag. Returns (total, first output, lag)."""
+    lag = 0.0
+    first = None
+    stop = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - expected)
+
+    monitor = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    async for _ in chain.astream(topic):
+        if first is None:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return elapsed, first, lag
+
+
+def ideal_seconds(mode: str, delays: dict[str, float]) -> float:
+    """Lower bound for `mode` given the latency injected into each call."""
+    branches = {key.split()[1].rstrip("."): delay for key, delay in delays.items() if key.startswith("Task")}
+    if mode == "sequential":
+        return sum(delays.values())
+    if mode == "incremental":
+        return max(branches.values()) + delays["Conclusion."]
+    return max(branches.values()) + delays["Synthesize"]
+
+
+def measure(
+    count: int, mean: float, sigma: float, repeats: int, seed: int, tokens: dict, tokens_per_second: float
+) -> dict:
+    """Mean time, overhead against the ideal and loop lag per mode for one (branches, sigma) cell."""
+    reply_tokens = {
+        "Task": tokens["section"],
+        "Synthesize": count * tokens["section"] + tokens["conclusion"],
+        "Conclusion": tokens["conclusion"],
+    }
+    rows = {}
+    for mode in MODES:
+        elapsed, ideal, firsts, lags = [], [], [], []
+        for repeat in range(repeats):
+            llm = LatencyFakeChatModel(
+                mean=mean,
+                sigma=sigma,
+                seed=seed + repeat,
+                tokens_per_second=tokens_per_second,
+                reply_tokens=reply_tokens,
+            )
+            branches = build_branches(llm, count)
+            synthesis = build_synthesis(llm, list(branches))
+            start = time.perf_counter()
+            if mode == "sequential":
+                run_sequential(branches, synthesis, "benchmark")
+                elapsed.append(time.perf_counter() - start)
+            elif mode == "parallel-threads":
+                build_parallel_chain(branches, synthesis).invoke("benchmark")
+                elapsed.append(time.perf_counter() - start)
+            elif mode == "fanout-threads":
+                build_fanout_chain(branches, synthesis).invoke("benchmark")
+                elapsed.append(time.perf_counter() - start)
+            else:
+                if mode == "parallel-async":
+                    chain = build_parallel_chain(branches, synthesis)
+                elif mode == "fanout-async":
+                    chain = build_fanout_chain(branches, synthesis)
+                else:
+                    chain = build_incremental(llm, branches)
+                seconds, first, lag = asyncio.run(_timed_with_lag(chain, "benchmark"))
+                elapsed.append(seconds)
+                firsts.append(first)
+                lags.append(lag)
+            ideal.append(ideal_seconds(mode, llm.delays))
+        rows[mode] = {
+            "seconds": statistics.fmean(elapsed),
+            "first_output_seconds": statistics.fmean(firsts) if firsts else None,
+            "overhead_ms_per_branch": 1000 * statistics.fmean(e - i for e, i in zip(elapsed, ideal)) / count,
+            "loop_lag_ms": 1000 * max(lags) if lags else None,
+        }
+    for mode in rows:
+        rows[mode]["speedup"] = rows["sequential"]["seconds"] / rows[mode]["seconds"]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parallel paths of llm_fanout.")
+    parser.add_argument("--branches", nargs="+", type=int, default=[2, 4, 8, 16])
+    parser.add_argument("--sigma", nargs="+", type=float, default=[0.0, 0.5, 1.0], help="Lognormal latency sigmas.")
+    parser.add_argument("--mean", type=float, default=0.05, help="Mean injected time to first token in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=1000.0, help="Generation speed; 0 disables it.")
+    parser.add_argument("--section-tokens", type=int, default=20, help="Tokens a branch writes.")
+    parser.add_argument("--conclusion-tokens", type=int, default=10, help="Tokens of the closing paragraph.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument("--fail-overhead", type=float, help="Exit 1 if a parallel mode exceeds this many ms/branch.")
+    args = parser.parse_args()
+
+    # One unmeasured pass so first-call costs (imports, callback setup) do not skew the first cell.
+    tokens = {"section": args.section_tokens, "conclusion": args.conclusion_tokens}
+    measure(2, 0.001, 0.0, 1, args.seed, tokens, 0.0)
+
+    results = []
+    for count in args.branches:
+        for sigma in args.sigma:
+            rows = measure(count, args.mean, sigma, args.repeats, args.seed, tokens, args.tokens_per_second)
+            results.append({"branches": count, "sigma": sigma, "modes": rows})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"Mean time to first token {args.mean * 1000:.0f} ms, {args.tokens_per_second:g} tokens/s, "
+            f"{args.repeats} repeats per cell\n"
+        )
+        print(
+            f"{'N':>4}{'sigma':>7}  {'mode':<18}{'time':>9}{'first':>9}"
+            f"{'speedup':>9}{'ovh/branch':>12}{'loop lag':>10}"
+        )
+        for result in results:
+            for mode, row in result["modes"].items():
+                first = "" if row["first_output_seconds"] is None else f"{row['first_output_seconds'] * 1000:.0f}ms"
+                lag = "" if row["loop_lag_ms"] is None else f"{row['loop_lag_ms']:.2f}ms"
+                print(
+                    f"{result['branches']:>4}{result['sigma']:>7.1f}  {mode:<18}"
+                    f"{row['seconds'] * 1000:>7.0f}ms{first:>9}{row['speedup']:>8.1f}x"
+                    f"{row['overhead_ms_per_branch']:>10.2f}ms{lag:>10}"
+                )
+
+    if args.fail_overhead is not None:
+        worst = max(
+            row["overhead_ms_per_branch"]
+            for result in results
+            for mode, row in result["modes"].items()
+            if mode != "sequential"
+        )
+        if worst > args.fail_overhead:
+            print(f"\nFAIL: parallel overhead {worst:.2f} ms/branch exceeds {args.fail_overhead} ms/branch")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from adk_driver import ConcurrentRunnerDriver  # noqa: E402
+
+
+class Runner:
+    """Minimal runner whose event stream records whether it was closed."""
+
+    app_name = "test"
+
+    def __init__(self):
+        self.closed = False
+        self.session_service = SimpleNamespace(create_session=self._create_session)
+
+    async def _create_session(self, **kwargs):
+        return None
+
+    async def run_async(self, **kwargs):
+        try:
+            content = SimpleNamespace(parts=[SimpleNamespace(text="done")])
+            yield SimpleNamespace(is_final_response=lambda: True, content=content)
+            yield SimpleNamespace(is_final_response=lambda: False, content=None)
+        finally:
+            self.closed = True
+
+
+def test_event_stream_is_closed_after_the_final_response():
+    runner = Runner()
+
+    async def run():
+        record = await ConcurrentRunnerDriver(runner).run("hi")
+        # Checked before the loop shuts down, which would otherwise close the stream itself.
+        return record, runner.closed
+
+    record, closed = asyncio.run(run())
+    assert record.response == "done"
+    assert closed
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+from langchain_openai import ChatOpenAI
+
+from batch_runner import build_runnable, completed_ids, run_batch
+
+SPECS = {"cpu": "", "memory": "16GB", "storage": ""}
+
+
+def recording_model(bodies: list) -> ChatOpenAI:
+    """ChatOpenAI against a mock API that records request bodies and answers with fixed specs."""
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        message = {"role": "assistant", "content": json.dumps(SPECS)}
+        return httpx.Response(
+            200,
+            json={
+                "id": "stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub/model",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            },
+        )
+
+    transport = httpx.MockTransport(upstream)
+    return ChatOpenAI(
+        model="stub/model",
+        api_key="stub",
+        base_url="http://stub/v1",
+        temperature=0,
+        max_retries=0,
+        http_client=httpx.Client(transport=transport),
+        http_async_client=httpx.AsyncClient(transport=transport),
+    )
+
+
+def test_single_mode_prompt_contains_the_raw_text(tmp_path):
+    bodies = []
+    runnable = build_runnable("single", "stub/model", llm=recording_model(bodies))
+    output = tmp_path / "specs.jsonl"
+
+    stats = asyncio.run(run_batch(runnable, [{"id": "a", "text": "laptop 16GB"}], str(output), progress_every=0))
+
+    assert stats["processed"] == 1 and stats["failed"] == 0
+    assert bodies[0]["messages"][-1]["content"] == (
+        "Extract the technical specifications (cpu, memory, storage) from the following text. "
+        "Use an empty string for anything the text does not mention.\n\nlaptop 16GB"
+    )
+    result = json.loads(output.read_text())
+    assert result["id"] == "a"
+    assert result["output"]["specs"] == SPECS
+
+
+def test_two_step_mode_prompt_contains_the_raw_text(tmp_path):
+    bodies = []
+    runnable = build_runnable("two-step", "stub/model", llm=recording_model(bodies))
+
+    asyncio.run(run_batch(runnable, [{"id": "a", "text": "laptop 16GB"}], str(tmp_path / "out.jsonl"), progress_every=0))
+
+    assert bodies[0]["messages"][-1]["content"] == (
+        "Extract the technical specifications from the following text:\n\nlaptop 16GB"
+    )
+
+
+def test_resume_drops_a_torn_last_line(tmp_path):
+    output = tmp_path / "specs.jsonl"
+    output.write_text('{"id": 0, "output": "A"}\n{"id": 1, "outp')
+    runnable = RunnableLambda(lambda inputs: inputs["text_input"])
+    records = [{"id": i, "text": text} for i, text in enumerate("ABC")]
+
+    stats = asyncio.run(run_batch(runnable, records, str(output), ordered=True, progress_every=0))
+
+    assert stats["skipped"] == 1 and stats["processed"] == 2
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert lines == [{"id": 0, "output": "A"}, {"id": 1, "output": "B"}, {"id": 2, "output": "C"}]
+    assert completed_ids(str(output)) == {0, 1, 2}
@@ -0,0 +1,26 @@
+from langchain_core.runnables import RunnableLambda
+
+from embedding_router import CentroidRouter, benchmark_router
+
+
+def llm_router(route: str) -> RunnableLambda:
+    return RunnableLambda(lambda value: f" {route}\n")
+
+
+def test_travel_question_goes_to_the_fallback():
+    router = CentroidRouter(fallback=llm_router("info"))
+
+    assert router.route({"request": "What is the best hotel in Paris?"}) == "info"
+    assert router.route({"request": "Book me a flight to London."}) == "booker"
+    assert (router.fallback_calls, router.local_calls) == (1, 1)
+
+
+def test_benchmark_reports_only_its_own_calls():
+    router = CentroidRouter(fallback=llm_router("info"))
+    for _ in range(5):
+        router.route("What is the best hotel in Paris?")
+
+    report = benchmark_router(router, llm_router("booker"), ["Book me a flight to London."])
+
+    assert (report["local_calls"], report["fallback_calls"], report["local_ratio"]) == (1, 0, 1.0)
+    assert report["agreement"] == 1.0
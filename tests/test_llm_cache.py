@@ -0,0 +1,64 @@
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from llm_cache import HashingEmbedder, SemanticResponseCache
+
+SYSTEM = (
+    "You are a helpful geography and mathematics tutor. Answer in one short sentence, "
+    "be precise, and never speculate beyond well-established facts."
+)
+
+
+def ask(llm, question: str) -> str:
+    return llm.invoke([SystemMessage(content=SYSTEM), HumanMessage(content=question)]).content
+
+
+def test_near_miss_questions_do_not_collide():
+    cache = SemanticResponseCache()
+    llm = FakeListChatModel(responses=["Paris.", "Tokyo.", "Yes.", "No."], cache=cache)
+
+    assert ask(llm, "What is the capital of France?") == "Paris."
+    assert ask(llm, "What is the capital of Japan?") == "Tokyo."
+    assert ask(llm, "Is 7 a prime number?") == "Yes."
+    assert ask(llm, "Is 9 a prime number?") == "No."
+    assert cache.stats()["hits"] == 0
+
+
+def test_rephrased_question_hits():
+    cache = SemanticResponseCache()
+    llm = FakeListChatModel(responses=["Paris.", "unexpected"], cache=cache)
+
+    assert ask(llm, "What is the capital of France?") == "Paris."
+    assert ask(llm, "capital of France?") == "Paris."
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_system_prompt_is_a_miss():
+    cache = SemanticResponseCache()
+    llm = FakeListChatModel(responses=["Paris.", "Paris, France."], cache=cache)
+
+    ask(llm, "What is the capital of France?")
+    answer = llm.invoke([SystemMessage(content="Answer verbosely."), HumanMessage(content="What is the capital of France?")])
+    assert answer.content == "Paris, France."
+    assert cache.stats()["hits"] == 0
+
+
+def test_near_miss_similarity_is_below_default_threshold():
+    embedder = HashingEmbedder()
+    similarity = float(embedder.embed_query("Is 7 a prime number?") @ embedder.embed_query("Is 9 a prime number?"))
+    assert similarity < SemanticResponseCache().threshold
+
+
+def test_max_entries_bounds_the_whole_cache():
+    cache = SemanticResponseCache(max_entries=5)
+    llm = FakeListChatModel(responses=[f"answer {i}" for i in range(40)], cache=cache)
+
+    kept = [SystemMessage(content="conversation 0"), HumanMessage(content="hello")]
+    llm.invoke(kept)
+    for i in range(1, 20):  # A new conversation prefix each time, as in multi-turn use.
+        llm.invoke([SystemMessage(content=f"conversation {i}"), HumanMessage(content="hello")])
+        llm.invoke(kept)  # Keeps this entry the most recently used.
+
+    assert cache.stats()["entries"] == 5
+    assert len(cache._namespaces) == 5
+    assert cache.stats()["misses"] == 20
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from llm_concurrency import AdaptiveConcurrencyLimiter
+
+
+def test_healthy_calls_raise_the_limit_by_one_slot_per_window():
+    limiter = AdaptiveConcurrencyLimiter(initial=4)
+
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(0.1)
+
+    assert limiter.limit == 4  # 4 + 1/4 + ~1/4.25 + ... stays just below 5.
+    limiter.acquire()
+    limiter.release(0.1)
+    assert limiter.limit == 5
+    assert limiter.successes == 5
+
+
+def test_overload_halves_the_limit_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, cooldown=60)
+    overload = httpx.HTTPStatusError("busy", request=None, response=httpx.Response(429))
+
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release(0.1, overload)
+
+    assert limiter.limit == 4
+    assert (limiter.overloads, limiter.decreases) == (2, 1)
+
+
+def test_latency_spike_counts_as_overload_and_other_errors_do_not():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, cooldown=0)
+    limiter.acquire()
+    limiter.release(0.1)  # Sets the latency baseline.
+
+    limiter.acquire()
+    limiter.release(0.1, ValueError("bad output"))
+    assert limiter.decreases == 0
+
+    limiter.acquire()
+    limiter.release(0.5)  # Above spike_factor (2) times the 0.1s baseline.
+    assert limiter.decreases == 1
+    assert limiter.limit == 4
+
+
+def test_waiters_are_served_in_arrival_order():
+    limiter = AdaptiveConcurrencyLimiter(initial=1, max_limit=1)
+    order = []
+
+    async def call(name):
+        async with limiter.aslot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await limiter.aacquire()  # Holds the only slot until every caller has queued.
+        tasks = []
+        for name in range(5):
+            tasks.append(asyncio.create_task(call(name)))
+            await asyncio.sleep(0)
+        limiter.release(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_adk_model_error_releases_the_slot():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, cooldown=0)
+    callbacks = limiter.adk_callbacks()
+    context = SimpleNamespace(invocation_id="run-1", agent_name="fetcher")
+
+    async def failing_call():
+        await callbacks["before_model_callback"](context, None)
+        assert limiter.in_flight == 1
+        await callbacks["on_model_error_callback"](context, None, TimeoutError())
+        await callbacks["after_agent_callback"](context)  # Must not release the slot twice.
+
+    asyncio.run(failing_call())
+    assert limiter.in_flight == 0
+    assert limiter.decreases == 1
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_costs import BudgetExceeded, CostLedger
+
+# $0.10 per call with max_output_tokens=100 and an empty prompt.
+PRICES = {"big": (0.0, 1000.0)}
+
+
+def ledger(**budgets) -> CostLedger:
+    return CostLedger(prices=PRICES, downgrades={}, **budgets)
+
+
+def try_authorize(costs: CostLedger, request_id: str):
+    try:
+        return costs.authorize("big", "", request_id, max_output_tokens=100)
+    except BudgetExceeded:
+        return None
+
+
+def test_concurrent_authorizations_cannot_overspend():
+    costs = ledger(per_minute_budget=0.25)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(lambda i: try_authorize(costs, f"r{i}"), range(8)))
+    assert sum(decision is not None for decision in decisions) == 2
+
+
+def test_record_settles_the_reservation_with_the_actual_cost():
+    costs = ledger(per_request_budget=0.25)
+    first = costs.authorize("big", "", "r", max_output_tokens=100)
+    costs.authorize("big", "", "r", max_output_tokens=100)
+    with pytest.raises(BudgetExceeded):
+        costs.authorize("big", "", "r", max_output_tokens=100)
+
+    # The first call used 10 of its 100 reserved output tokens: $0.01 instead of $0.10.
+    assert costs.record("r", "big", 0, 10, decision=first) == pytest.approx(0.01)
+    assert costs.authorize("big", "", "r", max_output_tokens=100).action == "allow"
+
+
+def test_release_returns_the_reservation():
+    costs = ledger(per_minute_budget=0.15)
+    decision = costs.authorize("big", "", "r1", max_output_tokens=100)
+    assert try_authorize(costs, "r2") is None
+    costs.release(decision)
+    assert try_authorize(costs, "r2") is not None
+
+
+def test_record_without_decision_settles_the_oldest_open_reservation():
+    costs = ledger(per_minute_budget=0.15)
+    costs.authorize("big", "", "r1", max_output_tokens=100)
+    costs.record("r1", "big", 0, 0)
+    assert try_authorize(costs, "r2") is not None
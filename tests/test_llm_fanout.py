@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
+
+import llm_fanout
+from llm_fanout import FanOut, IncrementalSynthesizer
+
+
+def sleeper(seconds_by_input: dict) -> RunnableLambda:
+    def run(value):
+        time.sleep(seconds_by_input[value])
+        return value
+
+    async def arun(value):
+        await asyncio.sleep(seconds_by_input[value])
+        return value
+
+    return RunnableLambda(run, afunc=arun)
+
+
+def test_concurrent_runs_keep_their_own_results():
+    fan_out = FanOut({"a": sleeper({"fast": 0.01, "slow": 0.2})}, timeout=0.1)
+
+    async def both():
+        return await asyncio.gather(fan_out.arun("slow"), fan_out.arun("fast"))
+
+    slow, fast = asyncio.run(both())
+    assert slow.branches["a"].status == "timeout"
+    assert slow.outputs["a"] == "[MISSING: timed out after 0.1s]"
+    assert fast.branches["a"].status == "ok"
+    assert fast.outputs == {"a": "fast"}
+
+
+def test_invoke_returns_at_the_deadline_and_shares_the_pool():
+    fan_out = FanOut({"a": sleeper({"x": 0.01}), "b": sleeper({"x": 0.5})}, timeout=0.1)
+    other = FanOut({"c": sleeper({"x": 0.01})})
+
+    start = time.perf_counter()
+    run = fan_out.run("x")
+    assert time.perf_counter() - start < 0.3
+    assert run.branches["a"].status == "ok"
+    assert run.branches["b"].status == "timeout"
+    assert fan_out._executor is other._executor is llm_fanout._executor
+
+
+def delayed(seconds: float, output):
+    async def run(value):
+        await asyncio.sleep(seconds)
+        return output(value) if callable(output) else output
+
+    return RunnableLambda(run)
+
+
+def test_incremental_finishes_at_the_slowest_branch_plus_the_conclusion():
+    synthesizer = IncrementalSynthesizer(
+        {"a": delayed(0.05, "A"), "b": delayed(0.2, "B")},
+        section_template="{name}: {output}",
+        conclusion=delayed(0.05, lambda payload: f"done with {payload['a']} and {payload['b']}"),
+    )
+
+    run = asyncio.run(synthesizer.arun("topic"))
+
+    assert run.text == "a: A\n\nb: B\n\ndone with A and B"
+    assert run.timeline["first_output"] < 0.1
+    assert run.timeline["done"] == pytest.approx(0.25, abs=0.05)
+
+
+def test_concurrent_runs_keep_their_own_timelines():
+    synthesizer = IncrementalSynthesizer({"a": delayed(0.01, lambda value: value)})
+
+    async def both():
+        return await asyncio.gather(synthesizer.arun("x"), synthesizer.arun("y"))
+
+    x, y = asyncio.run(both())
+    assert (x.text, y.text) == ("x", "y")
+    assert x.timeline is not y.timeline
+    assert set(x.timeline) == set(y.timeline) == {"branch:a", "branches_done", "first_output", "done"}
+
+
+def test_streamed_input_chunks_are_merged():
+    async def chunks(_):
+        for chunk in ("to", "pic"):
+            yield chunk
+
+    async def consume():
+        chain = RunnableGenerator(chunks) | IncrementalSynthesizer({"a": delayed(0, lambda value: value)}).as_runnable()
+        return "".join([chunk async for chunk in chain.astream(None)])
+
+    assert asyncio.run(consume()) == "topic"
+
+
+def test_unmergeable_input_chunks_are_rejected():
+    async def chunks(_):
+        yield {"topic": "a"}
+        yield {"topic": "b"}
+
+    async def consume():
+        # Streaming hands the synthesizer the chunks as they are produced, unmerged.
+        chain = RunnableGenerator(chunks) | IncrementalSynthesizer({"a": delayed(0, "A")}).as_runnable()
+        return [chunk async for chunk in chain.astream(None)]
+
+    with pytest.raises(ValueError, match="cannot be merged"):
+        asyncio.run(consume())
@@ -0,0 +1,19 @@
+import asyncio
+
+import llm_replay
+from llm_http import AsyncJSONClient
+
+
+def transport(client: AsyncJSONClient):
+    return client.client._transport
+
+
+def test_explicit_none_disables_the_environment_cassette(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CASSETTE_DIR", str(tmp_path))
+
+    default, disabled = AsyncJSONClient(), AsyncJSONClient(cassette=None)
+
+    assert isinstance(transport(default), llm_replay.AsyncReplayTransport)
+    assert not isinstance(transport(disabled), llm_replay.AsyncReplayTransport)
+    asyncio.run(default.aclose())
+    asyncio.run(disabled.aclose())
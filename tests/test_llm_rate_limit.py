@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+from llm_rate_limit import AsyncRateLimitedTransport, RateLimiter
+
+
+def level(limiter: RateLimiter, model: str) -> float:
+    return limiter._states[model].tokens.level
+
+
+def test_cancelled_waiter_refunds_its_reservation():
+    limiter = RateLimiter()
+    limiter.set_limit("m", rpm=60, tpm=600)
+    limiter.acquire("m", 600)  # Drains the token bucket, so the next caller must wait.
+
+    async def cancelled():
+        waiter = asyncio.create_task(limiter.aacquire("m", 300))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancelled())
+    assert level(limiter, "m") > -1  # Only the refill since the drain, not the cancelled 300.
+    assert limiter._states["m"].requests.level > 57
+    assert limiter.metrics()["m"]["queue_depth"] == 0
+
+
+@pytest.mark.parametrize("outcome", ["raise", "429"])
+def test_failed_request_refunds_its_tokens(outcome):
+    limiter = RateLimiter()
+    limiter.set_limit("m", tpm=10_000)
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        if outcome == "raise":
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(429, json={"error": {"message": "rate limited"}})
+
+    async def call():
+        transport = AsyncRateLimitedTransport(limiter, httpx.MockTransport(upstream))
+        async with httpx.AsyncClient(transport=transport) as http:
+            try:
+                await http.post("http://stub/v1/chat/completions", json={"model": "m", "max_tokens": 1000})
+            except httpx.ConnectError:
+                pass
+
+    asyncio.run(call())
+    assert level(limiter, "m") == pytest.approx(10_000)
@@ -0,0 +1,48 @@
+import httpx
+
+import llm_replay
+from llm_replay import Cassette, LatencyModel, ReplayTransport
+
+
+def client(cassette: Cassette, statuses: list[int]) -> tuple[httpx.Client, list]:
+    """Client recording through `cassette`, with a mock upstream answering `statuses` in turn."""
+    calls = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, json={"call": len(calls)})
+
+    return httpx.Client(transport=ReplayTransport(cassette, httpx.MockTransport(upstream))), calls
+
+
+def test_error_responses_are_not_recorded(tmp_path):
+    cassette = Cassette(tmp_path, latency=LatencyModel(scale=0))
+    http, calls = client(cassette, [429, 200])
+
+    assert http.post("http://stub/v1/chat", json={"q": 1}).status_code == 429
+    assert not list(tmp_path.glob("*.json"))
+    assert http.post("http://stub/v1/chat", json={"q": 1}).json() == {"call": 2}
+    assert http.post("http://stub/v1/chat", json={"q": 1}).json() == {"call": 2}
+    assert len(calls) == 2
+
+
+def test_record_errors_opts_in(tmp_path):
+    cassette = Cassette(tmp_path, latency=LatencyModel(scale=0), record_errors=True)
+    http, calls = client(cassette, [503, 200])
+
+    assert http.post("http://stub/v1/chat", json={"q": 1}).status_code == 503
+    assert http.post("http://stub/v1/chat", json={"q": 1}).status_code == 503
+    assert len(calls) == 1
+
+
+def test_api_key_placeholder_only_in_replay(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_CASSETTE_DIR", str(tmp_path))
+
+    monkeypatch.setenv("LLM_CASSETTE_MODE", "auto")
+    assert llm_replay.api_key("OPENROUTER_API_KEY") is None
+    monkeypatch.setenv("LLM_CASSETTE_MODE", "replay")
+    assert llm_replay.api_key("OPENROUTER_API_KEY") == "replay"
+    monkeypatch.setenv("OPENROUTER_API_KEY", "real")
+    assert llm_replay.api_key("OPENROUTER_API_KEY") == "real"
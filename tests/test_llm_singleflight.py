@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from llm_hedging import HedgePolicy, hedged
+from llm_singleflight import AsyncSingleFlightTransport, SingleFlight
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub/model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def build(latencies: list[float], temperature: float = 0.0) -> tuple[ChatOpenAI, SingleFlight, list]:
+    """Model behind a single-flight layer and a mock upstream with one latency per call."""
+    group, calls = SingleFlight(), []
+
+    async def upstream(request: httpx.Request) -> httpx.Response:
+        calls.append(time.perf_counter())
+        index = len(calls)
+        await asyncio.sleep(latencies[min(index, len(latencies)) - 1])
+        return httpx.Response(200, json=completion(f"answer {index}"))
+
+    transport = AsyncSingleFlightTransport(group, httpx.MockTransport(upstream))
+    llm = ChatOpenAI(
+        model="stub/model",
+        api_key="stub",
+        base_url="http://stub/v1",
+        temperature=temperature,
+        max_retries=0,
+        http_async_client=httpx.AsyncClient(transport=transport),
+    )
+    return llm, group, calls
+
+
+async def gather(llm: ChatOpenAI, n: int) -> list[str]:
+    return [message.content for message in await asyncio.gather(*(llm.ainvoke("hi") for _ in range(n)))]
+
+
+def test_identical_deterministic_calls_share_one_upstream_call():
+    llm, group, calls = build([0.1])
+    answers = asyncio.run(gather(llm, 5))
+    assert answers == ["answer 1"] * 5
+    assert len(calls) == 1
+    assert group.metrics()["stub/model"] == {
+        "requests": 5,
+        "upstream_calls": 1,
+        "coalesced": 4,
+        "coalesce_ratio": 0.8,
+        "max_waiters": 5,
+    }
+
+
+def test_sampled_calls_are_not_coalesced():
+    llm, group, calls = build([0.1], temperature=0.7)
+    answers = asyncio.run(gather(llm, 3))
+    assert len(calls) == 3
+    assert len(set(answers)) == 3
+    assert group.metrics() == {}
+
+
+def test_hedge_still_makes_a_second_upstream_call():
+    llm, group, calls = build([1.0, 0.05])
+    policy = HedgePolicy(initial_delay=0.2, budget=1.0)
+
+    start = time.perf_counter()
+    answer = asyncio.run(hedged(llm, policy=policy).ainvoke("hi"))
+    elapsed = time.perf_counter() - start
+
+    assert len(calls) == 2
+    assert answer.content == "answer 2"
+    assert elapsed < 0.6
+    assert policy.metrics()["hedge_wins"] == 1
+    assert group.metrics()["stub/model"]["coalesced"] == 0
+
+
+def test_call_after_last_waiter_cancelled_starts_a_new_flight():
+    llm, group, calls = build([0.2])
+
+    async def run():
+        abandoned = asyncio.create_task(llm.ainvoke("hi"))
+        await asyncio.sleep(0.05)
+        abandoned.cancel()
+        # Same request, issued before the cancelled upstream task has finished unwinding.
+        fresh = asyncio.create_task(llm.ainvoke("hi"))
+        await asyncio.gather(abandoned, return_exceptions=True)
+        return await fresh
+
+    answer = asyncio.run(run())
+    assert answer.content == "answer 2"
+    assert len(calls) == 2
+    assert all(flight.waiters >= 0 for flight in group._flights.values())
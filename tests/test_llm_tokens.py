@@ -0,0 +1,39 @@
+import threading
+
+from llm_tokens import TokenMonitor
+
+
+def test_finished_threads_do_not_keep_their_shards():
+    monitor = TokenMonitor()
+    for _ in range(20):
+        thread = threading.Thread(target=monitor.record, args=("m", 3, 2))
+        thread.start()
+        thread.join()
+
+    assert monitor.get_total_tokens() == (60, 40)
+    assert monitor._counters._shards == []
+    assert monitor.report(by=("model",))[("m",)]["calls"] == 20
+
+
+def test_reset_keeps_no_partial_updates():
+    monitor = TokenMonitor()
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            monitor.record("m", 1, 1)
+
+    writers = [threading.Thread(target=write) for _ in range(4)]
+    for writer in writers:
+        writer.start()
+    for _ in range(200):
+        monitor.reset()
+        group = monitor.report(by=()).get((), {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+        assert group["input_tokens"] == group["output_tokens"] == group["calls"]
+    stop.set()
+    for writer in writers:
+        writer.join()
+
+    monitor.reset()
+    monitor.record("m", 5, 1)
+    assert monitor.get_total_tokens() == (5, 1)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from spec_extraction import SpecExtractor
+
+SPECS = {"cpu": "octa-core", "memory": "16GB", "storage": "1TB"}
+
+
+def model_without_json_schema(transform_reply: str) -> ChatOpenAI:
+    """ChatOpenAI against a mock API that rejects `response_format` and answers plain prompts."""
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if "response_format" in body:
+            return httpx.Response(400, json={"error": {"message": "json_schema is not supported"}})
+        prompt = body["messages"][-1]["content"]
+        content = transform_reply if prompt.startswith("Transform") else "octa-core, 16GB, 1TB"
+        message = {"role": "assistant", "content": content}
+        return httpx.Response(
+            200,
+            json={
+                "id": "stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub/model",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            },
+        )
+
+    transport = httpx.MockTransport(upstream)
+    return ChatOpenAI(
+        model="stub/model",
+        api_key="stub",
+        base_url="http://stub/v1",
+        max_retries=0,
+        http_client=httpx.Client(transport=transport),
+        http_async_client=httpx.AsyncClient(transport=transport),
+    )
+
+
+def test_rejected_structured_call_falls_back_to_two_step():
+    extractor = SpecExtractor(model_without_json_schema(f"```json\n{json.dumps(SPECS)}\n```"))
+
+    result = extractor.invoke("laptop")
+    assert result.mode == "fallback"
+    assert result.specs.model_dump() == SPECS
+    assert asyncio.run(extractor.ainvoke("laptop")).specs.model_dump() == SPECS
+    assert extractor.structured_errors == extractor.fallbacks == 2
+
+
+def test_invalid_two_step_output_gives_empty_specs():
+    extractor = SpecExtractor(model_without_json_schema("The CPU is octa-core."))
+
+    result = extractor.invoke("laptop")
+    assert result.mode == "empty"
+    assert result.specs.model_dump() == {"cpu": "", "memory": "", "storage": ""}
+    assert "Invalid JSON" in result.error
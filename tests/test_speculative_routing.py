@@ -0,0 +1,78 @@
+import asyncio
+import gc
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from speculative_routing import SpeculativeRouter
+
+
+def test_failing_cancelled_speculation_is_retrieved():
+    unhandled = []
+
+    async def failing(value):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            raise RuntimeError("cleanup failed") from None  # Fails again while being cancelled.
+
+    async def router(value):
+        await asyncio.sleep(0.01)
+        return "other"
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        handlers = {"guess": failing, "other": lambda value: "ok"}
+        speculative = SpeculativeRouter(router, handlers, prior=lambda v: "guess")
+        result = await speculative.arun("x")
+        await asyncio.sleep(0.01)
+        gc.collect()  # An unretrieved exception is reported when its task is collected.
+        return result
+
+    assert asyncio.run(run()) == "ok"
+    assert not unhandled
+
+
+def test_sync_router_error_cancels_the_queued_speculation():
+    release = threading.Event()
+    calls = []
+
+    def handler(value):
+        calls.append(value)
+        release.wait(1)
+        return value
+
+    def router(value):
+        if value == "boom":
+            raise RuntimeError("router failed")
+        return "a"
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    speculative = SpeculativeRouter(router, {"a": handler}, prior=lambda v: "a", executor=executor)
+    blocker = executor.submit(handler, "blocker")  # Keeps the next speculation queued.
+    time.sleep(0.01)
+
+    with pytest.raises(RuntimeError, match="router failed"):
+        speculative.run("boom")
+    release.set()
+    blocker.result()
+    executor.shutdown()
+    assert calls == ["blocker"]
+
+
+def test_close_shuts_down_only_the_routers_own_pool():
+    speculative = SpeculativeRouter(lambda value: "a", {"a": lambda value: value}, prior=lambda v: "a")
+    assert speculative.run("x") == "x"
+    pool = speculative._executor
+
+    speculative.close()
+    assert pool._shutdown
+    assert speculative.run("y") == "y"  # A later call starts a fresh pool.
+    speculative.close()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    SpeculativeRouter(lambda value: "a", {"a": lambda value: value}, executor=executor).close()
+    assert not executor._shutdown
+    executor.shutdown()
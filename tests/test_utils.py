@@ -0,0 +1,54 @@
+import json
+
+import llm_replay
+from llm_rate_limit import RateLimiter
+from llm_replay import Cassette, LatencyModel
+from utils import ModelRegistry
+
+
+def test_registry_keys_models_by_api_key():
+    registry = ModelRegistry()
+    first = registry.get("stub/model", 0.0, "key-a", base_url="http://stub/v1")
+
+    assert registry.get("stub/model", 0.0, "key-a", base_url="http://stub/v1") is first
+    other = registry.get("stub/model", 0.0, "key-b", base_url="http://stub/v1")
+    assert other is not first
+    assert other.openai_api_key.get_secret_value() == "key-b"
+    assert not any("key-a" in map(str, key) for key in registry._models)
+
+
+def test_replayed_calls_do_not_take_rate_limit_budget(tmp_path):
+    cassette = Cassette(tmp_path, mode="replay", latency=LatencyModel(scale=0))
+    url, body = "http://stub/v1/chat/completions", json.dumps({"model": "m:free"}).encode()
+    cassette.save(cassette.key("POST", url, body), "POST", url, 200, {}, b"{}", 0.0)
+    limiter = RateLimiter()
+    registry = ModelRegistry(cassette=cassette, limiter=limiter, single_flight=None)
+
+    for _ in range(30):  # Above the 20 RPM a live ":free" model is limited to.
+        assert registry.http_client.post(url, content=body).status_code == 200
+    assert limiter.metrics() == {}
+
+
+def test_close_closes_both_clients_and_rebuilds_with_new_limits():
+    registry = ModelRegistry(limiter=None, single_flight=None)
+    client, async_client = registry.http_client, registry.http_async_client
+
+    registry.close()
+    assert client.is_closed and async_client.is_closed
+
+    registry.configure(max_connections=3)
+    assert registry.http_async_client is not async_client
+    assert registry.http_async_client._transport._pool._max_connections == 3
+
+
+def test_environment_cassette_is_resolved_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CASSETTE_DIR", str(tmp_path))
+    resolved = []
+    monkeypatch.setattr(llm_replay, "cassette_from_env", lambda: resolved.append(1) or Cassette(tmp_path))
+    registry = ModelRegistry()
+
+    assert registry.active_cassette() is registry.active_cassette()
+    assert len(resolved) == 1
+    registry.close()
+    registry.active_cassette()
+    assert len(resolved) == 2